@@ -0,0 +1,268 @@
+"""
+Benchmarks - timings for the hot paths of GV Zork, on the shipped world and on
+worlds made by worldgen with 10 to 1,000,000 Locations.
+
+For each world it measures:
+    build          - reading the world records into a World (create_world without the cache)
+    new_game       - making a Game in an already loaded world
+    dispatch       - lines per second through execute and the text renderer, as in play
+    look, take, give, go, weight_and_cals - the time of a single call of each command
+
+The generated worlds come from the same seed every time, so runs can be compared.
+Results are written as JSON. Given a baseline (the JSON of an earlier run), each
+timing is compared with it and the run fails if any got slower by more than the
+threshold. Compare runs made on the same, otherwise idle, machine.
+
+Usage: python bench.py [--sizes 10,1000,100000,1000000] [--repeat N] [--output FILE]
+                       [--baseline FILE] [--threshold 0.10]
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+import worldgen
+from main import DEFAULT_WORLD_FILE, Game, load_world
+from render import OutputBuffer, TextRenderer
+
+DEFAULT_SIZES = (10, 1000, 100000, 1000000)
+# commands typed over and over for the dispatch benchmark
+DISPATCH_SCRIPT = ('look', 'stats', 'go {forward}', 'go {back}', 'take {item}', 'give {item}', 'help', 'items')
+
+
+class NullSink:
+    """
+    NullSink class throws away the text it is given, so only the cost of making it is measured.
+    """
+
+    @staticmethod
+    def write(text: str) -> None:
+        """
+        method to throw text away
+        :param text: str - text to throw away
+        """
+
+
+class Scenario:
+    """
+    Scenario class describes a world to benchmark and where in it the commands can be run.
+
+    Attributes:
+        name: str - name of the world in the results
+        records: list[str] - the world's JSON Lines records
+        forward: str - a direction that leads from the start to a Location with a way back
+        back: str - the direction back to the start
+        item: str - an item lying at the start
+    """
+
+    def __init__(self, name: str, records: list[str], forward: str, back: str, item: str):
+        """
+        Constructor
+        :param name: str - name of the world in the results
+        :param records: list[str] - the world's JSON Lines records
+        :param forward: str - a direction that leads from the start to a Location with a way back
+        :param back: str - the direction back to the start
+        :param item: str - an item lying at the start
+        """
+        self.name = name
+        self.records = records
+        self.forward = forward
+        self.back = back
+        self.item = item
+
+
+def stock_scenario() -> Scenario:
+    """
+    Makes the Scenario of the shipped GV Zork world.
+    :return: Scenario - starting in the fudge shop
+    """
+    with open(DEFAULT_WORLD_FILE, encoding='utf-8') as file:
+        records = file.readlines()
+    return Scenario('stock', records, 'exit', 'south', 'chocolate fudge')
+
+
+def generated_scenario(size: int, seed: int = 0) -> Scenario:
+    """
+    Makes the Scenario of a world from worldgen, with its default settings.
+    :param size: int - number of Locations
+    :param seed: int - seed of the world
+    :return: Scenario - starting in the first Location, which the first door leads out of and back
+    """
+    records = []
+    item = None
+    for record in worldgen.generate_records(size, seed=seed):
+        if item is None and record['type'] == 'item' and record['location'] == 'r0':
+            item = record['name'].lower()
+        records.append(json.dumps(record))
+    if item is None:
+        raise ValueError(f'The generated world of size {size} has no item at the start!')
+    return Scenario(f'generated-{size}', records, 'door 1', 'back', item)
+
+
+def summarize(samples: list[int]) -> dict:
+    """
+    Works out the figures reported for a list of timings.
+    :param samples: list[int] - time of each call, in nanoseconds
+    :return: dict - mean, median, 99th percentile and best, in microseconds, and calls per second
+    """
+    samples = sorted(samples)
+    mean = sum(samples) / len(samples)
+    return {'calls': len(samples), 'mean_us': mean / 1000, 'p50_us': samples[len(samples) // 2] / 1000,
+            'p99_us': samples[min(len(samples) - 1, len(samples) * 99 // 100)] / 1000,
+            'min_us': samples[0] / 1000, 'per_second': 1e9 / mean}
+
+
+def time_calls(call, repeat: int, between=None, rounds: int = 3) -> dict:
+    """
+    Times a function one call at a time, with the garbage collector off. The calls
+    are made in several rounds and the round with the lowest median is kept, so a
+    burst of work elsewhere on the machine does not spoil the result.
+    :param call: callable - the code to time
+    :param repeat: int - how many times to call it in each round
+    :param between: callable - run, untimed, after each call (to undo what it did), optional
+    :param rounds: int - how many rounds to make
+    :return: dict - see summarize
+    """
+    clock = time.perf_counter_ns
+    best = None
+    for _ in range(rounds):
+        samples = []
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                started = clock()
+                call()
+                samples.append(clock() - started)
+                if between is not None:
+                    between()
+        finally:
+            gc.enable()
+        figures = summarize(samples)
+        if best is None or figures['p50_us'] < best['p50_us']:
+            best = figures
+    return best
+
+
+def run_scenario(scenario: Scenario, repeat: int) -> dict:
+    """
+    Runs every benchmark on one world.
+    :param scenario: Scenario - the world
+    :param repeat: int - how many times to time each command; the slower benchmarks use fewer
+    :return: dict - the figures of each benchmark, by name
+    """
+    results = {}
+    builds = max(1, min(repeat // 100, 200_000 // len(scenario.records)))
+    world = None
+
+    def build():
+        """
+        Reads the records into a new World.
+        """
+        nonlocal world
+        world = load_world(scenario.records)
+    results['build'] = time_calls(build, builds, rounds=1 if builds == 1 else 3)
+    world.freeze()
+    results['new_game'] = time_calls(lambda: Game(world, seed=0), repeat)
+
+    game = Game(world, seed=0)
+    renderer = TextRenderer()
+    out = OutputBuffer(NullSink())
+    lines = [line.format(forward=scenario.forward, back=scenario.back, item=scenario.item)
+             for line in DISPATCH_SCRIPT]
+    position = 0
+
+    def dispatch():
+        """
+        Runs and renders the next line of the script.
+        """
+        nonlocal position
+        renderer.render_to(game.execute(lines[position]), out)
+        out.flush()
+        position = (position + 1) % len(lines)
+    results['dispatch'] = time_calls(dispatch, repeat)
+
+    game = Game(world, seed=0)
+
+    def clear_events():
+        """
+        Forgets the events of the last call, as execute does before each command.
+        """
+        game.turn_events = []
+    results['look'] = time_calls(game.look, repeat, clear_events)
+    results['weight_and_cals'] = time_calls(game.weight_and_cals, repeat, clear_events)
+    results['take'] = time_calls(lambda: game.take(scenario.item),
+                                 repeat, lambda: (game.give(scenario.item), clear_events()))
+    game.take(scenario.item)
+    results['give'] = time_calls(lambda: game.give(scenario.item),
+                                 repeat, lambda: (game.take(scenario.item), clear_events()))
+    results['go'] = time_calls(lambda: game.go(scenario.forward),
+                               repeat, lambda: (game.go(scenario.back), clear_events()))
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compares results with a baseline.
+    :param results: dict - the results of this run
+    :param baseline: dict - the results of an earlier run
+    :param threshold: float - how much slower a median may be, such as 0.1 for 10%
+    :return: list[str] - a line for each benchmark that got slower, empty if none did
+    """
+    slower = []
+    for name, figures in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before is None:
+            continue
+        change = figures['p50_us'] / before['p50_us'] - 1
+        if change > threshold:
+            slower.append(f'{name}: median {before["p50_us"]:.2f} us -> {figures["p50_us"]:.2f} us (+{change:.0%})')
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the hot paths of GV Zork.')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='sizes of the generated worlds, separated by commas (up to 1000000)')
+    parser.add_argument('--repeat', type=int, default=2000, help='how many times to time each command')
+    parser.add_argument('--output', metavar='FILE', help='write the results here as well as to standard output')
+    parser.add_argument('--baseline', metavar='FILE', help='results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='fail if a median is this much slower than the baseline')
+    args = parser.parse_args()
+
+    scenarios = [stock_scenario()]
+    scenarios.extend(generated_scenario(int(size)) for size in args.sizes.split(',') if size)
+    benchmarks = {}
+    for scenario in scenarios:
+        print(f'Running {scenario.name}...', file=sys.stderr)
+        for name, figures in run_scenario(scenario, args.repeat).items():
+            benchmarks[f'{scenario.name}/{name}'] = figures
+            print(f'  {name:16} median {figures["p50_us"]:10.2f} us  p99 {figures["p99_us"]:10.2f} us',
+                  file=sys.stderr)
+        scenario.records = None
+
+    results = {'python': platform.python_version(), 'machine': platform.machine(),
+               'time': datetime.now().isoformat(timespec='seconds'), 'repeat': args.repeat,
+               'benchmarks': benchmarks}
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            slower = compare(results, json.load(file), args.threshold)
+        for line in slower:
+            print('SLOWER ' + line, file=sys.stderr)
+        if slower:
+            sys.exit(1)
+        print('No benchmark is slower than the baseline.', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
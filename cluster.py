@@ -0,0 +1,794 @@
+"""
+GV Zork cluster - hosts games on every core, in a pool of worker processes.
+
+A game's commands are pure Python, so one process (such as server.py) can only
+use one core. Here a front process accepts the connections and hands each one,
+with a new session id, to a worker process, which plays the Game and talks to the
+client directly. The front never touches a command, so adding workers adds
+throughput until every core is busy.
+
+The front remembers which worker owns each session (sticky routing). To drain a
+worker, the front asks it to give up its sessions one at a time: the worker stops
+reading from the client, saves the game (savegame.snapshot, plus the seed, random
+generator and time left) and sends it back with the client's socket and any input
+not yet read. The front then passes them to another worker, which carries on the
+game where it was. The client only notices a short pause.
+
+Workers and the front talk over Unix SEQPACKET sockets, one pickled message per
+packet, with sockets passed alongside as file descriptors. Every --metrics-interval
+seconds the front asks each worker for its totals and writes the merged command
+metrics (see metrics.py) and the health of every worker (--health, JSON). If a
+worker dies, its players are disconnected and a new worker takes its place. On
+SIGHUP the workers are restarted one at a time, draining each so no game is lost.
+
+Usage: python cluster.py [--host HOST] [--port PORT] [--unix PATH] [--workers N]
+                         [--metrics FILE] [--health FILE] [--metrics-interval SECONDS]
+                         [--dialogue FILE]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import pickle
+import signal
+import socket
+import time
+
+import planner
+import savegame
+from main import DEFAULT_WORLD_FILE, Game, shared_world
+from metrics import CommandMetrics
+from render import OutputBuffer, TextRenderer
+from server import MAX_LINE, PROMPT, SHUTDOWN_FLUSH_SECONDS, WRITE_BUFFER_HIGH
+from timers import TimerHeap
+
+# largest message between the front and a worker, in bytes
+MAX_MESSAGE = 1 << 20
+# how long a worker may take to give up a session, or answer for its totals
+REQUEST_TIMEOUT = 10
+SHUTDOWN_MESSAGE = b'\nThe server is shutting down. GAME OVER\n'
+
+
+def _send(control: socket.socket, message: tuple, fds=()) -> None:
+    """
+    Sends one message, and any sockets, to the other end of a control socket.
+    """
+    socket.send_fds(control, [pickle.dumps(message)], list(fds))
+
+
+def _receive(control: socket.socket) -> tuple[tuple | None, list[int]]:
+    """
+    Receives one message from a control socket, once the event loop says it is readable.
+    The socket is left blocking, for _send; the loop calls again while more are waiting.
+    :return: tuple[tuple, list[int]] - the message and the file descriptors that came with
+        it; a message of None means the other end has closed
+    """
+    try:
+        data, fds, _, _ = socket.recv_fds(control, MAX_MESSAGE, 4)
+    except ConnectionError:
+        return None, []
+    if not data:
+        return None, fds
+    return pickle.loads(data), fds
+
+
+class TransportSink:
+    """
+    TransportSink class writes text to an asyncio transport as UTF-8.
+
+    Attributes:
+        transport: asyncio.Transport - the client's connection
+    """
+
+    def __init__(self, transport: asyncio.Transport):
+        """
+        Constructor
+        :param transport: asyncio.Transport - the client's connection
+        """
+        self.transport = transport
+
+    def write(self, text: str) -> None:
+        """
+        method to send text to the client
+        :param text: str - text to send
+        """
+        self.transport.write(text.encode('utf-8'))
+
+
+class WorkerSession(asyncio.Protocol):
+    """
+    WorkerSession class plays one Game with one client, inside a worker process.
+
+    Commands run as soon as their line has arrived, and the output of each one is
+    written before the next is read. Reading stops while the client is behind on
+    receiving its output, and while the session is being handed to another worker.
+
+    Attributes:
+        worker: Worker - the worker the session runs in
+        session_id: int - the id the front gave the session
+        game: Game - the game being played
+        transport: asyncio.Transport - the connection to the client
+        out: OutputBuffer - output to the client
+        buffer: bytearray - input received but not yet run, None until a new game has started
+        timer: Timer - the game's deadline in the worker's TimerHeap, None if it has none
+        writing_paused: bool - True while the client is behind on receiving
+        detached: bool - True once the session is being handed to another worker
+        closed: asyncio.Future - done once the connection is lost, None until it is made
+    """
+
+    def __init__(self, worker: 'Worker', session_id: int, game: Game, unread: bytes = None):
+        """
+        Constructor
+        :param worker: Worker - the worker the session runs in
+        :param session_id: int - the id the front gave the session
+        :param game: Game - the game to play
+        :param unread: bytes - input another worker received but did not run, None if the game is new
+        """
+        self.worker = worker
+        self.session_id = session_id
+        self.game = game
+        self.transport = None
+        self.out = None
+        self.buffer = bytearray(unread) if unread is not None else None
+        self.timer = None
+        self.writing_paused = False
+        self.detached = False
+        self.closed = None
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        """
+        method to start the game, or carry it on, once the client's connection is made
+        :param transport: asyncio.Transport - the connection to the client
+        """
+        self.transport = transport
+        self.closed = asyncio.get_running_loop().create_future()
+        transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        self.out = OutputBuffer(TransportSink(transport))
+        if self.buffer is None:
+            self.buffer = bytearray()
+            self.worker.renderer.render_to(self.game.start(), self.out)
+            self.out.write(PROMPT)
+            self.out.flush()
+        self.worker.add_deadline(self)
+        self.run_commands()
+
+    def data_received(self, data: bytes) -> None:
+        """
+        method to run the lines the client has sent
+        :param data: bytes - what the client sent
+        """
+        self.buffer += data
+        self.run_commands()
+
+    def eof_received(self) -> bool:
+        """
+        method called when the client will send nothing more
+        :return: bool - False, so the connection is closed once the output already written has been sent
+        """
+        return False
+
+    def connection_lost(self, error: Exception) -> None:
+        """
+        method to forget the session once its connection is closed, unless it was handed to another worker
+        :param error: Exception - why the connection was lost, None if it was closed normally
+        """
+        if not self.closed.done():
+            self.closed.set_result(None)
+        if self.timer is not None:
+            self.worker.timers.cancel(self.timer)
+        if not self.detached:
+            self.worker.session_ended(self)
+
+    def pause_writing(self) -> None:
+        """
+        method to stop running commands while the client is behind on receiving its output
+        """
+        self.writing_paused = True
+        self.transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        """
+        method to run commands again once the client has caught up on its output
+        """
+        self.writing_paused = False
+        if not self.detached:
+            self.transport.resume_reading()
+            self.run_commands()
+
+    def run_commands(self) -> None:
+        """
+        method to run every complete line of input, one at a time, until the game ends,
+        the client falls behind or the session is handed over
+        """
+        while not self.writing_paused and not self.detached and not self.transport.is_closing():
+            end = self.buffer.find(b'\n')
+            if end < 0:
+                if len(self.buffer) > MAX_LINE:
+                    self.buffer.clear()
+                    self.out.write('That command is too long\n\n' + PROMPT)
+                    self.out.flush()
+                return
+            line = self.buffer[:end + 1].decode('utf-8', 'replace')
+            del self.buffer[:end + 1]
+            self.worker.renderer.render_to(self.game.execute(line), self.out)
+            self.worker.commands_run += 1
+            if self.game.game_over:
+                self.out.flush()
+                self.transport.close()
+                return
+            self.out.write(PROMPT)
+            self.out.flush()
+
+    def time_up(self) -> None:
+        """
+        method to end the game when its time runs out, called by the worker's TimerHeap
+        """
+        self.timer = None
+        if not self.detached and not self.transport.is_closing():
+            self.worker.renderer.render_to(self.game.time_up(), self.out)
+            self.out.flush()
+            self.transport.close()
+
+    async def detach(self) -> tuple[int, bytes]:
+        """
+        method to stop playing the session here, once its output has all been sent
+        :return: tuple[int, bytes] - a copy of the client's socket, and the input not yet run
+        """
+        self.detached = True
+        self.transport.pause_reading()
+        while self.transport.get_write_buffer_size() and not self.transport.is_closing():
+            await asyncio.sleep(0.001)
+        fd = os.dup(self.transport.get_extra_info('socket').fileno())
+        self.transport.abort()
+        return fd, bytes(self.buffer)
+
+
+class Worker:
+    """
+    Worker class runs the sessions the front gives a worker process.
+
+    Attributes:
+        index: int - the worker's place in the pool
+        control: socket.socket - the connection to the front
+        world: World - the frozen world every game is played in
+        sessions: dict[int, WorkerSession] - the sessions being played, by id
+        renderer: TextRenderer - turns each command's Result into text
+        metrics: CommandMetrics - measures the commands of every game, None to measure nothing
+        timers: TimerHeap - the deadline of every game being played
+        timers_changed: asyncio.Event - set when a deadline earlier than all the others is added
+        commands_run: int - number of commands run since the worker started
+        stopped: asyncio.Future - done when the front tells the worker to stop
+    """
+
+    def __init__(self, index: int, control: socket.socket, world_path: str, dialogue_path: str,
+                 track_metrics: bool):
+        """
+        Constructor
+        :param index: int - the worker's place in the pool
+        :param control: socket.socket - the connection to the front
+        :param world_path: str - the world file to play in
+        :param dialogue_path: str - dialogue file to share the NPCs' messages through, None to keep them in memory
+        :param track_metrics: bool - whether to measure the commands
+        """
+        self.index = index
+        self.control = control
+        self.world = shared_world(world_path, dialogue_path)
+        self.sessions = {}
+        self.renderer = TextRenderer()
+        self.metrics = CommandMetrics() if track_metrics else None
+        self.timers = TimerHeap()
+        self.timers_changed = None
+        self.commands_run = 0
+        self.stopped = None
+
+    async def run(self) -> None:
+        """
+        method that carries out what the front asks until it says to stop. Every client is then
+        told the server is shutting down, and gets SHUTDOWN_FLUSH_SECONDS to receive the rest of its output.
+        """
+        loop = asyncio.get_running_loop()
+        self.stopped = loop.create_future()
+        self.timers_changed = asyncio.Event()
+        timer_task = asyncio.create_task(self.timers.run(self.timers_changed))
+        loop.add_reader(self.control, self.on_control)
+        await self.stopped
+        loop.remove_reader(self.control)
+        timer_task.cancel()
+        sessions = [session for session in self.sessions.values() if session.transport is not None]
+        for session in sessions:
+            session.transport.write(SHUTDOWN_MESSAGE)
+            session.transport.close()
+        if sessions:
+            # a closed transport sends what it holds before the connection is lost
+            await asyncio.wait([session.closed for session in sessions], timeout=SHUTDOWN_FLUSH_SECONDS)
+        for session in sessions:
+            if not session.closed.done():
+                session.transport.abort()
+        await asyncio.sleep(0)
+
+    def on_control(self) -> None:
+        """
+        method to carry out the next message from the front
+        """
+        message, fds = _receive(self.control)
+        if message is None:
+            # the front has gone away
+            asyncio.get_running_loop().remove_reader(self.control)
+            if not self.stopped.done():
+                self.stopped.set_result(None)
+            return
+        kind = message[0]
+        if kind == 'adopt':
+            asyncio.create_task(self.adopt(message[1], message[2], fds[0]))
+        elif kind == 'export':
+            asyncio.create_task(self.export(message[1], message[2]))
+        elif kind == 'stats':
+            _send(self.control, ('stats', message[1], {'pid': os.getpid(), 'sessions': len(self.sessions),
+                                                        'commands': self.commands_run,
+                                                        'metrics': self.metrics}))
+        elif kind == 'stop' and not self.stopped.done():
+            self.stopped.set_result(None)
+
+    async def adopt(self, session_id: int, state: dict, fd: int) -> None:
+        """
+        method to start playing a session, either a new game or one handed over by another worker
+        :param session_id: int - the session's id
+        :param state: dict - the saved game (see export), None for a new game
+        :param fd: int - the client's socket
+        """
+        game = Game(self.world)
+        game.metrics = self.metrics
+        if state is not None:
+            game.seed = state['seed']
+            savegame.restore(game, state['save'])
+            game.rng_state = state['random']
+            if state['time_left'] is not None:
+                game.deadline = game.monotonic() + state['time_left']
+        session = WorkerSession(self, session_id, game, state['unread'] if state is not None else None)
+        self.sessions[session_id] = session
+        client = socket.socket(fileno=fd)
+        client.setblocking(False)
+        # the game starts, or carries on, as soon as the connection is made
+        await asyncio.get_running_loop().connect_accepted_socket(lambda: session, sock=client)
+
+    def add_deadline(self, session: WorkerSession) -> None:
+        """
+        method to end a session's game when its time runs out
+        :param session: WorkerSession - the session, whose game has started
+        """
+        deadline = session.game.deadline
+        if deadline is None:
+            return
+        earliest = self.timers.next_deadline()
+        session.timer = self.timers.schedule(deadline, session.time_up)
+        if earliest is None or deadline < earliest:
+            self.timers_changed.set()
+
+    async def export(self, request_id: int, session_id: int) -> None:
+        """
+        method to give up a session, sending its saved game and its client's socket to the front
+        :param request_id: int - the front's id for the request
+        :param session_id: int - the session to give up
+        """
+        session = self.sessions.pop(session_id, None)
+        if session is None or session.transport is not None and session.transport.is_closing():
+            _send(self.control, ('exported', request_id, None))
+            return
+        while session.transport is None:
+            # the session was only just adopted, and its connection is still being made
+            await asyncio.sleep(0)
+        fd, unread = await session.detach()
+        game = session.game
+        state = {'seed': game.seed, 'save': savegame.snapshot(game), 'unread': unread,
+                 'random': game.rng_state,
+                 'time_left': game.time_left()}
+        try:
+            _send(self.control, ('exported', request_id, state), [fd])
+        finally:
+            os.close(fd)
+
+    def session_ended(self, session: WorkerSession) -> None:
+        """
+        method to forget a session whose client has left or whose game is over, and tell the front
+        :param session: WorkerSession - the session
+        """
+        if self.sessions.pop(session.session_id, None) is not None and not self.stopped.done():
+            _send(self.control, ('ended', session.session_id))
+
+
+def worker_main(index: int, control: socket.socket, world_path: str, dialogue_path: str,
+                track_metrics: bool) -> None:
+    """
+    Runs a worker process. Interrupts are left to the front, which stops the workers itself.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    asyncio.run(Worker(index, control, world_path, dialogue_path, track_metrics).run())
+
+
+class WorkerHandle:
+    """
+    WorkerHandle class is the front's view of one worker process.
+
+    Attributes:
+        index: int - the worker's place in the pool
+        process: multiprocessing.Process - the worker process
+        control: socket.socket - the connection to the worker
+        sessions: set[int] - the ids of the sessions the worker owns
+        draining: bool - True while the worker is giving up its sessions, when it gets no new ones
+        stats: dict - what the worker last said about itself, empty until asked
+        ping: float - seconds the worker last took to answer, None until asked
+    """
+
+    def __init__(self, index: int, process, control: socket.socket):
+        """
+        Constructor
+        :param index: int - the worker's place in the pool
+        :param process: multiprocessing.Process - the worker process, started
+        :param control: socket.socket - the connection to the worker
+        """
+        self.index = index
+        self.process = process
+        self.control = control
+        self.sessions = set()
+        self.draining = False
+        self.stats = {}
+        self.ping = None
+
+
+class Cluster:
+    """
+    Cluster class is the front process: it accepts connections, gives each session
+    to a worker, and moves sessions between workers.
+
+    Attributes:
+        worker_count: int - how many workers to keep running
+        world_path: str - the world file to play in
+        dialogue_path: str - dialogue file the workers share the NPCs' messages through, None for none
+        track_metrics: bool - whether the workers measure their commands
+        workers: list[WorkerHandle] - the workers, by index
+        owners: dict[int, WorkerHandle] - the worker that owns each session, by session id
+        retired: CommandMetrics - the totals of workers that have been stopped
+        listener: socket.socket - the listening socket, None until started
+        next_session: int - the id the next session will get
+        next_request: int - the id the next request to a worker will get
+        waiting: dict[int, asyncio.Future] - the requests waiting for an answer, by id
+        stopping: bool - True once the cluster is shutting down
+    """
+
+    def __init__(self, worker_count: int, world_path: str = DEFAULT_WORLD_FILE, dialogue_path: str = None,
+                 track_metrics: bool = False):
+        """
+        Constructor
+        :param worker_count: int - how many workers to run
+        :param world_path: str - the world file to play in
+        :param dialogue_path: str - dialogue file the workers share the NPCs' messages through, optional
+        :param track_metrics: bool - whether the workers measure their commands
+        """
+        self.worker_count = worker_count
+        self.world_path = world_path
+        self.dialogue_path = dialogue_path
+        self.track_metrics = track_metrics
+        self.workers = []
+        self.owners = {}
+        self.retired = CommandMetrics()
+        self.listener = None
+        self.next_session = 1
+        self.next_request = 1
+        self.waiting = {}
+        self.stopping = False
+
+    def start_worker(self, index: int) -> WorkerHandle:
+        """
+        method to start a worker process
+        :param index: int - its place in the pool
+        :return: WorkerHandle - the new worker
+        """
+        front_end, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        process = multiprocessing.Process(target=worker_main, name=f'gvzork-worker-{index}', daemon=True,
+                                          args=(index, worker_end, self.world_path, self.dialogue_path,
+                                                self.track_metrics))
+        process.start()
+        worker_end.close()
+        handle = WorkerHandle(index, process, front_end)
+        asyncio.get_running_loop().add_reader(front_end, self.on_message, handle)
+        return handle
+
+    async def start(self, host: str = '127.0.0.1', port: int = 4000, unix_path: str = None) -> None:
+        """
+        method to load the world, start the workers and start accepting connections
+        :param host: str - address to listen on
+        :param port: int - TCP port to listen on
+        :param unix_path: str - path of a Unix socket to listen on instead of TCP
+        """
+        # loaded here first, with the routes hints follow, so every worker forked from the front shares the pages
+        planner.prepare(shared_world(self.world_path, self.dialogue_path))
+        self.workers = [self.start_worker(index) for index in range(self.worker_count)]
+        if unix_path:
+            self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.listener.bind(unix_path)
+        else:
+            self.listener = socket.create_server((host, port), reuse_port=False)
+        self.listener.listen(4096)
+        self.listener.setblocking(False)
+        asyncio.create_task(self.accept())
+
+    async def accept(self) -> None:
+        """
+        method that gives each new connection to the worker with the fewest sessions
+        """
+        loop = asyncio.get_running_loop()
+        while not self.stopping:
+            try:
+                client, _ = await loop.sock_accept(self.listener)
+            except OSError:
+                if self.stopping:
+                    return
+                raise
+            with client:
+                handle = self.choose_worker()
+                if handle is None:
+                    client.sendall(SHUTDOWN_MESSAGE)
+                    continue
+                session_id = self.next_session
+                self.next_session += 1
+                self.owners[session_id] = handle
+                handle.sessions.add(session_id)
+                _send(handle.control, ('adopt', session_id, None), [client.fileno()])
+
+    def choose_worker(self) -> WorkerHandle | None:
+        """
+        method to choose the worker for a session: the one with the fewest sessions that is not draining
+        :return: WorkerHandle - the worker, None if every worker is draining
+        """
+        candidates = [handle for handle in self.workers if not handle.draining]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda handle: (len(handle.sessions), handle.index))
+
+    def on_message(self, handle: WorkerHandle) -> None:
+        """
+        method to handle the next message from a worker
+        :param handle: WorkerHandle - the worker
+        """
+        message, fds = _receive(handle.control)
+        if message is None:
+            self.worker_lost(handle)
+            return
+        if message[0] == 'ended':
+            handle.sessions.discard(message[1])
+            if self.owners.get(message[1]) is handle:
+                del self.owners[message[1]]
+            return
+        future = self.waiting.pop(message[1], None)
+        if future is not None and not future.done():
+            future.set_result((message, fds))
+        else:
+            for fd in fds:
+                os.close(fd)
+
+    async def request(self, handle: WorkerHandle, kind: str, *args) -> tuple[tuple, list[int]]:
+        """
+        method to ask a worker for something and wait for the answer
+        :param handle: WorkerHandle - the worker
+        :param kind: str - what to ask for, 'export' or 'stats'
+        :param args: what the request needs
+            Raises: asyncio.TimeoutError if the worker does not answer in time
+        :return: tuple[tuple, list[int]] - the answer and any file descriptors that came with it
+        """
+        request_id = self.next_request
+        self.next_request += 1
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        _send(handle.control, (kind, request_id, *args))
+        try:
+            return await asyncio.wait_for(future, REQUEST_TIMEOUT)
+        finally:
+            self.waiting.pop(request_id, None)
+
+    async def migrate(self, session_id: int, target: WorkerHandle = None) -> bool:
+        """
+        method to move a session to another worker, without the player losing their game
+        :param session_id: int - the session to move
+        :param target: WorkerHandle - the worker to move it to, the least busy one if not given
+        :return: bool - True if it moved, False if it had already ended or there is nowhere to move it
+        """
+        source = self.owners.get(session_id)
+        if target is None:
+            target = self.choose_worker()
+        if source is None or target is None or target is source:
+            return False
+        (_, _, state), fds = await self.request(source, 'export', session_id)
+        source.sessions.discard(session_id)
+        if state is None:
+            self.owners.pop(session_id, None)
+            return False
+        try:
+            self.owners[session_id] = target
+            target.sessions.add(session_id)
+            _send(target.control, ('adopt', session_id, state), fds)
+        finally:
+            for fd in fds:
+                os.close(fd)
+        return True
+
+    async def drain(self, index: int) -> None:
+        """
+        method to move every session off a worker and then stop it
+        :param index: int - the worker's place in the pool
+        """
+        handle = self.workers[index]
+        handle.draining = True
+        for session_id in sorted(handle.sessions):
+            await self.migrate(session_id)
+        try:
+            (_, _, stats), _ = await self.request(handle, 'stats')
+            if stats['metrics'] is not None:
+                self.retired.merge(stats['metrics'])
+        except asyncio.TimeoutError:
+            pass
+        self.stop_worker(handle)
+        await asyncio.get_running_loop().run_in_executor(None, handle.process.join, REQUEST_TIMEOUT)
+
+    async def restart(self, index: int) -> None:
+        """
+        method to replace a worker with a new one, moving its sessions to the others first
+        :param index: int - the worker's place in the pool
+        """
+        await self.drain(index)
+        if not self.stopping:
+            self.workers[index] = self.start_worker(index)
+
+    async def rolling_restart(self) -> None:
+        """
+        method to replace every worker, one at a time, so no game is lost
+        """
+        for index in range(len(self.workers)):
+            await self.restart(index)
+
+    def stop_worker(self, handle: WorkerHandle) -> None:
+        """
+        method to tell a worker to stop and stop listening to it
+        :param handle: WorkerHandle - the worker
+        """
+        asyncio.get_running_loop().remove_reader(handle.control)
+        try:
+            _send(handle.control, ('stop',))
+        except OSError:
+            pass
+        handle.control.close()
+
+    def worker_lost(self, handle: WorkerHandle) -> None:
+        """
+        method to clean up after a worker that has died, and start another in its place
+        :param handle: WorkerHandle - the worker
+        """
+        asyncio.get_running_loop().remove_reader(handle.control)
+        handle.control.close()
+        for session_id in handle.sessions:
+            if self.owners.get(session_id) is handle:
+                del self.owners[session_id]
+        handle.sessions.clear()
+        if not self.stopping and self.workers[handle.index] is handle and not handle.draining:
+            print(f'Worker {handle.index} (pid {handle.process.pid}) died, starting another')
+            self.workers[handle.index] = self.start_worker(handle.index)
+
+    async def collect(self) -> CommandMetrics:
+        """
+        method to ask every worker for its totals, updating their health
+        :return: CommandMetrics - the command metrics of every worker, including stopped ones
+        """
+        merged = CommandMetrics()
+        merged.merge(self.retired)
+        for handle in list(self.workers):
+            if handle.draining or handle.control.fileno() < 0:
+                continue
+            started = time.monotonic()
+            try:
+                (_, _, stats), _ = await self.request(handle, 'stats')
+            except (asyncio.TimeoutError, OSError):
+                handle.ping = None
+                continue
+            handle.ping = time.monotonic() - started
+            handle.stats = stats
+            if stats['metrics'] is not None:
+                merged.merge(stats['metrics'])
+        return merged
+
+    def health(self) -> dict:
+        """
+        method to describe the state of every worker, from what they last said
+        :return: dict - the number of sessions and each worker's pid, whether it is alive
+            and draining, its sessions and commands run, and how long it took to answer
+        """
+        workers = []
+        for handle in self.workers:
+            workers.append({'index': handle.index, 'pid': handle.process.pid, 'alive': handle.process.is_alive(),
+                            'draining': handle.draining, 'sessions': len(handle.sessions),
+                            'commands': handle.stats.get('commands', 0),
+                            'ping_ms': None if handle.ping is None else round(handle.ping * 1000, 3)})
+        return {'time': time.time(), 'sessions': len(self.owners), 'workers': workers}
+
+    async def write_reports(self, metrics_path: str = None, health_path: str = None) -> None:
+        """
+        method to write the merged metrics and the health of the workers to their files
+        :param metrics_path: str - file for the command metrics (.json for JSON), None to skip them
+        :param health_path: str - file for the health as JSON, None to skip it
+        """
+        metrics = await self.collect()
+        if metrics_path:
+            metrics.write(metrics_path)
+        if health_path:
+            temporary = health_path + '.tmp'
+            with open(temporary, 'w') as file:
+                json.dump(self.health(), file, indent=2)
+            os.replace(temporary, health_path)
+
+    async def shutdown(self) -> None:
+        """
+        method to stop accepting connections and stop every worker, whose players are told the server is closing
+        """
+        self.stopping = True
+        if self.listener is not None:
+            self.listener.close()
+        for handle in self.workers:
+            if handle.control.fileno() >= 0:
+                self.stop_worker(handle)
+        loop = asyncio.get_running_loop()
+        for handle in self.workers:
+            await loop.run_in_executor(None, handle.process.join, REQUEST_TIMEOUT)
+
+
+async def serve(host: str, port: int, unix_path: str, workers: int, metrics_path: str = None,
+                health_path: str = None, interval: float = 15, dialogue_path: str = None) -> None:
+    """
+    Runs a Cluster until the process is interrupted or terminated.
+    :param host: str - address to listen on
+    :param port: int - TCP port to listen on
+    :param unix_path: str - path of a Unix socket to listen on instead of TCP
+    :param workers: int - number of worker processes
+    :param metrics_path: str - file to write the merged command metrics to, None to measure nothing
+    :param health_path: str - file to write the health of the workers to, None for none
+    :param interval: float - seconds between writes of those files
+    :param dialogue_path: str - dialogue file to share the NPCs' messages through, None to keep them in memory
+    """
+    cluster = Cluster(workers, dialogue_path=dialogue_path, track_metrics=bool(metrics_path))
+    await cluster.start(host, port, unix_path)
+    print(f'GV Zork cluster of {workers} workers listening on {unix_path or f"{host}:{port}"}')
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+    loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.create_task(cluster.rolling_restart()))
+    reports = metrics_path or health_path
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval if reports else None)
+        except asyncio.TimeoutError:
+            pass
+        if reports:
+            await cluster.write_reports(metrics_path, health_path)
+    print(f'Shutting down with {len(cluster.owners)} players connected')
+    await cluster.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Host GV Zork games on every core.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=4000, help='TCP port to listen on')
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--metrics', metavar='FILE', help='write command metrics to this file (.json for JSON)')
+    parser.add_argument('--health', metavar='FILE', help='write the health of the workers to this file as JSON')
+    parser.add_argument('--metrics-interval', type=float, default=15, metavar='SECONDS',
+                        help='how often to write the metrics and health files')
+    parser.add_argument('--dialogue', metavar='FILE', help='share the NPCs\' messages through this memory-mapped file')
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.metrics, args.health,
+                      args.metrics_interval, args.dialogue))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Dialogue store - the messages NPCs say, kept in a file that is memory-mapped
+read-only and shared by every Game and every process.
+
+A world's NPC messages are written once into a dialogue file: the UTF-8 text of
+every message one after another, then a table of where each message starts, then
+a footer. map_dialogue gives each NPC a DialogueLines view of its own messages in
+the file in place of its list of strings, so the text takes no memory in any one
+process: the pages are read from the operating system's file cache, shared by all
+processes that map the file, only when a message is said. What each game has said
+(its place in each NPC's messages) stays in the game's WorldState.
+"""
+import mmap
+import os
+import struct
+from array import array
+
+MAGIC = b'GVZDLG01'
+# where the table of offsets starts, how many messages there are, and MAGIC; numbers are
+# in the machine's own byte order, as the file is shared by the processes of one machine
+_FOOTER = struct.Struct('=QQ8s')
+
+
+class DialogueLines:
+    """
+    DialogueLines class is a read-only list of the messages of one NPC, read from a DialogueStore.
+
+    Attributes:
+        store: DialogueStore - the file the messages are in
+        first: int - number of the NPC's first message in the store
+        count: int - how many messages the NPC has
+    """
+    __slots__ = ('store', 'first', 'count')
+
+    def __init__(self, store: 'DialogueStore', first: int, count: int):
+        """
+        Constructor
+        :param store: DialogueStore - the file the messages are in
+        :param first: int - number of the first message in the store
+        :param count: int - how many messages there are
+        """
+        self.store = store
+        self.first = first
+        self.count = count
+
+    def __len__(self) -> int:
+        """
+        method to count the messages
+        :return: int - number of messages
+        """
+        return self.count
+
+    def __getitem__(self, index: int) -> str:
+        """
+        getter for one message
+        :param index: int - index of the message, negative to count from the end
+            Raises: IndexError if there is no message at that index
+        :return: str - the message
+        """
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('There is no message at that index!')
+        return self.store.text(self.first + index)
+
+    def __iter__(self):
+        """
+        method to go through the messages in order
+        :return: iterator of str - the messages
+        """
+        for number in range(self.first, self.first + self.count):
+            yield self.store.text(number)
+
+    def append(self, message: str) -> None:
+        """
+        Messages in a DialogueStore are shared, so they cannot be added to.
+        Raises: RuntimeError always
+        """
+        raise RuntimeError('Messages in a dialogue store cannot be changed!')
+
+
+class DialogueStore:
+    """
+    DialogueStore class reads messages out of a memory-mapped dialogue file.
+
+    Attributes:
+        path: str - the dialogue file
+        data: mmap.mmap - the whole file, mapped read-only
+        offsets: memoryview - where each message starts in the file, then where the text ends
+    """
+
+    def __init__(self, path: str):
+        """
+        Constructor
+        :param path: str - the dialogue file, as written by write_dialogue
+            Raises: ValueError if the file is not a dialogue file
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        table = count = magic = None
+        if len(self.data) >= _FOOTER.size:
+            table, count, magic = _FOOTER.unpack_from(self.data, len(self.data) - _FOOTER.size)
+        if magic != MAGIC or table + (count + 1) * 8 + _FOOTER.size != len(self.data):
+            self.data.close()
+            raise ValueError(f'{path} is not a dialogue file!')
+        self.offsets = memoryview(self.data)[table:table + (count + 1) * 8].cast('Q')
+
+    def __len__(self) -> int:
+        """
+        method to count the messages in the file
+        :return: int - number of messages
+        """
+        return len(self.offsets) - 1
+
+    def text(self, number: int) -> str:
+        """
+        getter for one message
+        :param number: int - number of the message in the file
+        :return: str - the message
+        """
+        return str(self.data[self.offsets[number]:self.offsets[number + 1]], 'utf-8')
+
+    def lines(self, first: int, count: int) -> DialogueLines:
+        """
+        getter for a view of some messages that are next to each other
+        :param first: int - number of the first message
+        :param count: int - how many messages
+        :return: DialogueLines - the messages
+        """
+        return DialogueLines(self, first, count)
+
+    def close(self) -> None:
+        """
+        method to unmap the file; no DialogueLines from this store can be read after
+        """
+        self.offsets.release()
+        self.data.close()
+
+
+def write_dialogue(path: str, conversations) -> list[tuple[int, int]]:
+    """
+    Writes messages into a dialogue file. The file is written under another name and
+    then renamed, so processes that already have the old file mapped are not disturbed.
+    :param path: str - the dialogue file
+    :param conversations: iterable of list[str] - the messages of each NPC
+    :return: list[tuple[int, int]] - the number of the first message of each NPC and how many it has
+    """
+    offsets = array('Q')
+    ranges = []
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        position = 0
+        for messages in conversations:
+            ranges.append((len(offsets), len(messages)))
+            for message in messages:
+                offsets.append(position)
+                position += file.write(message.encode('utf-8'))
+        offsets.append(position)
+        # the table of offsets is lined up on 8 bytes so it can be read in place
+        position += file.write(bytes(-position % 8))
+        file.write(offsets.tobytes())
+        file.write(_FOOTER.pack(position, len(offsets) - 1, MAGIC))
+    os.replace(temporary, path)
+    return ranges
+
+
+def map_dialogue(world, path: str) -> DialogueStore:
+    """
+    Moves the messages of every NPC in a world into a shared dialogue file. The file
+    is written if it does not exist or does not hold the same messages, and used as
+    it is otherwise, so many processes can map the same file.
+    :param world: World - the world whose NPCs' messages are moved, before it is frozen
+    :param path: str - the dialogue file
+    :return: DialogueStore - the mapped file, which the NPCs now read their messages from
+    """
+    npcs = [npc for location in world.locations.values() for npc in location.get_npcs()]
+    store = None
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        try:
+            store = DialogueStore(path)
+        except ValueError:
+            store = None
+        if store is not None and not _holds(store, npcs):
+            store.close()
+            store = None
+    if store is None:
+        write_dialogue(path, (list(npc.messages) for npc in npcs))
+        store = DialogueStore(path)
+    first = 0
+    for npc in npcs:
+        count = len(npc.messages)
+        npc.messages = store.lines(first, count)
+        first += count
+    return store
+
+
+def _holds(store: DialogueStore, npcs: list) -> bool:
+    """
+    Checks that a dialogue file holds exactly the messages of the NPCs, in order. A
+    damaged or out-of-date file whose messages cannot be decoded does not hold them.
+    """
+    number = 0
+    try:
+        for npc in npcs:
+            for message in npc.messages:
+                if number >= len(store) or store.text(number) != message:
+                    return False
+                number += 1
+    except ValueError:
+        # UnicodeDecodeError is a ValueError
+        return False
+    return number == len(store)
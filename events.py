@@ -0,0 +1,133 @@
+"""
+Events - what happened when a GV Zork command was carried out.
+
+Game.execute returns a Result holding the Events of one command instead of
+printing anything. A renderer (see render.py) turns them into text for a
+player, while bots and servers can read the Events directly.
+"""
+
+# the kinds of Event, and the fields each one carries
+INTRO = 'intro'                        # (none) the game has just started
+HELP = 'help'                          # time: datetime - when help was asked for
+TALKED = 'talked'                      # name: str, message: str
+MET = 'met'                            # name: str, description: str
+NO_SUCH_NPC = 'no_such_npc'            # name: str
+TOO_HEAVY = 'too_heavy'                # weight: float - what the player is carrying
+MOVED = 'moved'                        # direction: str, location: Location - where the player is now
+FERRY_RIDE = 'ferry_ride'              # (none) the player crossed over to GVSU
+INVALID_DIRECTION = 'invalid_direction'  # direction: str
+UNKNOWN_PLACE = 'unknown_place'        # name: str - goto was given a place that does not exist
+NO_ROUTE = 'no_route'                  # name: str - the place cannot be reached from here
+ALREADY_THERE = 'already_there'        # name: str
+INVENTORY = 'inventory'                # items: list[Item]
+LOOKED = 'looked'                      # location: Location, items: tuple[Item], npcs: tuple[NPC],
+                                       #   exits: tuple[tuple[str, Location | None]], None if not visited yet,
+                                       #   view: LookView - the same, kept by the game (see WorldState.look_view)
+TOOK_ITEM = 'took_item'                # name: str, item: Item
+NO_SUCH_ITEM = 'no_such_item'          # name: str
+AMBIGUOUS_NAME = 'ambiguous_name'      # name: str - what was typed, names: list[str] - what it could mean
+GAVE_ITEM = 'gave_item'                # name: str, item: Item, location: Location
+NOT_CARRIED = 'not_carried'            # name: str
+REJECTED_NON_FOOD = 'rejected_non_food'  # item: Item
+REJECTED_FOOD = 'rejected_food'        # item: Item - food with negative calories
+TELEPORTED = 'teleported'              # location: Location
+FED_PROFESSOR = 'fed_professor'        # item: Item, calories_needed: int - still needed afterwards
+TOO_MANY_FAILS = 'too_many_fails'      # fails: int
+TIME_UP = 'time_up'                    # (none) the time limit ran out
+HINT = 'hint'                          # command: str | None - what to type next, moves: int, trips: int,
+                                       #   possible: bool - whether the plan wins (see planner.FoodPlan)
+STATS = 'stats'                        # weight: float, calories: int, calories_needed: int
+NOTHING_TO_RANSOM = 'nothing_to_ransom'  # (none)
+NO_ONE_TO_RANSOM = 'no_one_to_ransom'  # (none)
+CANNOT_RANSOM = 'cannot_ransom'        # name: str
+RANSOMED = 'ransomed'                  # npc: NPC, given: Item, received: Item
+QUIT = 'quit'                          # (none)
+PARSE_ERROR = 'parse_error'            # message: str, text: str - the line was not understood,
+                                       #   so none of it was run
+COMMAND_FAILED = 'command_failed'      # command: str, error: Exception - a command broke while running
+GAME_OVER = 'game_over'                # won: bool
+
+
+class Event:
+    """
+    Event class records one thing that happened during a command.
+
+    Attributes:
+        kind: str - what happened, one of the kinds listed at the top of this module
+        fields: dict[str, object] - the details, which depend on the kind
+    """
+    __slots__ = ('kind', 'fields')
+
+    def __init__(self, kind: str, **fields):
+        """
+        Constructor
+        :param kind: str - what happened
+        :param fields: the details of the event
+        """
+        self.kind = kind
+        self.fields = fields
+
+    def __getitem__(self, key: str):
+        """
+        method to read one of the event's details
+        :param key: str - name of the detail
+        :return: the value of the detail
+        """
+        return self.fields[key]
+
+    def __eq__(self, other) -> bool:
+        """
+        method to compare two events by their kind and details
+        :return: bool - true if they are the same
+        """
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self.kind == other.kind and self.fields == other.fields
+
+    def __repr__(self) -> str:
+        """
+        method to convert the Event into a string for debugging
+        :return: str - representation of the Event
+        """
+        details = ', '.join(f'{key}={value!r}' for key, value in self.fields.items())
+        return f'Event({self.kind!r}{", " if details else ""}{details})'
+
+
+class Result:
+    """
+    Result class holds everything that happened during one command.
+
+    Attributes:
+        command_line: str - the line the player typed
+        events: list[Event] - what happened, in order
+        accepted: bool - False if the line could not be parsed, so nothing was run
+        game_over: bool - True if the game is over after the command
+    """
+    __slots__ = ('command_line', 'events', 'accepted', 'game_over')
+
+    def __init__(self, command_line: str, events: list, accepted: bool, game_over: bool):
+        """
+        Constructor
+        :param command_line: str - the line the player typed
+        :param events: list[Event] - what happened, in order
+        :param accepted: bool - False if the line could not be parsed, so nothing was run
+        :param game_over: bool - True if the game is over after the command
+        """
+        self.command_line = command_line
+        self.events = events
+        self.accepted = accepted
+        self.game_over = game_over
+
+    def kinds(self) -> list[str]:
+        """
+        getter for the kinds of the events, in order
+        :return: list[str] - kind of each event
+        """
+        return [event.kind for event in self.events]
+
+    def __repr__(self) -> str:
+        """
+        method to convert the Result into a string for debugging
+        :return: str - representation of the Result
+        """
+        return f'Result({self.command_line!r}, {self.events!r}, accepted={self.accepted}, game_over={self.game_over})'
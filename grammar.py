@@ -0,0 +1,209 @@
+"""
+Command grammar - turns a line typed by the player into the commands to run.
+
+A CommandGrammar knows every command, what kind of argument each one takes, and
+any aliases (such as 'n' for 'go north'). compile() builds a table of every
+unique prefix of every command name, which works like a flattened trie: finding
+the command for a word is a single dict lookup however many commands there are.
+"""
+
+# the argument shapes a command can have
+NO_ARGUMENT = 'none'
+OPTIONAL_ARGUMENT = 'optional'
+REQUIRED_ARGUMENT = 'required'
+
+# separates commands typed on the same line
+COMMAND_SEPARATOR = ';'
+
+# marks a prefix shared by more than one command in the prefix table
+_AMBIGUOUS = object()
+
+
+class ParseError(ValueError):
+    """
+    ParseError is raised when a line cannot be understood, before any command runs.
+
+    Attributes:
+        text: str - the part of the line that could not be understood
+    """
+
+    def __init__(self, message: str, text: str):
+        """
+        Constructor
+        :param message: str - what is wrong, in words for the player
+        :param text: str - the part of the line that could not be understood
+        """
+        super().__init__(message)
+        self.text = text
+
+
+class ParsedCommand:
+    """
+    ParsedCommand class is one command found in a line, ready to run.
+
+    Attributes:
+        name: str - the full name of the command
+        argument: str - what was typed after the command, lower case with single
+            spaces, or None if nothing was
+        text: str - the part of the line the command came from
+    """
+    __slots__ = ('name', 'argument', 'text')
+
+    def __init__(self, name: str, argument: str | None, text: str):
+        """
+        Constructor
+        :param name: str - the full name of the command
+        :param argument: str - what was typed after the command, None if nothing was
+        :param text: str - the part of the line the command came from
+        """
+        self.name = name
+        self.argument = argument
+        self.text = text
+
+    def get_args(self) -> tuple:
+        """
+        getter for the arguments to call the command's function with
+        :return: tuple - empty, or holding the argument
+        """
+        if self.argument is None:
+            return ()
+        return (self.argument,)
+
+    def __repr__(self) -> str:
+        """
+        method to convert the ParsedCommand into a string for debugging
+        :return: str - representation of the ParsedCommand
+        """
+        return f'ParsedCommand({self.name!r}, {self.argument!r})'
+
+
+class CommandGrammar:
+    """
+    CommandGrammar class holds the commands a player can type and parses lines into them.
+
+    Commands can be shortened to any prefix that only one command starts with
+    ('ta' is ambiguous between 'take' and 'talk', 'tak' is not). Aliases must be typed
+    in full and stand for a command with its argument. Several commands can be
+    typed on one line, separated by ';'.
+
+    Attributes:
+        arguments: dict[str, str] - the argument shape of each command
+        aliases: dict[str, tuple[str, str]] - each alias with the command and argument it stands for
+        prefixes: dict[str, str] - every prefix of a command name to the command, or to
+            a marker when several commands share it; built by compile
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.arguments = {}
+        self.aliases = {}
+        self.prefixes = None
+
+    def add_command(self, name: str, argument: str = NO_ARGUMENT) -> None:
+        """
+        method to add a command to the grammar
+        :param name: str - name of the command, in lower case
+            Raises: ValueError if the name is blank, has spaces or is already used
+        :param argument: str - NO_ARGUMENT, OPTIONAL_ARGUMENT or REQUIRED_ARGUMENT
+            Raises: ValueError if it is none of those
+        """
+        self._check_new_word(name)
+        if argument not in (NO_ARGUMENT, OPTIONAL_ARGUMENT, REQUIRED_ARGUMENT):
+            raise ValueError(f'Unknown argument shape {argument}!')
+        self.arguments[name] = argument
+        self.prefixes = None
+
+    def add_alias(self, alias: str, expansion: str) -> None:
+        """
+        method to add a word that stands for a whole command, such as 'n' for 'go north'
+        :param alias: str - the word, in lower case
+            Raises: ValueError if the word is blank, has spaces or is already used
+        :param expansion: str - the command it stands for, with its argument if any
+            Raises: ValueError if it does not start with a command of the grammar
+        """
+        self._check_new_word(alias)
+        words = expansion.lower().split()
+        if not words or words[0] not in self.arguments:
+            raise ValueError(f'Alias {alias} must stand for a command!')
+        self.aliases[alias] = (words[0], ' '.join(words[1:]) or None)
+        self.prefixes = None
+
+    def _check_new_word(self, word: str) -> None:
+        """
+        method to refuse command and alias names that cannot be typed or are already taken
+        :param word: str - the new name
+            Raises: ValueError if the name is blank, has spaces or is already used
+        """
+        if word == '' or word != word.strip().lower() or ' ' in word or COMMAND_SEPARATOR in word:
+            raise ValueError('Command names must be single lower case words!')
+        if word in self.arguments or word in self.aliases:
+            raise ValueError(f'{word} is already a command!')
+
+    def compile(self) -> None:
+        """
+        method to build the prefix table used by parse. parse calls it automatically
+        after commands or aliases have been added.
+        """
+        prefixes = {}
+        for name in self.arguments:
+            for end in range(1, len(name)):
+                prefix = name[:end]
+                if prefixes.get(prefix, name) != name:
+                    prefixes[prefix] = _AMBIGUOUS
+                else:
+                    prefixes[prefix] = name
+        # full names always win over another command's prefix ('go' when there is also 'goto')
+        for name in self.arguments:
+            prefixes[name] = name
+        self.prefixes = prefixes
+
+    def parse(self, line: str) -> list[ParsedCommand]:
+        """
+        method to turn a line into the commands it asks for. Nothing is run, so a
+        mistake anywhere in the line means none of it is.
+        :param line: str - the line the player typed
+            Raises: ParseError if any part of the line is not a valid command
+        :return: list[ParsedCommand] - the commands, in the order they were typed
+        """
+        if self.prefixes is None:
+            self.compile()
+        commands = []
+        for text in line.split(COMMAND_SEPARATOR):
+            words = text.lower().split()
+            if words:
+                commands.append(self._parse_one(words, text.strip()))
+        if not commands:
+            raise ParseError('Type a command, or \'help\' to see them all', line)
+        return commands
+
+    def _parse_one(self, words: list[str], text: str) -> ParsedCommand:
+        """
+        method to turn the words of one command into a ParsedCommand
+        :param words: list[str] - the lower case words of the command
+        :param text: str - the part of the line they came from
+            Raises: ParseError if they are not a valid command
+        :return: ParsedCommand - the command
+        """
+        word = words[0]
+        argument = ' '.join(words[1:]) or None
+        alias = self.aliases.get(word)
+        if alias is not None:
+            if argument is not None:
+                raise ParseError(f'\'{word}\' does not take anything after it', text)
+            return ParsedCommand(alias[0], alias[1], text)
+
+        name = self.prefixes.get(word)
+        if name is None:
+            raise ParseError('That is not a valid command', text)
+        if name is _AMBIGUOUS:
+            choices = ' or '.join(sorted(command for command in self.arguments if command.startswith(word)))
+            raise ParseError(f'\'{word}\' could be {choices}', text)
+        shape = self.arguments[name]
+        if shape == NO_ARGUMENT and argument is not None:
+            raise ParseError(f'\'{name}\' does not take anything after it', text)
+        if shape == REQUIRED_ARGUMENT and argument is None:
+            raise ParseError(f'\'{name}\' needs something after it', text)
+        return ParsedCommand(name, argument, text)
@@ -3,8 +3,32 @@ CIS 163 Project 2 - Inheritance - GV Zork - Text-based game
 Authors: Allison Scheffer and Lauren McGuirk
 Date: February 2023
 """
+import json
+import os
 import random
+import sys
+import threading
+import time
+import weakref
+from array import array
 from datetime import datetime
+from types import MappingProxyType
+
+import events
+import planner
+import rules
+from dialogue import map_dialogue
+from events import Event, Result
+from grammar import OPTIONAL_ARGUMENT, REQUIRED_ARGUMENT, CommandGrammar, ParseError
+from names import NameIndex
+from render import OutputBuffer, StdoutSink, TextRenderer
+from routes import RouteTable
+from rules import RuleEngine, Trigger
+
+# the Mackinac Island / GVSU world that ships with the game
+DEFAULT_WORLD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gv_zork_world.jsonl')
+# seconds the player has to get to class
+TIME_LIMIT = 5 * 60
 
 
 class Item:
@@ -18,7 +42,19 @@ class Item:
         calories: int - number of calories in food, -500 to 13000 (exclusive)
             0 if not a food item, negative if it will make elf (Prof. Posada) the reject it
         weight: float - weight of the item in pounds, 0 to 500 (exclusive)
+
+    Items use __slots__ and keep their calories and weight in two arrays shared by
+    every Item, rather than one int and one float object each. The slot numbers of
+    Items that are garbage collected are reused by new Items. Slots are given out and
+    back under a lock, as the Games of a shared world make Items on many threads.
     """
+    __slots__ = ('name', 'description', '_number')
+
+    _calories = array('h')
+    _weights = array('d')
+    _free_numbers = []
+    # reentrant, as an Item collected while the lock is held gives its slot back on the same thread
+    _slots_lock = threading.RLock()
 
     def __init__(self, name: str, description: str, calories: int, weight: float):
         """
@@ -34,19 +70,62 @@ class Item:
         """
         if name == '':
             raise ValueError('Names entered cannot be blank!')
-        self.name = name
-
         if description == '':
             raise ValueError('Descriptions cannot be blank!')
-        self.description = description
-
         if calories < -500 or calories > 13000:
             raise ValueError('Calories must be between -500 and 13000!')
-        self.calories = calories
-
         if weight < 0 or weight > 500:
             raise ValueError('Weight must be between 0 and 500!')
-        self.weight = weight
+        self.name = sys.intern(name)
+        self.description = description
+
+        with self._slots_lock:
+            if self._free_numbers:
+                self._number = self._free_numbers.pop()
+                self._calories[self._number] = calories
+                self._weights[self._number] = weight
+            else:
+                self._calories.append(calories)
+                self._weights.append(weight)
+                self._number = len(self._calories) - 1
+
+    def __del__(self):
+        """
+        method to give the Item's slot in the calories and weight arrays back for reuse
+        """
+        number = getattr(self, '_number', None)
+        if number is not None:
+            with self._slots_lock:
+                self._free_numbers.append(number)
+
+    def __reduce__(self):
+        """
+        method to copy or pickle the Item by value, since its slot number only
+        means something in the process that made it
+        """
+        return Item, (self.name, self.description, self.calories, self.weight)
+
+    @property
+    def calories(self) -> int:
+        """
+        number of calories in the item, see get_calories and set_calories
+        """
+        return self._calories[self._number]
+
+    @calories.setter
+    def calories(self, new_cals: int) -> None:
+        self.set_calories(new_cals)
+
+    @property
+    def weight(self) -> float:
+        """
+        weight of the item in pounds, see get_weight and set_weight
+        """
+        return self._weights[self._number]
+
+    @weight.setter
+    def weight(self, new_weight: float) -> None:
+        self.set_weight(new_weight)
 
     def get_name(self) -> str:
         """
@@ -67,14 +146,14 @@ class Item:
         getter for the calories attribute
         :return: calories: int - number of calories in the item
         """
-        return self.calories
+        return self._calories[self._number]
 
     def get_weight(self) -> float:
         """
         getter for the weight attribute
         :return: weight: float - the weight of the item in pounds
         """
-        return self.weight
+        return self._weights[self._number]
 
     def set_name(self, new_name: str) -> None:
         """
@@ -84,7 +163,7 @@ class Item:
         """
         if new_name == '':
             raise ValueError('Names entered cannot be blank!')
-        self.name = new_name
+        self.name = sys.intern(new_name)
 
     def set_description(self, new_des: str) -> None:
         """
@@ -104,6 +183,7 @@ class Item:
         """
         if new_cals < -500 or new_cals > 13000:
             raise ValueError('Calories must be between -500 and 13000!')
+        self._calories[self._number] = new_cals
 
     def set_weight(self, new_weight: int) -> None:
         """
@@ -113,14 +193,222 @@ class Item:
         """
         if new_weight < 0 or new_weight > 500:
             raise ValueError('Weight must be between 0 and 500!')
-        self.weight = new_weight
+        self._weights[self._number] = new_weight
 
     def __str__(self) -> str:
         """
         method to convert the Item object into a string
         :return: str - representation of the Item
         """
-        return f'{self.name} - {self.weight} lb - {self.description}'
+        weight = self.get_weight()
+        # whole-number weights are shown without '.0', as they are written in the world file
+        if weight.is_integer():
+            weight = int(weight)
+        return f'{self.name} - {weight} lb - {self.description}'
+
+
+class Inventory:
+    """
+    Inventory class is a collection of Items that can be looked up by name.
+    It is used for the items in each Location and for the items the player carries.
+
+    Items are stored in insertion order and indexed by their case-folded name,
+    so finding or removing an item never scans the whole collection.
+    A name held by a single item maps straight to that item; only names shared by
+    several items need a dict of their own.
+    Running totals of weight and calories are updated as items come and go.
+    Items should not be renamed or changed while they are held in an Inventory.
+    The first time an item is looked for by a name that is not exact, a NameIndex
+    of the names is built (see names.py) and then kept up to date as well.
+
+    Attributes:
+        items: dict[Item, None] - the items in the collection, in the order they were added
+        name_index: dict[str, Item | dict[Item, None]] - case-folded item name to the item,
+            or the items, with that name
+        total_weight: float - combined weight of the items in pounds
+        total_calories: int - combined calories of the items, negative calories included
+        food_calories: int - combined calories of the items with positive calories
+        non_food_count: int - number of items with 0 calories
+        inedible_count: int - number of items with negative calories
+        names: NameIndex - the items by their normalized names, None until first needed
+    """
+    __slots__ = ('items', 'name_index', 'total_weight', 'total_calories', 'food_calories',
+                 'non_food_count', 'inedible_count', 'names')
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.items = {}
+        self.name_index = {}
+        self.total_weight = 0
+        self.total_calories = 0
+        self.food_calories = 0
+        self.non_food_count = 0
+        self.inedible_count = 0
+        self.names = None
+
+    def add_item(self, item: Item) -> None:
+        """
+        method for adding an Item to the collection
+        :param item: Item - item to be added
+        """
+        self.items[item] = None
+        key = item.get_name().casefold()
+        same_name = self.name_index.get(key)
+        if same_name is None:
+            self.name_index[key] = item
+        elif isinstance(same_name, dict):
+            same_name[item] = None
+        else:
+            self.name_index[key] = {same_name: None, item: None}
+        if self.names is not None:
+            self.names.add(item.get_name(), item)
+        self._count(item, 1)
+
+    def remove_item(self, item: Item) -> None:
+        """
+        method for removing an Item from the collection
+        :param item: Item - item to be removed
+            Raises: ValueError if the item is not in the collection
+        """
+        if item not in self.items:
+            raise ValueError('That item is not here!')
+        del self.items[item]
+        key = item.get_name().casefold()
+        same_name = self.name_index[key]
+        if isinstance(same_name, dict):
+            del same_name[item]
+            if len(same_name) == 1:
+                self.name_index[key] = next(iter(same_name))
+        else:
+            del self.name_index[key]
+        if self.names is not None:
+            self.names.remove(item.get_name(), item)
+        self._count(item, -1)
+
+    def _count(self, item: Item, sign: int) -> None:
+        """
+        method to add an item to (sign 1) or take it out of (sign -1) the running totals
+        :param item: Item - item being added or removed
+        :param sign: int - 1 when the item is added, -1 when it is removed
+        """
+        calories = item.get_calories()
+        self.total_weight += sign * item.get_weight()
+        self.total_calories += sign * calories
+        if calories > 0:
+            self.food_calories += sign * calories
+        elif calories == 0:
+            self.non_food_count += sign
+        else:
+            self.inedible_count += sign
+
+    def find_item(self, name: str) -> Item | None:
+        """
+        method to find an item by its name, ignoring case
+        :param name: str - name of the item to look for
+        :return: Item - the first item added with that name, None if there is none
+        """
+        same_name = self.name_index.get(name.casefold())
+        if isinstance(same_name, dict):
+            return next(iter(same_name))
+        return same_name
+
+    def match_items(self, name: str) -> list[Item]:
+        """
+        method to find the items a player could mean by a name that may be partial or
+        misspelled (see names.NameIndex for how names are matched)
+        :param name: str - what the player typed
+        :return: list[Item] - one item for each name that matches, empty if none does
+        """
+        item = self.find_item(name)
+        if item is not None:
+            return [item]
+        if not self.items:
+            return []
+        if self.names is None:
+            self.names = NameIndex((item.get_name(), item) for item in self.items)
+        return [same_name[0] for same_name in self.names.match(name)]
+
+    def get_weight(self) -> float:
+        """
+        getter for the total_weight attribute
+        :return: float - combined weight of the items in pounds
+        """
+        # adding and subtracting floats leaves tiny errors like 0.30000000000000004
+        return round(self.total_weight, 6)
+
+    def get_calories(self) -> int:
+        """
+        getter for the total_calories attribute
+        :return: int - combined calories of all the items
+        """
+        return self.total_calories
+
+    def get_food_calories(self) -> int:
+        """
+        getter for the food_calories attribute
+        :return: int - combined calories of the items with positive calories
+        """
+        return self.food_calories
+
+    def get_non_food_count(self) -> int:
+        """
+        getter for the non_food_count attribute
+        :return: int - number of items with 0 calories
+        """
+        return self.non_food_count
+
+    def get_inedible_count(self) -> int:
+        """
+        getter for the inedible_count attribute
+        :return: int - number of items with negative calories
+        """
+        return self.inedible_count
+
+    def copy(self) -> 'Inventory':
+        """
+        method to make a separate Inventory holding the same items
+        :return: Inventory - the copy, with its own index and running totals
+        """
+        other = Inventory()
+        other.items = self.items.copy()
+        other.name_index = {key: same_name.copy() if isinstance(same_name, dict) else same_name
+                            for key, same_name in self.name_index.items()}
+        other.total_weight = self.total_weight
+        other.total_calories = self.total_calories
+        other.food_calories = self.food_calories
+        other.non_food_count = self.non_food_count
+        other.inedible_count = self.inedible_count
+        return other
+
+    def get_items(self) -> list:
+        """
+        getter for the items in the collection
+        :return: list - of items, in the order they were added
+        """
+        return list(self.items)
+
+    def __contains__(self, item: Item) -> bool:
+        """
+        method to check if an Item is in the collection
+        :return: bool - true if the item is held, false if not
+        """
+        return item in self.items
+
+    def __iter__(self):
+        """
+        method to loop over the items in the order they were added
+        """
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        """
+        method to count the items in the collection
+        :return: int - number of items held
+        """
+        return len(self.items)
 
 
 class NPC:
@@ -132,8 +420,10 @@ class NPC:
         name: str - the name of the character
         description: str - the description of the character
         message_number: int - the index of a message in the messages list
-        messages: list - the list of messages that the NPC can say
+        messages: list - the list of messages that the NPC can say, or a read-only
+            DialogueLines once they are moved into a shared dialogue file (see dialogue.py)
     """
+    __slots__ = ('name', 'description', 'message_number', 'messages')
 
     def __init__(self, name: str, description: str):
         """
@@ -141,7 +431,7 @@ class NPC:
         :param name: str - the name of the character
         :param description: str - the description of the character
         """
-        self.name = name
+        self.name = sys.intern(name)
         self.description = description
         self.message_number = 0
         self.messages = []
@@ -171,9 +461,18 @@ class NPC:
         """
         method to add messages of the NPC into a list
         :param message: str - message the NPC will say
+            Raises: RuntimeError if the messages are in a shared dialogue file
         """
         self.messages.append(message)
 
+    def get_message_at(self, message_number: int) -> str:
+        """
+        getter for one message, without moving message_number
+        :param message_number: int - index of the message, wraps around the end of the list
+        :return: str - the message at that index
+        """
+        return self.messages[message_number % len(self.messages)]
+
     def get_message(self) -> str:
         """
         adds one to message number to continue down the list until reaching the
@@ -187,6 +486,75 @@ class NPC:
         return current_message
 
 
+class RoomView:
+    """
+    RoomView class is the part of what look shows that depends only on a room: the
+    Location and the items and NPCs in it. A Location keeps one for its own items
+    (see Location.get_view), and a WorldState one for each room whose items a game has changed.
+
+    Attributes:
+        location: Location - the room
+        items: tuple[Item] - the items in it, in the order they were added
+        npcs: tuple[NPC] - the NPCs in it
+        base: RoomView - the Location's own view this one was made from, None if it is that view
+        text: str - the view as text, None until a TextRenderer renders it
+    """
+    __slots__ = ('location', 'items', 'npcs', 'base', 'text')
+
+    def __init__(self, location: 'Location', items: tuple, npcs: tuple, base: 'RoomView' = None):
+        """
+        Constructor
+        :param location: Location - the room
+        :param items: tuple[Item] - the items in it
+        :param npcs: tuple[NPC] - the NPCs in it
+        :param base: RoomView - the Location's own view, when the items are a game's own
+        """
+        self.location = location
+        self.items = items
+        self.npcs = npcs
+        self.base = base
+        self.text = None
+
+
+class LookView:
+    """
+    LookView class is everything look shows of a room in one game: its RoomView and
+    its exits, each labeled with where it leads if the player has been there.
+
+    Attributes:
+        room: RoomView - the room, its items and its NPCs
+        exits: tuple[tuple[str, Location | None]] - each direction, and the Location it
+            leads to if the player has visited it, None if not
+        visited_count: int - how many Locations the player had visited when it was made
+        text: str - the view as text, None until a TextRenderer renders it
+    """
+    __slots__ = ('room', 'exits', 'visited_count', 'text')
+
+    def __init__(self, room: RoomView, exits: tuple, visited_count: int):
+        """
+        Constructor
+        :param room: RoomView - the room, its items and its NPCs
+        :param exits: tuple[tuple[str, Location | None]] - the labeled exits
+        :param visited_count: int - how many Locations the player has visited
+        """
+        self.room = room
+        self.exits = exits
+        self.visited_count = visited_count
+        self.text = None
+
+    def __eq__(self, other) -> bool:
+        """
+        method to compare two views by what they show
+        :return: bool - true if they show the same room, items, NPCs and exits
+        """
+        if not isinstance(other, LookView):
+            return NotImplemented
+        return (self.room.location is other.room.location and self.room.items == other.room.items
+                and self.room.npcs == other.room.npcs and self.exits == other.exits)
+
+    __hash__ = None
+
+
 class Location:
     """
     Location class is a blueprint for storing information about a location
@@ -200,8 +568,22 @@ class Location:
         directions: dict[str, Location] - contains the neighboring locations
             which the player can travel to from this location
         NPCs: List[NPC] - the NPCs that are in the Location
-        items: List[Item] - the items that are in the Location
+        items: Inventory - the items that are in the Location, indexed by name
+        frozen: bool - True once the Location is part of a world shared by many Games,
+            after which it cannot be changed
+        npc_names: NameIndex - the NPCs by their normalized names, None until first needed
+        view: RoomView - what look shows of the Location's own items and NPCs, None until
+            first needed and again after they or the exits change
+
+    Most Locations in a big world have no NPCs and many have no items, so directions,
+    NPCs and items stay None until something is added to them, and the getters hand
+    back shared empty (read-only) values instead.
+
+    Every RouteTable in use is told about each exit that is added (see route_tables).
     """
+    __slots__ = ('name', 'description', 'visited', 'directions', 'NPCs', 'items', 'frozen', 'npc_names', 'view')
+    # the RouteTables of every World that has been asked for routes
+    route_tables = weakref.WeakSet()
 
     def __init__(self, name: str, description: str):
         """
@@ -209,18 +591,23 @@ class Location:
         :param name: str - name of the Location
         :param description: str - description of the Location
         """
-        self.name = name
+        self.name = sys.intern(name)
         self.description = description
         self.visited = False
-        self.directions = {}
-        self.NPCs = []
-        self.items = []
+        self.directions = None
+        self.NPCs = None
+        self.items = None
+        self.frozen = False
+        self.npc_names = None
+        self.view = None
 
     def get_locations(self) -> dict:
         """
         getter for direction attribute
         :return: dict - dictionary of the location's directions
         """
+        if self.directions is None:
+            return _NO_DIRECTIONS
         return self.directions
 
     def get_name(self) -> str:
@@ -250,57 +637,142 @@ class Location:
     def set_visited(self) -> None:
         """
         method that changes the visited variable to true
+            Raises: RuntimeError if the Location is frozen
         """
+        self._check_not_frozen()
         self.visited = True
 
+    def freeze(self) -> None:
+        """
+        method to stop the Location from being changed, so it can be shared
+        """
+        self.frozen = True
+
+    def _check_not_frozen(self) -> None:
+        """
+        method to refuse changes to a frozen Location
+            Raises: RuntimeError if the Location is frozen
+        """
+        if self.frozen:
+            raise RuntimeError(f'{self.name} is part of a shared world and cannot be changed!')
+
     def add_location(self, direction: str, location: 'Location') -> None:
         """
         method to add a location to the neighbors dictionary
         :param: direction: str - direction to the neighbor from this instance of Location
             Raises: ValueError if value entered is blank
             Raises: KeyError if value entered already exists for this instance of Location.
+            Raises: RuntimeError if the Location is frozen
         :param: location: Location - an instance of the Location class that
             can be traveled to from this instance of Location
         """
+        self._check_not_frozen()
         if direction == '':
             raise ValueError('Direction entered cannot be blank!')
-        if direction in self.directions:
+        if self.directions is None:
+            self.directions = {}
+        elif direction in self.directions:
             raise KeyError('This direction already exists!')
         self.directions[direction] = location
+        self.view = None
+        if Location.route_tables:
+            # iterating a WeakSet is slow, and worlds are usually built before any routes are asked for
+            for route_table in Location.route_tables:
+                route_table.exit_added(self, location)
 
     def add_npc(self, npc: NPC) -> None:
         """
         method for adding an NPC to the Location's list of NPCs
         :param: npc: NPC - character to be added to the Location
+            Raises: RuntimeError if the Location is frozen
         """
+        self._check_not_frozen()
+        if self.NPCs is None:
+            self.NPCs = []
         self.NPCs.append(npc)
+        self.view = None
+        if self.npc_names is not None:
+            self.npc_names.add(npc.get_name(), npc)
 
     def get_npcs(self) -> list[NPC]:
         """
         getter for NPCs attribute
-        :return: list[NPC] - list of the NPCs in the Location
+        :return: list[NPC] - list of the NPCs in the Location (an empty tuple if there are none)
         """
+        if self.NPCs is None:
+            return ()
         return self.NPCs
 
+    def match_npcs(self, name: str) -> list[list[NPC]]:
+        """
+        method to find the NPCs a player could mean by a name that may be partial or
+        misspelled (see names.NameIndex for how names are matched)
+        :param name: str - what the player typed
+        :return: list[list[NPC]] - the NPCs with each name that matches, empty if none does
+        """
+        if self.NPCs is None:
+            return []
+        if self.npc_names is None:
+            self.npc_names = NameIndex((npc.get_name(), npc) for npc in self.NPCs)
+        return self.npc_names.match(name)
+
     def add_item(self, item: Item) -> None:
         """
         method for adding an Item to the Location's item list
         :param: item: Item - item to be added in the location
+            Raises: RuntimeError if the Location is frozen
         """
-        self.items.append(item)
+        self._check_not_frozen()
+        if self.items is None:
+            self.items = Inventory()
+        self.items.add_item(item)
+        self.view = None
 
     def remove_item(self, item: Item) -> None:
         """
         method for removing an Item from the Location's item list
         :param: item: Item - item to be removed from the location
+            Raises: RuntimeError if the Location is frozen
         """
-        self.items.remove(item)
+        self._check_not_frozen()
+        self.get_inventory().remove_item(item)
+        if not self.items:
+            self.items = None
+        self.view = None
+
+    def find_item(self, name: str) -> Item | None:
+        """
+        method to find an item in the Location by its name, ignoring case
+        :param name: str - name of the item to look for
+        :return: Item - the matching item, None if the Location does not have it
+        """
+        return self.get_inventory().find_item(name)
 
     def get_items(self) -> list:
         """
         getter for the items attribute
         :return: list - of items in the Location
         """
+        return self.get_inventory().get_items()
+
+    def get_view(self) -> RoomView:
+        """
+        getter for what look shows of the Location's own items and NPCs, made the first
+        time it is needed and kept until they or the exits change. A frozen Location
+        still keeps its view, as that only caches what cannot change.
+        :return: RoomView - the view
+        """
+        if self.view is None:
+            self.view = RoomView(self, tuple(self.get_inventory()), tuple(self.get_npcs()))
+        return self.view
+
+    def get_inventory(self) -> Inventory:
+        """
+        getter for the Inventory holding the Location's items and their running totals
+        :return: Inventory - the items in the Location, which must not be changed directly
+        """
+        if self.items is None:
+            return _NO_ITEMS
         return self.items
 
     def __str__(self) -> str:
@@ -311,6 +783,451 @@ class Location:
         return f'{self.name} - {self.description}'
 
 
+# shared stand-ins for the directions and items of Locations that have none
+_NO_DIRECTIONS = MappingProxyType({})
+_NO_ITEMS = Inventory()
+
+
+class World:
+    """
+    World class holds the connected Locations that a Game is played in.
+
+    Attributes:
+        locations: dict[str, Location] - every Location in the world by its id
+        regions: dict[str, list[Location]] - named groups of Locations, such as
+            'island' (where the player can start) and 'gv' (where the player can be
+            sent when Posada rejects an item)
+        routes: RouteTable - shortest routes between the Locations, None until first asked for
+    """
+    # held while a RouteTable is made, so the games of a shared world on many threads make only one
+    _routes_lock = threading.Lock()
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.locations = {}
+        self.regions = {}
+        self.routes = None
+
+    def get_location(self, location_id: str) -> Location:
+        """
+        getter for one Location
+        :param location_id: str - id of the Location
+            Raises: KeyError if there is no Location with that id
+        :return: Location - the Location with that id
+        """
+        return self.locations[location_id]
+
+    def get_region(self, region: str) -> list[Location]:
+        """
+        getter for the Locations in a region
+        :param region: str - name of the region
+        :return: list[Location] - Locations in the region, empty if there are none
+        """
+        return self.regions.get(region, [])
+
+    def get_routes(self) -> RouteTable:
+        """
+        getter for the world's RouteTable, made the first time it is needed and kept
+        up to date as exits are added
+        :return: RouteTable - the routes between the world's Locations
+        """
+        if self.routes is None:
+            with self._routes_lock:
+                if self.routes is None:
+                    routes = RouteTable(self.locations.values())
+                    Location.route_tables.add(routes)
+                    self.routes = routes
+        return self.routes
+
+    def route(self, source: Location, destination: Location) -> list[str] | None:
+        """
+        method to find the shortest way from one Location to another
+        :param source: Location - where to start
+        :param destination: Location - where to go
+        :return: list[str] - the directions to go in, in order (empty if they are the same
+            Location), or None if there is no way to get there
+        """
+        return self.get_routes().route(source, destination)
+
+    def freeze(self) -> None:
+        """
+        method to freeze every Location, so the world can be shared by many Games
+        """
+        for location in self.locations.values():
+            location.freeze()
+
+
+class WorldState:
+    """
+    WorldState class holds the parts of a World that change while a Game is played,
+    on top of a frozen World that is shared by every Game.
+
+    The World itself is never changed. The first time a Location's items change,
+    they are copied into the WorldState (copy-on-write), so only the rooms the
+    player has changed take up memory.
+
+    What look shows of each room is kept too (see look_view), and dropped only when
+    the room's items change in this game or the Location itself changes.
+
+    Attributes:
+        room_items: dict[Location, Inventory] - the items of each Location that has changed
+        message_numbers: dict[NPC, int] - the next message of each NPC that has been talked to
+        room_views: dict[Location, RoomView] - the view of each changed Location's items
+        look_views: dict[Location, LookView] - what look last showed of each Location
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.room_items = {}
+        self.message_numbers = {}
+        self.room_views = {}
+        self.look_views = {}
+
+    def get_inventory(self, location: Location) -> Inventory:
+        """
+        getter for the items of a Location, for reading only
+        :param location: Location - the Location to look in
+        :return: Inventory - the Location's items as they are in this game
+        """
+        inventory = self.room_items.get(location)
+        if inventory is None:
+            return location.get_inventory()
+        return inventory
+
+    def edit_inventory(self, location: Location) -> Inventory:
+        """
+        getter for the items of a Location, for changing them
+        :param location: Location - the Location whose items will change
+        :return: Inventory - this game's own copy of the Location's items
+        """
+        inventory = self.room_items.get(location)
+        if inventory is None:
+            inventory = location.get_inventory().copy()
+            self.room_items[location] = inventory
+        else:
+            self.room_views.pop(location, None)
+        return inventory
+
+    def take_item(self, location: Location, item: Item) -> bool:
+        """
+        method to take an item out of a Location, if it is still there
+        :param location: Location - the Location to take it from
+        :param item: Item - the item
+        :return: bool - True if it was taken, False if it is not in the Location
+        """
+        if item not in self.get_inventory(location):
+            return False
+        self.edit_inventory(location).remove_item(item)
+        return True
+
+    def put_item(self, location: Location, item: Item) -> None:
+        """
+        method to put an item in a Location
+        :param location: Location - the Location to put it in
+        :param item: Item - the item
+        """
+        self.edit_inventory(location).add_item(item)
+
+    def room_view(self, location: Location) -> RoomView:
+        """
+        getter for what look shows of a Location's items and NPCs in this game
+        :param location: Location - the room
+        :return: RoomView - the Location's own view if this game has not changed its items,
+            otherwise a view of this game's items
+        """
+        base = location.get_view()
+        inventory = self.room_items.get(location)
+        if inventory is None:
+            return base
+        view = self.room_views.get(location)
+        if view is None or view.base is not base:
+            view = self.room_views[location] = RoomView(location, tuple(inventory), base.npcs, base)
+        return view
+
+    def look_view(self, location: Location, visited: set) -> LookView:
+        """
+        getter for everything look shows of a Location in this game. The view is kept, so
+        looking again costs a lookup, until the room changes or the player visits somewhere new.
+        :param location: Location - the room
+        :param visited: set[Location] - the Locations the player has visited
+        :return: LookView - the view
+        """
+        room = self.room_view(location)
+        view = self.look_views.get(location)
+        if view is None or view.room is not room or view.visited_count != len(visited):
+            exits = tuple((direction, neighbor if neighbor in visited else None)
+                          for direction, neighbor in location.get_locations().items())
+            view = self.look_views[location] = LookView(room, exits, len(visited))
+        return view
+
+    def next_message(self, npc: NPC) -> str:
+        """
+        method to get what an NPC says next in this game, moving on to the following message
+        :param npc: NPC - the NPC being talked to
+        :return: str - the NPC's message
+        """
+        message_number = self.message_numbers.get(npc, npc.message_number)
+        message = npc.get_message_at(message_number)
+        self.message_numbers[npc] = (message_number + 1) % len(npc.messages)
+        return message
+
+    def clear(self) -> None:
+        """
+        method to undo every change, putting the world back the way it started
+        """
+        self.room_items.clear()
+        self.message_numbers.clear()
+        self.room_views.clear()
+        self.look_views.clear()
+
+
+# worlds that have been loaded and frozen, by file path
+_shared_worlds = {}
+
+
+def shared_world(path: str = DEFAULT_WORLD_FILE, dialogue_path: str = None) -> World:
+    """
+    Loads a world file once and freezes it, so every Game played in it shares one copy.
+    :param path: str - path to the world file, the GV Zork world by default
+    :param dialogue_path: str - a dialogue file to move the NPCs' messages into, so every
+        process playing the world shares them (see dialogue.map_dialogue); only used
+        the first time the world is loaded, None to keep the messages in memory
+    :return: World - the frozen world
+    """
+    key = os.path.abspath(path)
+    world = _shared_worlds.get(key)
+    if world is None:
+        world = load_world_file(path)
+        if dialogue_path is not None:
+            map_dialogue(world, dialogue_path)
+        world.freeze()
+        _shared_worlds[key] = world
+    return world
+
+
+def _size_of(container) -> int:
+    """
+    Adds up the memory used by a container and the containers directly inside it.
+    The objects they point to, such as Items and Locations, are not counted.
+    :param container: dict, list or set to measure
+    :return: int - size in bytes
+    """
+    size = sys.getsizeof(container)
+    values = container.values() if isinstance(container, dict) else container
+    for value in values:
+        if isinstance(value, (dict, list, set)):
+            size += sys.getsizeof(value)
+    return size
+
+
+def load_world(lines) -> World:
+    """
+    Builds a World from JSON Lines records, one record per line.
+    Records are read one at a time, so the file is never held in memory.
+
+    Each record has a 'type':
+        location: id, name, description and an optional region
+        exit: from, direction and to, the ids of the two Locations
+        item: location, name, description, calories and weight
+        npc: location, name, description and an optional list of messages
+    Exits can name Locations that appear later in the file; they are connected
+    as soon as both ends have been read. Items and NPCs must come after their Location.
+    Blank lines and lines starting with '#' are skipped.
+
+    :param lines: iterable of str - the records, such as an open file
+        Raises: ValueError if a record is not valid or an exit is never connected
+    :return: World - the world described by the records
+    """
+    world = World()
+    locations = world.locations
+    # exits waiting for a Location that has not been read yet, by the missing id
+    waiting = {}
+
+    def connect(exit_record: dict) -> None:
+        source_id = exit_record['from']
+        target_id = exit_record['to']
+        if source_id not in locations:
+            waiting.setdefault(source_id, []).append(exit_record)
+        elif target_id not in locations:
+            waiting.setdefault(target_id, []).append(exit_record)
+        else:
+            locations[source_id].add_location(exit_record['direction'], locations[target_id])
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            record = json.loads(line)
+            kind = record['type']
+            if kind == 'location':
+                location_id = record['id']
+                if location_id in locations:
+                    raise ValueError(f'Location {location_id} already exists!')
+                location = Location(record['name'], record['description'])
+                locations[location_id] = location
+                if 'region' in record:
+                    world.regions.setdefault(record['region'], []).append(location)
+                for exit_record in waiting.pop(location_id, ()):
+                    connect(exit_record)
+            elif kind == 'exit':
+                connect(record)
+            elif kind == 'item':
+                item = Item(record['name'], record['description'], record['calories'], record['weight'])
+                locations[record['location']].add_item(item)
+            elif kind == 'npc':
+                npc = NPC(record['name'], record['description'])
+                for message in record.get('messages', ()):
+                    npc.add_message(message)
+                locations[record['location']].add_npc(npc)
+            else:
+                raise ValueError(f'Unknown record type {kind}!')
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f'Line {line_number} of the world is not valid: {error!r}') from error
+
+    if waiting:
+        missing = ', '.join(sorted(waiting))
+        raise ValueError(f'Exits connect locations that do not exist: {missing}')
+    return world
+
+
+def load_world_file(path: str = DEFAULT_WORLD_FILE) -> World:
+    """
+    Builds a World from a JSON Lines file, see load_world for the format.
+    :param path: str - path to the file, the shipped GV Zork world by default
+    :return: World - the world described by the file
+    """
+    with open(path, encoding='utf-8') as file:
+        return load_world(file)
+
+
+def build_grammar() -> CommandGrammar:
+    """
+    Creates the grammar of the commands in Game.setup_commands: what each one takes
+    after it, and the short aliases for the common ones.
+    :return: CommandGrammar - the compiled grammar
+    """
+    grammar = CommandGrammar()
+    for name in ('help', '?', 'stats', 'hint'):
+        grammar.add_command(name)
+    for name in ('items', 'look', 'quit'):
+        grammar.add_command(name, OPTIONAL_ARGUMENT)
+    for name in ('talk', 'meet', 'go', 'goto', 'take', 'give', 'ransom'):
+        grammar.add_command(name, REQUIRED_ARGUMENT)
+    for alias, direction in (('n', 'north'), ('s', 'south'), ('e', 'east'), ('w', 'west'),
+                             ('u', 'upstairs'), ('d', 'downstairs')):
+        grammar.add_alias(alias, 'go ' + direction)
+    grammar.add_alias('l', 'look')
+    grammar.add_alias('i', 'items')
+    grammar.compile()
+    return grammar
+
+
+# the grammar is the same for every game, so it is only built once
+GRAMMAR = build_grammar()
+
+POSADAS_CLASSROOM = 'Posada\'s Classroom'
+# how many times Posada can be given something inedible before the player is expelled
+MAX_FAILS = 3
+
+
+def _is_food(game: 'Game', trigger: Trigger) -> bool:
+    """
+    Checks whether the item of a trigger has calories to give.
+    """
+    return trigger.item.get_calories() > 0
+
+
+def _is_not_food(game: 'Game', trigger: Trigger) -> bool:
+    """
+    Checks whether the item of a trigger has no calories, or negative ones.
+    """
+    return trigger.item.get_calories() <= 0
+
+
+def feed_professor(game: 'Game', trigger: Trigger) -> None:
+    """
+    Rule for giving Posada food: the calories still needed go down by those of the food,
+    and the player wins once none are needed. Only what this player has given counts,
+    so in a shared world no one is credited with food other players left in the classroom.
+    """
+    game.elf_needed_calories = max(0, game.elf_needed_calories - trigger.item.get_calories())
+    game.emit(events.FED_PROFESSOR, item=trigger.item, calories_needed=game.elf_needed_calories)
+    if game.elf_needed_calories == 0:
+        game.game_over = True
+
+
+def take_back_food(game: 'Game', trigger: Trigger) -> None:
+    """
+    Rule for taking food back out of Posada's classroom: its calories are needed again,
+    up to the calorie goal, so the same food cannot be given twice.
+    """
+    game.elf_needed_calories = min(game.elf_calorie_goal, game.elf_needed_calories + trigger.item.get_calories())
+
+
+def reject_item(game: 'Game', trigger: Trigger) -> None:
+    """
+    Rule for giving Posada something that is not food: she rejects it and the player
+    is sent to a random GV location.
+    """
+    if trigger.item.get_calories() == 0:
+        game.emit(events.REJECTED_NON_FOOD, item=trigger.item)
+    else:
+        game.emit(events.REJECTED_FOOD, item=trigger.item)
+    game.current_location = game.random_gv_location()
+    game.emit(events.TELEPORTED, location=game.current_location)
+
+
+def count_fail(game: 'Game', trigger: Trigger) -> None:
+    """
+    Rule for counting the things Posada has rejected; the game is lost at MAX_FAILS.
+    """
+    game.count_num_fails += 1
+    if game.count_num_fails == MAX_FAILS:
+        game.emit(events.TOO_MANY_FAILS, fails=game.count_num_fails)
+        game.game_over = True
+
+
+def ransom_baby(game: 'Game', trigger: Trigger) -> None:
+    """
+    Rule for ransoming the newborn baby: if the player carries it and there is someone
+    to ransom it to, it is exchanged for magic fudge with enough calories to win the
+    game on its own and no weight. The baby is not added to the Location's items, so
+    the trade cannot be reversed.
+    """
+    npcs = trigger.location.get_npcs()
+    if trigger.item is not None and len(npcs) != 0:
+        game.items.remove_item(trigger.item)
+        magic = Item('Magic Ransom Fudge',
+                     'Earned the baby\'s calories in a weightless fudge as a result of a ransom', 12823, 0)
+        game.items.add_item(magic)
+        game.emit(events.RANSOMED, npc=npcs[0], given=trigger.item, received=magic)
+
+
+def build_rules() -> RuleEngine:
+    """
+    Creates the rules of GV Zork: what Posada does with what she is given, and the ransom of the newborn baby.
+    :return: RuleEngine - the rules
+    """
+    engine = RuleEngine()
+    engine.add(rules.GIVE, reject_item, location=POSADAS_CLASSROOM, when=_is_not_food)
+    engine.add(rules.GIVE, count_fail, location=POSADAS_CLASSROOM, when=_is_not_food)
+    engine.add(rules.GIVE, feed_professor, location=POSADAS_CLASSROOM, when=_is_food)
+    engine.add(rules.TAKE, take_back_food, location=POSADAS_CLASSROOM, when=_is_food)
+    engine.add(rules.RANSOM, ransom_baby, item='newborn baby')
+    return engine
+
+
+# the rules are the same for every game, so they are only built once
+RULES = build_rules()
+
+
 class Game:
     """
     Game class is a blueprint for storing the logic about each game
@@ -323,41 +1240,134 @@ class Game:
     may be needed. Once Posada as been brought enough food with enough calories,
     the player will be excused from their tardiness and the game will end.
 
+    The World is frozen and shared by every Game played in it. Everything that
+    changes while playing is kept by the Game itself: the player's location,
+    inventory and visited Locations, and the moved items and NPC messages in world_state.
+
     Attributes:
         commands: dict[str] - dictionary of commands for the
           player to call
-        items: List[Items] - the items the player currently has
+        grammar: CommandGrammar - turns typed lines into commands, shared by every game
+        items: Inventory - the items the player currently has
           in their inventory
-        current_weight: float - holds current weight player is carrying
-            (change to a float?)
-        locations: list[Location] - Locations that exist in the world
+        current_weight: float - holds current weight player is carrying,
+            read from the running total of the inventory
+        world: World - the shared, frozen World the game is played in
+        world_state: WorldState - the changes this game has made to the world
+        visited: set[Location] - Locations the player has left at least once
+        island_locations: list[Location] - Locations the player can start in
+        gv_locations: list[Location] - Locations the player can be sent to by Posada
         current_location: Location - player's current location
-        elf_needed_calories: int - number of calories needed to be excused from
+        elf_calorie_goal: int - total calories Posada must be given
+        max_weight: float - the most the player can carry and still move, in pounds
+        elf_needed_calories: int - number of calories still needed to be excused from
             tardiness to class
         game_over: bool - whether the game is still in process or not
+        count_num_fails: int - number of times Posada has been given something she rejected
+        turn_events: list[Event] - what has happened so far during the current command
+        seed: int - seed of the game's random generator, so a game can be played again the same way
+        rng: random.Random - the game's random generator, made from the seed when first needed
+        rng_state: tuple - the state of the random generator, None until it is made
+        clock: callable - returns the current time as a datetime
+        turn_time: datetime - the time read from the clock when the current command started
+        monotonic: callable - the game clock, returning seconds that never go backwards
+            (unlike clock, which can be changed), used for the time limit
+        time_limit: float - seconds the player has from the start, None for no limit
+        deadline: float - when the time runs out, as read from monotonic; None until the
+            game starts or if there is no limit
+        log: the object with start(game), record(command_line, time) and time_up(time) methods
+            that every accepted command is recorded to, such as replay.EventLog; None to record nothing
+        metrics: metrics.CommandMetrics - measures every command run, None to measure nothing
+        rules: RuleEngine - the rules run when the player enters, takes, gives, ransoms or talks (see rules.py)
+
+    The deadline is checked at the start of every command, so a command typed too late
+    is not run. A server can also end a game the moment its time runs out, without
+    waiting for a command, by calling time_up from a shared timer (see timers.TimerHeap).
     """
-    def __init__(self):
+    def __init__(self, world: World = None, seed: int = None, rng: random.Random = None, clock=None,
+                 monotonic=None):
         """
         Constructor
-        No Parameters
-        """
+        :param world: World - the world to play in, the shared GV Zork world if not given
+        :param seed: int - seed for the game's random generator, a random one if not given
+        :param rng: random.Random - random generator to use instead of one made from the seed
+        :param clock: callable - returns the current time, datetime.now if not given
+        :param monotonic: callable - the game clock in seconds, time.monotonic if not given
+        """
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self._rng = rng
+        self.clock = clock if clock is not None else datetime.now
+        self.turn_time = None
+        self.monotonic = monotonic if monotonic is not None else time.monotonic
+        self.time_limit = TIME_LIMIT
+        self.deadline = None
+        self.log = None
+        self.metrics = None
         self.commands = self.setup_commands()
-        self.items = []
-        self.current_weight = 0
-        self.gv_locations = []
-        self.island_locations = []
-        self.create_world()
+        self.grammar = GRAMMAR
+        self.rules = RULES
+        self.items = Inventory()
+        self.visited = set()
+        self.world_state = WorldState()
+        if world is None:
+            self.create_world()
+        else:
+            self.set_world(world)
         self.current_location = self.first_location()
-        self.elf_needed_calories = 2000
+        self.elf_calorie_goal = 2000
+        self.max_weight = 30
+        self.elf_needed_calories = self.elf_calorie_goal
         self.game_over = False
         self.count_num_fails = 0
+        self.turn_events = []
+
+    @property
+    def current_weight(self) -> float:
+        """
+        getter for the weight the player is carrying
+        :return: float - combined weight of the inventory in pounds
+        """
+        return self.items.get_weight()
+
+    @property
+    def rng(self) -> random.Random:
+        """
+        getter for the game's random generator, made from the seed the first time it is needed
+        :return: random.Random - the random generator
+        """
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    @property
+    def rng_state(self) -> tuple | None:
+        """
+        getter for the state of the game's random generator, so a game can be stored and carried on later
+        :return: tuple - the state as from random.Random.getstate, None if no generator has been made yet
+        """
+        return self._rng.getstate() if self._rng is not None else None
+
+    @rng_state.setter
+    def rng_state(self, state: tuple | None) -> None:
+        """
+        setter for the state of the game's random generator
+        :param state: tuple - a state from rng_state, or None to make the generator from the seed when next needed
+        """
+        if state is None:
+            self._rng = None
+        else:
+            self._rng = random.Random()
+            self._rng.setstate(state)
 
     def first_location(self) -> Location:
         """
         creates a list containing the desired first location, the selects that location.
         :return: Location - the location the player will start in (fudge_shop)
         """
-        random_num = random.randint(0, len(self.island_locations) - 1)
+        if len(self.island_locations) == 1:
+            # nothing to choose, so most games never need a random generator
+            return self.island_locations[0]
+        random_num = self.rng.randint(0, len(self.island_locations) - 1)
         return self.island_locations[random_num]
 
     def random_gv_location(self) -> Location:
@@ -365,248 +1375,73 @@ class Game:
         selects a random location from a list of GV locations
         :return: Location - random location in GV chosen from the list
         """
-        random_num = random.randint(0, len(self.gv_locations)-1)
+        random_num = self.rng.randint(0, len(self.gv_locations)-1)
         return self.gv_locations[random_num]
 
-    def create_world(self) -> None:
+    def create_world(self, path: str = DEFAULT_WORLD_FILE) -> None:
         """
         This method is where everything in the world is created.
-        Each Location is created and then given its directions to its neighboring locations.
-        items are added to each location (or the location is not assigned any items).
-        NPCs are added to each location (or the location is not assigned any NPCs).
-            Each NPC has a list of messages that are added.
-        Finally, a list of island locations and a list of GV locations are created
-        """
-        # locations
-        fudge_shop = Location('Fudge Shop', 'A cute little sweets shop and a Mackinac specialty!')
-        self.current_location = fudge_shop
-        road = Location('Road', 'Just a paved path for cars, and bikes I suppose.')
-        museum = Location('Museum', 'Filled with wartime artifacts! '
-                                    '\nTake the ferry for a one-way ticket out of here!')
-        gv_road = Location('GV Road', 'Welcome to Grand Valley State University!')
-        einsteins = Location('Einstein\'s Bagels', 'The best bagel place in town!')
-        multi_room = Location('Multipurpose Room', 'Big room full of strange treasures!')
-        mackinac = Location('Mackinac Hall', 'The math and computing building--full of nerds of course.')
-        mackinac_lower = Location('Mackinac Hall', 'Lower level, a bit spooky down here...')
-        mackinac2 = Location('Mackinac Hall', 'Second floor.')
-        mackinac2a = Location('Mackinac Hall', 'Second floor, A wing')
-        posada_office = Location('Posada\'s office', 'The office of the coolest CS professor!')
-        mackinac2b = Location('Mackinac Hall', 'Second floor, B wing')
-        posada_room = Location('Posada\'s Classroom', 'Your favorite class!')
-
-        # location directions
-        fudge_shop.add_location('Exit', road)
-
-        road.add_location('South', fudge_shop)
-        road.add_location('North', museum)
-
-        museum.add_location('South', road)
-        museum.add_location('Ferry', gv_road)
-
-        gv_road.add_location('East', einsteins)
-        gv_road.add_location('West', mackinac)
-
-        einsteins.add_location('Exit', gv_road)
-        einsteins.add_location('Enter', multi_room)
-
-        multi_room.add_location('Exit', einsteins)
-
-        mackinac.add_location('Exit', gv_road)
-        mackinac.add_location('Downstairs', mackinac_lower)
-        mackinac.add_location('Upstairs', mackinac2)
-
-        mackinac_lower.add_location('Upstairs', mackinac)
-
-        mackinac2.add_location('Downstairs', mackinac)
-        mackinac2.add_location('Left', mackinac2a)
-        mackinac2.add_location('Right', mackinac2b)
-
-        mackinac2a.add_location('Right', mackinac2)
-        mackinac2a.add_location('Left', posada_office)
-
-        posada_office.add_location('Right', mackinac2a)
-
-        mackinac2b.add_location('Left', mackinac2)
-        mackinac2b.add_location('Right', posada_room)
-
-        posada_room.add_location('Left', mackinac2b)
-
-        # item needs name, description, calories, and weight
-        # Fudge shop items
-        choc_fudge = Item('Chocolate fudge', 'Thick and gooey', 900, .5)
-        cherry_fudge = Item('Cherry fudge', 'Michigan\'s state fruit in a fudge!', 700, .5)
-        pb_fudge = Item('Peanut butter fudge', 'Good thing you\'re not allergic...right?', 850, .5)
-        strawberry_fudge = Item('Strawberry fudge', 'Pretty in pink <3', 700, .5)
-        fudge_shop.add_item(choc_fudge)
-        fudge_shop.add_item(cherry_fudge)
-        fudge_shop.add_item(pb_fudge)
-        fudge_shop.add_item(strawberry_fudge)
-
-        # road items
-        newborn = Item('Newborn baby', 'Cutest orphan ever', 12823, 7)
-        horse_poo = Item('Horse poo', 'I wonder why they\'re called \'road apples\'...', -500, 2)
-        road.add_item(newborn)
-        road.add_item(horse_poo)
-
-        # museum items
-        mona = Item('Mona Lisa', 'What\'s she doing here?', 0, 18)
-        horse_shoe = Item('Horse Shoe', 'Musty, dusty, and rusty', 0, 7)
-        mints = Item('Revolutionary Mints', 'Pretty fresh for a gift shop', 90, .5)
-        museum.add_item(mona)
-        museum.add_item(horse_shoe)
-        museum.add_item(mints)
-
-        # GV Road Items
-        dirty_snow = Item('Dirty snow', 'At least it isn\'t yellow...', -100, .2)
-        graffiti_rock = Item('Graffiti rock', 'Which frat is advertised today?', 0, 200)
-        gv_road.add_item(dirty_snow)
-        gv_road.add_item(graffiti_rock)
-
-        # einsteins items
-        everything_bagel = Item('Everything bagel', 'All of your hopes and dreams \'sucked into a bagel\'', 400, .3)
-        asiago_bagel = Item('Asiago bagel', 'Everything is better with cheese on it', 600, .3)
-        choc_muffin = Item('Chocolate muffin', 'Mmmmmm...chocolate', 350, .2)
-        vanilla_coffee = Item('Vanilla cream coffee', '\'The best iced coffee\' according to some', 300, .2)
-        strawberry_smoothie = Item('Strawberry smoothie', 'Blended, fresh fruit', 95, .3)
-        einsteins.add_item(everything_bagel)
-        einsteins.add_item(asiago_bagel)
-        einsteins.add_item(choc_muffin)
-        einsteins.add_item(vanilla_coffee)
-        einsteins.add_item(strawberry_smoothie)
-
-        # multipurpose room items
-        pancake_plate = Item('Pancake plate', 'Five pancakes smothered in Canadian maple syrup and butter!', 200, 1)
-        used_napkin = Item('Used napkin', 'Definitely has a few diseases...', 0, .1)
-        chair = Item('Chair', 'A very chair-ey chair', 0, 12)
-        multi_room.add_item(pancake_plate)
-        multi_room.add_item(used_napkin)
-        multi_room.add_item(chair)
-
-        # mackinac 2A items
-        loose_notes = Item('Loose notes', 'Whoever wrote these definitely doesn\'t know what was going on', 0, 0.2)
-        mackinac2a.add_item(loose_notes)
-
-        # posada office items
-        key = Item('Earrings', 'Shiny and Gold', 0, 0.5)
-        treat_bag = Item('Bag of treats', 'Cavities, shmavities', 400, 8)
-        posada_office.add_item(key)
-        posada_office.add_item(treat_bag)
-
-        # mackinac 2B items
-        drank_starbucks = Item('Starbucks', 'Half drank and cold, just how I like it', 150, 0.5)
-        mackinac2b.add_item(drank_starbucks)
-
-        # NPCs need name and description
-        # then add their list of messages
-        # fudge shop NPCs
-        f_cashier = NPC('Cashier', 'Old lady behind the counter, she\'s almost as sweet as the fudge!')
-        f_cashier.add_message('Help yourself to a sample, hun!')
-        f_cashier.add_message('I offer a student discount!')
-        f_cashier.add_message('Please buy some fudge.')
-        f_cashier.add_message('Looking for a job?')
-        f_cashier.add_message('Best fudge in Michigan!')
-        fudge_shop.add_npc(f_cashier)
-
-        # museum NPCs
-        assistant = NPC('Tour Guide', 'Failed history major')
-        assistant.add_message('Can I help you?')
-        assistant.add_message('Check out these artifacts!')
-        assistant.add_message('Good luck on your travels.')
-        museum.add_npc(assistant)
-
-        ferry_man = NPC('Ferry Man', 'Captains a magic boat')
-        ferry_man.add_message('All aboard!')
-        ferry_man.add_message('My life, my love, and my lady is the sea.')
-        ferry_man.add_message('One-way ticket to the bermuda triangle of the Great Lakes!')
-        museum.add_npc(ferry_man)
-
-        # einsteins NPCs
-        e_cashier = NPC('Cashier', 'Friendly college student being the bagel counter')
-        e_cashier.add_message('What can I get for you?')
-        e_cashier.add_message('Our coffee is pretty good.')
-        e_cashier.add_message('Our bagels are the best around!')
-        einsteins.add_npc(e_cashier)
-
-        # multipurpose room NPCs
-        rando_guy = NPC('Harry Styles', 'Looks like he\'s trying to take a nap.')
-        rando_guy.add_message('Shhhhhhhhhhhhh!!!')
-        rando_guy.add_message('Leave me alone.')
-        rando_guy.add_message('SHHHHHHHHHH!!!!!!!')
-        rando_guy.add_message('GO AWAY!')
-        multi_room.add_npc(rando_guy)
-
-        # mackinac lower level NPCs
-        ghost = NPC('Ghost', 'The phantom of the Mackinac basement!')
-        ghost.add_message('I know where Prof. Posada is.')
-        ghost.add_message('In your M/W/F classroom.')
-        ghost.add_message('Go upstairs twice and right towards to B wing')
-        ghost.add_message('BoooooooOOOooOOOOOoo')
-        mackinac_lower.add_npc(ghost)
-
-        # mackinac 2A NPCs
-        rando_prof = NPC('Professor Dumbledore', 'Wise-looking old man with a pointy hat')
-        rando_prof.add_message('Education is important')
-        rando_prof.add_message('Get to class.')
-        rando_prof.add_message('Why are you still standing here?')
-        rando_prof.add_message('Do you believe in magic?')
-        rando_prof.add_message('Nevermind, muggle.')
-        mackinac2a.add_npc(rando_prof)
-
-        # posada office NPCs
-        mini_posada = NPC('Prof. Posada bobble head', 'An odd site, but she\'s friendly')
-        mini_posada.add_message('Computer Science is the best!')
-        mini_posada.add_message('Take some treats with you!')
-        mini_posada.add_message('Hurry along now!')
-        posada_office.add_npc(mini_posada)
-
-        # mackinac 2B NPCs
-        rando_student = NPC('Stacey', 'Dark-haired girl doing homework on the bench')
-        rando_student.add_message('The starbucks isn\'t mine.')
-        rando_student.add_message('I saw something weird downstairs...')
-        rando_student.add_message('Aren\'t you late?')
-        mackinac2b.add_npc(rando_student)
-
-        # posada classroom NPCs
-        real_posada = NPC('Professor Posada', 'Your professor, teaching your favorite class')
-        real_posada.add_message('You\'re late!')
-        real_posada.add_message('I hope you brought snacks for the class!')
-        posada_room.add_npc(real_posada)
-
-        # making lists of the island locations
-        self.island_locations.append(fudge_shop)
-
-        # making lists of the locations
-        self.gv_locations.append(gv_road)
-        self.gv_locations.append(einsteins)
-        self.gv_locations.append(multi_room)
-        self.gv_locations.append(mackinac)
-        self.gv_locations.append(mackinac_lower)
-        self.gv_locations.append(mackinac2)
-        self.gv_locations.append(mackinac2a)
-        self.gv_locations.append(posada_office)
-        self.gv_locations.append(mackinac2b)
-
-    def show_help(args: None):
+        The Locations, their directions, items and NPCs are read from a world file
+        (see load_world for the format). Each file is only read once, then the
+        frozen World is shared by every Game (see shared_world).
+        :param path: str - path to the world file, the GV Zork world by default
+        """
+        self.set_world(shared_world(path))
+
+    def set_world(self, world: World) -> None:
+        """
+        This method chooses the world the game is played in.
+        A list of island locations and a list of GV locations are taken
+        from the world's 'island' and 'gv' regions.
+        :param world: World - the world to play in
+        """
+        self.world = world
+        self.island_locations = world.get_region('island')
+        self.gv_locations = world.get_region('gv')
+        self.current_location = self.island_locations[0]
+
+    def reset(self, seed: int = None) -> None:
+        """
+        This method starts the game again in the same world. The settings are kept (the
+        calorie goal, the weight limit, the time limit, the clocks and the log), and only what the last
+        game changed is cleared, which is much cheaper than making a new Game.
+        :param seed: int - seed for the new game's random generator, a random one if not given.
+            A generator given to the constructor is replaced by one made from this seed.
+        """
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self._rng = None
+        self.items = Inventory()
+        self.visited.clear()
+        self.world_state.clear()
+        self.current_location = self.first_location()
+        self.elf_needed_calories = self.elf_calorie_goal
+        self.game_over = False
+        self.count_num_fails = 0
+        self.turn_events = []
+        self.turn_time = None
+        self.deadline = None
+
+    def session_footprint(self) -> int:
+        """
+        This method measures the memory used by this game's own state, leaving out
+        the shared World. Items and NPCs are shared too, so only the containers are counted.
+        :return: int - size in bytes
+        """
+        size = sys.getsizeof(self) + _size_of(self.__dict__) + _size_of(self.commands)
+        size += _size_of(self.items.items) + _size_of(self.items.name_index)
+        size += _size_of(self.visited) + sys.getsizeof(self.world_state)
+        size += _size_of(self.world_state.message_numbers) + _size_of(self.world_state.room_items)
+        size += _size_of(self.world_state.room_views) + _size_of(self.world_state.look_views)
+        for inventory in self.world_state.room_items.values():
+            size += _size_of(inventory.items) + _size_of(inventory.name_index)
+        return size
+
+    def show_help(self):
         """
         This method tells the player all the actions they can take.
-        Ihe method also displays the current time.
-        """
-        # show help function
-        now = datetime.now()
-        current_time = now.strftime("%H:%M.%S")
-        print('The current time is ' + current_time)
-        print('Valid commands are:'
-              '\n\'help\' or \'?\': prints available commands'
-              '\n\'talk\': talk to NPCs in your current location'
-              '\n\'meet\': introduce yourself to an NPC'
-              '\n\'go\': type this and your target location to travel (\'go east\')'
-              '\n\'items\': show items in inventory'
-              '\n\'stats\': show current weight, calories, and calories needed' 
-              '\n\'look\': examine surroundings'
-              '\n\'take\': pick up item'
-              '\n\'give\': give away an item'
-              '\n\'ransom\': mystery tool'
-              '\n\'quit\': end game')
+        Ihe method also displays the current time, as read from the game's clock when the command started.
+        """
+        self.emit(events.HELP, time=self.turn_time)
 
     def talk(self, name: str):
         """
@@ -614,17 +1449,15 @@ class Game:
         by accessing one of the NPCs messages.
         :param name: str - NPC the player is looking to talk to
         """
-        npcs = self.current_location.get_npcs()
-        length = len(self.current_location.get_npcs())
-        count = 0
-        for ppl in npcs:
-            if ppl.get_name().lower() == name:
-                print(f'You talked to {name}')
-                print(f'{name} said: \'{ppl.get_message()}\'')
-            else:
-                count += 1
-        if count == length:
-            print(f'There is no one called {name} here.')
+        matches = self.current_location.match_npcs(name)
+        if not matches:
+            self.emit(events.NO_SUCH_NPC, name=name)
+        elif len(matches) > 1:
+            self.emit(events.AMBIGUOUS_NAME, name=name, names=[same_name[0].get_name() for same_name in matches])
+        else:
+            for ppl in matches[0]:
+                self.emit(events.TALKED, name=ppl.get_name().lower(), message=self.world_state.next_message(ppl))
+                self.rules.fire(self, Trigger(rules.TALK, self.current_location, npc=ppl))
 
     def meet(self, name: str):
         """
@@ -632,92 +1465,71 @@ class Game:
         by accessing the NPCs description.
         :param name: str - NPC the player is looking to learn about
         """
-        npcs = self.current_location.get_npcs()
-        length = len(self.current_location.get_npcs())
-        count = 0
-        for ppl in npcs:
-            if ppl.get_name().lower() == name:
-                print(f'{name}: {ppl.get_description()}')
-            else:
-                count += 1
-        if count == length:
-            print(f'There is no one called {name} here.')
+        matches = self.current_location.match_npcs(name)
+        if not matches:
+            self.emit(events.NO_SUCH_NPC, name=name)
+        elif len(matches) > 1:
+            self.emit(events.AMBIGUOUS_NAME, name=name, names=[same_name[0].get_name() for same_name in matches])
+        else:
+            for ppl in matches[0]:
+                self.emit(events.MET, name=ppl.get_name().lower(), description=ppl.get_description())
 
     def go(self, direction: str):
         """
         This method allows the player to move to a new location.
         :param direction: str - key related to a location where the player will go
         """
-        self.current_location.set_visited()
-        if direction == 'enter' or direction == 'exit':
-            string = direction + 'ed'
-        elif direction == 'ferry':
-            string = 'boarded the ' + direction
-        else:
-            string = 'went ' + direction
-        if self.current_weight > 30:
-            print('Too much weight! Drop something to continue.')
+        self.visited.add(self.current_location)
+        if self.current_weight > self.max_weight:
+            self.emit(events.TOO_HEAVY, weight=self.current_weight)
         else:
             d = direction[0].upper() + direction[1:]
             if d in self.current_location.get_locations().keys():
                 self.current_location = self.current_location.get_locations()[d]
-                print(f'You {string}')
+                self.emit(events.MOVED, direction=direction, location=self.current_location)
                 if direction == 'ferry':
-                    print('          |\\')
-                    print('          | \\')
-                    print('          |  \\')
-                    print('          |___\\')
-                    print('          |')
-                    print('          |')
-                    print('__________|__________')
-                    print('\\   o   o   o   o   /')
-                    print(' \\                 /')
-                    print('  \\               /')
-                    print('   \\_____________/')
-                    print('The ferry transported you into the bermuda triangle of the Great Lakes! '
-                          '\nYou fell into a swirling whirlpool and were magically transported to...'
-                          '\nGVSU! Welcome back to your university!')
+                    self.emit(events.FERRY_RIDE)
+                self.rules.fire(self, Trigger(rules.ENTER, self.current_location))
             else:
-                print('That is not a valid direction')
+                self.emit(events.INVALID_DIRECTION, direction=direction)
+
+    def goto(self, place: str):
+        """
+        This method takes the player the shortest way to the nearest place with a name,
+        one step at a time as if they had typed each 'go'. It stops early if a step
+        cannot be taken, such as when the player is carrying too much.
+        :param place: str - name of the place to go to
+        """
+        try:
+            directions = self.world.get_routes().route_to_name(self.current_location, place)
+        except KeyError:
+            self.emit(events.UNKNOWN_PLACE, name=place)
+            return
+        if directions is None:
+            self.emit(events.NO_ROUTE, name=place)
+        elif not directions:
+            self.emit(events.ALREADY_THERE, name=self.current_location.get_name())
+        for direction in directions or ():
+            before = self.current_location
+            self.go(direction.lower())
+            if self.current_location is before:
+                break
 
     def show_items(self, args: str = None):
         """
         This method allows the player to view the items that are currently in
         their inventory
         """
-        if len(self.items) == 0:
-            print('You currently have no items.')
-        print('Your current inventory:')
-        for i in self.items:
-            print(i)
+        self.emit(events.INVENTORY, items=self.items.get_items())
 
     def look(self, args: str = None):
         """
         This method allows the player to look at what is in their current_location
         such as NPCs, items, and directions to neighboring locations
         """
-        print(f'Your current location is {self.current_location}')
-        if not self.current_location.get_items():
-            print('There are no items')
-        else:
-            print('This location contains:')
-            for item in self.current_location.get_items():
-                print(item)
-
-        if not self.current_location.get_npcs():
-            print('You are alone')
-        else:
-            print('You are in the room with: ')
-            for person in self.current_location.get_npcs():
-                print(person)
-
-        print('You can go:')
-        for key in self.current_location.get_locations().keys():
-            torf = self.current_location.get_locations().get(key).get_visited()
-            if torf:
-                print(f'{key} to {self.current_location.get_locations().get(key).get_name()}')
-            else:
-                print(key)
+        view = self.world_state.look_view(self.current_location, self.visited)
+        self.emit(events.LOOKED, location=self.current_location, items=view.room.items, npcs=view.room.npcs,
+                  exits=view.exits, view=view)
 
     def take(self, target: str):
         """
@@ -725,21 +1537,20 @@ class Game:
         and put them in their inventory
         :param target: str - item the player wants to pick up
         """
-        location_items = self.current_location.get_items()
-        # items is a pointer to the list of items at current location
-        item_found = False
-        for item in location_items:
-            # item is local variable that computer created in a loop
-            # it will point to the items in the collection
-
-            if item.get_name().lower() == target:
-                item_found = True
-                self.current_location.remove_item(item)
-                self.items.append(item)
-                self.current_weight += item.get_weight()
-                print(f'You took the {target}')
-        if not item_found:
-            print(f'The item {target} does not exist in your current location')
+        matches = self.world_state.get_inventory(self.current_location).match_items(target)
+        if not matches:
+            self.emit(events.NO_SUCH_ITEM, name=target)
+        elif len(matches) > 1:
+            self.emit(events.AMBIGUOUS_NAME, name=target, names=[item.get_name() for item in matches])
+        else:
+            item = matches[0]
+            if not self.world_state.take_item(self.current_location, item):
+                # in a shared world, another player took it first
+                self.emit(events.NO_SUCH_ITEM, name=target)
+                return
+            self.items.add_item(item)
+            self.emit(events.TOOK_ITEM, name=item.get_name().lower(), item=item)
+            self.rules.fire(self, Trigger(rules.TAKE, self.current_location, item))
 
     def give(self, item_name: str):
         """
@@ -747,45 +1558,15 @@ class Game:
         them in their current_location
         :param item_name: str - item the player wants to drop
         """
-        item_found = False
-        for item in self.items:
-            if item.get_name().lower() == item_name:
-                self.items.remove(item)
-                self.current_location.add_item(item)
-                self.current_weight -= item.get_weight()
-                print(f'The {item_name} was removed from your inventory and given to '
-                      f'{self.current_location.get_name()}')
-                item_found = True
-                if self.current_location.get_name() == 'Posada\'s Classroom':
-                    if len(self.current_location.get_items()) != 0:
-                        total_calories = 0
-                        for stuff in self.current_location.get_items():
-                            if stuff.get_calories() == 0:
-                                print('You have given Prof. Posada a non-food item.'
-                                      '\nYou have been transported to a random location,'
-                                      'you better collect some more food and get back to class!')
-                                self.current_location = self.random_gv_location()
-                                self.count_num_fails += 1
-                                if self.count_num_fails == 3:
-                                    print('You gave the professor too many inedible items! Loser!')
-                                    self.game_over = True
-                            elif stuff.get_calories() < 0:
-                                print('You have given Prof. Posada inedible food! She has rejected '
-                                      'the food and you have been transported to a random location.'
-                                      '\nYou better collect some more food and get back to class!')
-                                self.current_location = self.random_gv_location()
-                                self.count_num_fails += 1
-                                if self.count_num_fails == 3:
-                                    print('You gave the professor too many inedible items! Loser!')
-                                    self.game_over = True
-                            else:
-                                total_calories += stuff.get_calories()
-                                self.elf_needed_calories -= total_calories
-                                if self.elf_needed_calories <= 0:
-                                    self.elf_needed_calories = 0
-                                    self.game_over = True
-        if not item_found:
-            print('you can\'t give something you don\'t have')
+        item = self.items.find_item(item_name)
+        if item is not None:
+            self.items.remove_item(item)
+            self.world_state.put_item(self.current_location, item)
+            self.emit(events.GAVE_ITEM, name=item_name, item=item, location=self.current_location)
+            # what happens next, such as Posada eating it, is up to the rules (see build_rules)
+            self.rules.fire(self, Trigger(rules.GIVE, self.current_location, item))
+        else:
+            self.emit(events.NOT_CARRIED, name=item_name)
 
     # TWO OF OUR OWN COMMANDS
     def weight_and_cals(self):
@@ -795,50 +1576,35 @@ class Game:
         The method also lets the player know if they need to continue collecting
         food items, or if they have enough calories to get excused from their tardiness.
         """
-        compiled_cals = 0
-        for thing in self.items:
-            compiled_cals += thing.get_calories()
-        print(f'Your inventory currently weighs {self.current_weight} lbs and contains {compiled_cals} calories.')
-        needed = self.elf_needed_calories - compiled_cals
-        if needed > 0:
-            print(f'You still need to collect {needed} more calories')
-        else:
-            print('You have enough calories! Now get to class!')
+        self.emit(events.STATS, weight=self.current_weight, calories=self.items.get_calories(),
+                  calories_needed=self.elf_needed_calories)
+
+    def hint(self):
+        """
+        This method suggests the next command of a short plan to win, worked out by the
+        food-run planner (see planner.plan_food_run) from where the player is now.
+        """
+        command, plan = planner.hint(self)
+        self.emit(events.HINT, command=command, moves=plan.moves, trips=plan.trips, possible=plan.possible)
 
     def ransom(self, item_name: str):
         """
         :param item_name: str - item the player is trying to ransom
         Takes parameter representing the offered item in the users inventory.
-        Checks whether item is a newborn baby:
-            if so: checks if newborn baby is in current inventory and if NPCs are around to accept ransom (if no NPCs
-            prints a message that there is no one to ransom to). Then the NPCs insult the player and exchange the newborn
-            for magic fudge that has enough calories to win the game on its own without having any weight. The baby is not
-            added to the current location's inventory because there should not be a way to reverse the trade once a
-            ransom is made
-            if not: tells the player that the item is not worthy of ransom
-            if user inventory is empty it tells the user they have nothing to ransom
+        Tells the player if there is no one around to ransom to, then runs the ransom rules
+        for the item (see ransom_baby): only the newborn baby can be ransomed, so for anything
+        else it tells the player that the item is not worthy of ransom.
+        If user inventory is empty it tells the user they have nothing to ransom.
         """
         if len(self.items) != 0:
             if len(self.current_location.get_npcs()) == 0:
-                print('There is no one to accept your ransom')
-            for things in self.items:
-                if item_name != 'newborn baby':
-                    print('You cannot ransom this item')
-                elif things.get_name() == 'Newborn baby' and len(self.current_location.get_npcs()) != 0:
-                    ppl = self.current_location.get_npcs()
-                    print(f'{ppl[0].get_name()} said: WHAT KIND OF MONSTER KIDNAPS AND RANSOMS A BABY?!?!')
-                    print(f'As a result of this ruthless transaction, {ppl[0].get_name()} has given you a magic '
-                          f'\nand weightless fudge that contains the amount of calories equal to that of the newborn. '
-                          f'\nHopefully your are proud enough of this ransom to ignore the guilt swelling inside of '
-                          f'\nyou for allowing this baby to be abandoned a second time.')
-                    self.items.remove(things)
-                    self.current_weight -= things.get_weight()
-                    magic = Item('Magic Ransom Fudge',
-                                 'Earned the baby\'s calories in a weightless fudge as a result of a ransom', 12823, 0)
-                    self.items.append(magic)
+                self.emit(events.NO_ONE_TO_RANSOM)
+            trigger = Trigger(rules.RANSOM, self.current_location, self.items.find_item(item_name), name=item_name)
+            if not self.rules.fire(self, trigger):
+                self.emit(events.CANNOT_RANSOM, name=item_name)
 
         else:
-            print('You have no items to ransom.')
+            self.emit(events.NOTHING_TO_RANSOM)
 
     def setup_commands(self) -> dict[str, callable]:
         """
@@ -847,65 +1613,127 @@ class Game:
         :return: dict[str, callable] - dictionary of commands and their function that will be executed
         """
         commands = {'help': self.show_help, '?': self.show_help, 'talk': self.talk, 'meet': self.meet,
-                    'go': self.go, 'items': self.show_items, 'stats': self.weight_and_cals, 'look': self.look,
-                    'take': self.take, 'give': self.give, 'ransom': self.ransom, 'quit': self.quit}
+                    'go': self.go, 'goto': self.goto, 'items': self.show_items, 'stats': self.weight_and_cals,
+                    'look': self.look, 'take': self.take, 'give': self.give, 'ransom': self.ransom, 'quit': self.quit,
+                    'hint': self.hint}
         return commands
 
+    def emit(self, kind: str, **fields) -> None:
+        """
+        This method records something that happened during the current command.
+        :param kind: str - what happened, one of the kinds in the events module
+        :param fields: the details of the event
+        """
+        self.turn_events.append(Event(kind, **fields))
+
+    def start(self) -> Result:
+        """
+        This method begins the game, describing it and showing all the available commands.
+        :return: Result - the intro and help events
+        """
+        self.turn_events = [Event(events.INTRO)]
+        self.turn_time = self.clock()
+        if self.time_limit is not None:
+            self.deadline = self.monotonic() + self.time_limit
+        if self.log is not None:
+            self.log.start(self)
+        self.show_help()
+        return Result('', self.turn_events, True, self.game_over)
+
+    def time_left(self) -> float | None:
+        """
+        This method works out how long the player has left.
+        :return: float - seconds until the time runs out (0 if it has), None if there is no deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.monotonic())
+
+    def time_up(self) -> Result:
+        """
+        This method ends the game because the time has run out. It is called by execute
+        when a command comes in too late, and can be called by a timer at the deadline.
+        :return: Result - the time_up and game_over events, or nothing if the game was already over
+        """
+        self.turn_events = []
+        if not self.game_over:
+            self.turn_time = self.clock()
+            if self.log is not None:
+                self.log.time_up(self.turn_time)
+            self.emit(events.TIME_UP)
+            self.game_over = True
+            self.emit(events.GAME_OVER, won=False)
+        return Result('', self.turn_events, True, self.game_over)
+
+    def execute(self, command_line: str) -> Result:
+        """
+        This method carries out one line typed by the player without printing anything.
+        The line is parsed by the grammar first; it can hold several commands separated
+        by ';', which are run in order until one of them ends the game. If any part of
+        the line cannot be parsed, none of it is run. If the deadline has passed, the game
+        ends instead (see time_up). The clock is read once for each
+        accepted line, and the line is recorded to the log if there is one. If the game
+        has metrics, each command is run through them to be counted and timed.
+        :param command_line: str - the line the player typed
+        :return: Result - everything that happened, ending with a game_over event
+            if the command ended the game
+        """
+        self.turn_events = []
+        was_over = self.game_over
+        try:
+            parsed = self.grammar.parse(command_line)
+        except ParseError as error:
+            if self.metrics is not None:
+                self.metrics.parse_error()
+            self.emit(events.PARSE_ERROR, message=str(error), text=error.text)
+            return Result(command_line, self.turn_events, False, self.game_over)
+
+        if self.deadline is not None and not was_over and self.monotonic() >= self.deadline:
+            return self.time_up()
+        self.turn_time = self.clock()
+        if self.log is not None:
+            self.log.record(command_line, self.turn_time)
+        metrics = self.metrics
+        for command in parsed:
+            if self.game_over:
+                break
+            try:
+                if metrics is None:
+                    self.commands[command.name](*command.get_args())
+                else:
+                    metrics.call(command.name, self.commands[command.name], command.get_args())
+            except Exception as error:
+                self.emit(events.COMMAND_FAILED, command=command.text, error=error)
+        if self.game_over and not was_over:
+            self.emit(events.GAME_OVER, won=self.elf_needed_calories <= 0)
+        return Result(command_line, self.turn_events, True, self.game_over)
+
     def play(self) -> None:
         """
         This function is the core game loop. It prints a message explaining the game, then shows
         all the available commands.
         While the game is in progress it will loop, prompting the user for a command.
-        The function takes the user input and splits it to execute the command.
-        When the loop ends, it checks if the elf_needed_calories was less than or equal to 0...
+        Each command is carried out by execute, and what happened is rendered by a TextRenderer
+        and printed once per turn.
+        When the game ends, it checks if the elf_needed_calories was less than or equal to 0...
         if it was then a message indicated the player was successful, otherwise
         a failure message appears.
-        There is also a 5-minute timer that counts down, once the timer has run out, the game ends
-        and the player failed.
-        """
-        # starts by printing message to describe the game
-        print('|\\      /|      /\\      |   /       |\\      /|      /\\     |------\\   |')
-        print('| \\    / |     /  \\     |  /        | \\    / |     /  \\    |       |  |')
-        print('|  \\  /  |    /____\\    | /         |  \\  /  |    /____\\   |       |  |')
-        print('|   \\/   |   /      \\   | \\         |   \\/   |   /      \\  |       |  |')
-        print('|        |  /        \\  |  \\        |        |  /        \\ |______/   o')
-        print('Welcome to MACKINAC MADNESS! You find yourself in a fudge shop on'
-              '\nMackinac Island and you\'re late for your computer science class! You'
-              '\nmust collect enough food to feed your classmates (2000 total calories)'
-              '\nin order to earn forgiveness from your professor for being late.'
-              '\nYou can only carry 20 lbs at once. I\'d try to get a boat out of here'
-              '\nASAP if I were you...')
-        self.show_help()
-        print()
-
+        There is also a 5-minute timer that counts down (see time_limit), once the timer has run out,
+        the game ends and the player failed.
+        """
+        renderer = TextRenderer()
+        out = OutputBuffer(StdoutSink())
+        renderer.render_to(self.start(), out)
+        out.flush()
         while not self.game_over:
-            user_response = input('What is your command? ').lower()
-            tokens = user_response.split()
-            command = tokens[0]
-            del (tokens[0])
-            target = ' '.join(tokens)
-            try:
-                if target == '':
-                    self.commands[command]()
-                else:
-                    self.commands[command](target)
-            except:
-                print('That is not a valid command')
-            print()
-        print('GAME OVER')
-        if self.elf_needed_calories <= 0:
-            print('You Won!!!')
-            print('Despite being late for you\'re computer science class, you appeased your teacher by'
-                  '\nbringing her enough food to feed the class. Congratulations!!')
-        else:
-            print('You have failed!')
-            print('You never showed up for class so you were expelled.'
-                  '\nBetter luck next time!\n')
+            renderer.render_to(self.execute(input('What is your command? ')), out)
+            out.flush()
 
     def quit(self, args: str = None):
         """
         This method automatically ends the game
         """
+        self.emit(events.QUIT)
         self.game_over = True
 
 
@@ -0,0 +1,218 @@
+"""
+Command metrics - counts, timings and errors of the commands games run.
+
+Set a CommandMetrics as a Game's metrics (one can be shared by every game in a
+process) and Game.execute runs each command through it. It keeps, for each command:
+how many times it ran, how many times it raised an exception and of what type, a
+histogram of how long it took and, if asked for, how many memory blocks it left
+allocated. A Game without metrics only pays for checking that it has none.
+
+The totals can be written as a Prometheus text file (for the node exporter's
+textfile collector) or as a JSON snapshot, together with those of any other
+sources added to it, such as a server's sessions.SessionStore.
+"""
+import json
+import os
+import sys
+import time
+from bisect import bisect_left
+
+# upper bounds of the latency histogram's buckets, in seconds
+LATENCY_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1.0)
+PREFIX = 'gvzork'
+
+
+class CommandStats:
+    """
+    CommandStats class holds the totals of one command.
+
+    Attributes:
+        calls: int - times the command ran
+        errors: dict[str, int] - times it raised an exception, by the exception's type
+        seconds: float - time spent in it altogether
+        buckets: list[int] - calls that took no longer than each of LATENCY_BUCKETS, then
+            the calls that took longer than all of them
+        allocated_blocks: int - memory blocks left allocated after it ran, added up over
+            every call (can go down as well as up); only counted when asked for
+    """
+    __slots__ = ('calls', 'errors', 'seconds', 'buckets', 'allocated_blocks')
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.calls = 0
+        self.errors = {}
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.allocated_blocks = 0
+
+    def as_dict(self) -> dict:
+        """
+        method to convert the totals into a dictionary, such as for JSON
+        :return: dict - the totals, with the buckets by their upper bound
+        """
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        return {'calls': self.calls, 'errors': dict(self.errors), 'seconds': self.seconds,
+                'buckets': dict(zip(bounds, self.buckets)), 'allocated_blocks': self.allocated_blocks}
+
+
+class CommandMetrics:
+    """
+    CommandMetrics class measures the commands run through it.
+
+    Attributes:
+        commands: dict[str, CommandStats] - the totals of each command that has run
+        parse_errors: int - lines that could not be parsed, so ran nothing
+        track_allocations: bool - whether to count allocated memory blocks, which costs
+            a little more on every command
+        started: float - when the metrics began, as a Unix time
+        sources: dict[str, object] - other totals written with these, by name; each has a snapshot
+            method giving a dict and a to_prometheus method taking the prefix of the metrics' names
+    """
+
+    def __init__(self, track_allocations: bool = False):
+        """
+        Constructor
+        :param track_allocations: bool - whether to count allocated memory blocks
+        """
+        self.commands = {}
+        self.parse_errors = 0
+        self.track_allocations = track_allocations
+        self.started = time.time()
+        self.sources = {}
+
+    def call(self, name: str, function, args: tuple):
+        """
+        method to run a command and add it to the totals
+        :param name: str - name of the command
+        :param function: callable - the command's function
+        :param args: tuple - what to call the function with
+            Raises: whatever the function raises, after counting it
+        :return: what the function returns
+        """
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        blocks = sys.getallocatedblocks() if self.track_allocations else 0
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        except Exception as error:
+            kind = type(error).__name__
+            stats.errors[kind] = stats.errors.get(kind, 0) + 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.calls += 1
+            stats.seconds += elapsed
+            stats.buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            if self.track_allocations:
+                stats.allocated_blocks += sys.getallocatedblocks() - blocks
+
+    def merge(self, other: 'CommandMetrics') -> None:
+        """
+        method to add the totals of another CommandMetrics to these, such as those of
+        another process
+        :param other: CommandMetrics - the totals to add
+        """
+        self.parse_errors += other.parse_errors
+        self.started = min(self.started, other.started)
+        for name, theirs in other.commands.items():
+            stats = self.commands.get(name)
+            if stats is None:
+                stats = self.commands[name] = CommandStats()
+            stats.calls += theirs.calls
+            stats.seconds += theirs.seconds
+            stats.allocated_blocks += theirs.allocated_blocks
+            for kind, count in theirs.errors.items():
+                stats.errors[kind] = stats.errors.get(kind, 0) + count
+            for position, count in enumerate(theirs.buckets):
+                stats.buckets[position] += count
+
+    def add_source(self, name: str, source) -> None:
+        """
+        method to write another object's totals with these
+        :param name: str - the key of its totals in the JSON snapshot
+        :param source: the object, with snapshot and to_prometheus methods
+        """
+        self.sources[name] = source
+
+    def parse_error(self) -> None:
+        """
+        method to count a line that could not be parsed
+        """
+        self.parse_errors += 1
+
+    def snapshot(self) -> dict:
+        """
+        method to copy the totals into a dictionary, such as for JSON
+        :return: dict - every total
+        """
+        snapshot = {'started': self.started, 'time': time.time(), 'parse_errors': self.parse_errors,
+                    'commands': {name: stats.as_dict() for name, stats in sorted(self.commands.items())}}
+        for name, source in self.sources.items():
+            snapshot[name] = source.snapshot()
+        return snapshot
+
+    def to_json(self) -> str:
+        """
+        method to write the totals as JSON
+        :return: str - the snapshot as JSON
+        """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        method to write the totals in the Prometheus text format
+        :return: str - the metrics, one per line
+        """
+        commands = sorted(self.commands.items())
+        lines = [f'# HELP {PREFIX}_command_calls_total Commands run.',
+                 f'# TYPE {PREFIX}_command_calls_total counter']
+        lines.extend(f'{PREFIX}_command_calls_total{{command="{name}"}} {stats.calls}' for name, stats in commands)
+
+        lines.append(f'# HELP {PREFIX}_command_errors_total Commands that raised an exception, by its type.')
+        lines.append(f'# TYPE {PREFIX}_command_errors_total counter')
+        for name, stats in commands:
+            for kind, count in sorted(stats.errors.items()):
+                lines.append(f'{PREFIX}_command_errors_total{{command="{name}",error="{kind}"}} {count}')
+
+        lines.append(f'# HELP {PREFIX}_command_duration_seconds Time taken by each command.')
+        lines.append(f'# TYPE {PREFIX}_command_duration_seconds histogram')
+        for name, stats in commands:
+            total = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                total += count
+                lines.append(f'{PREFIX}_command_duration_seconds_bucket{{command="{name}",le="{bound}"}} {total}')
+            lines.append(f'{PREFIX}_command_duration_seconds_bucket{{command="{name}",le="+Inf"}} {stats.calls}')
+            lines.append(f'{PREFIX}_command_duration_seconds_sum{{command="{name}"}} {stats.seconds}')
+            lines.append(f'{PREFIX}_command_duration_seconds_count{{command="{name}"}} {stats.calls}')
+
+        if self.track_allocations:
+            lines.append(f'# HELP {PREFIX}_command_allocated_blocks Memory blocks left allocated by each command.')
+            lines.append(f'# TYPE {PREFIX}_command_allocated_blocks gauge')
+            lines.extend(f'{PREFIX}_command_allocated_blocks{{command="{name}"}} {stats.allocated_blocks}'
+                         for name, stats in commands)
+
+        lines.append(f'# HELP {PREFIX}_parse_errors_total Lines that could not be parsed.')
+        lines.append(f'# TYPE {PREFIX}_parse_errors_total counter')
+        lines.append(f'{PREFIX}_parse_errors_total {self.parse_errors}')
+        text = '\n'.join(lines) + '\n'
+        for source in self.sources.values():
+            text += source.to_prometheus(PREFIX)
+        return text
+
+    def write(self, path: str) -> None:
+        """
+        method to write the totals to a file all at once, so a reader never sees half of
+        them; the format is JSON if the path ends in .json and Prometheus text otherwise
+        :param path: str - the file to write
+        """
+        text = self.to_json() if path.endswith('.json') else self.to_prometheus()
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as file:
+            file.write(text)
+        os.replace(temporary, path)
@@ -0,0 +1,450 @@
+"""
+Multiplayer - many players acting at once in one shared world.
+
+Each Game normally has a WorldState of its own, so players never meet. A
+SharedWorld gives every player who joins a SharedWorldState over one shared
+SharedRooms: the items lying in each Location and what each NPC says next are the
+same for everyone, while each player keeps their own position, inventory,
+visited Locations and game (calories, fails, deadline). Players can be run from
+as many threads as needed, one command per player at a time.
+
+Changes to a room are made under that room's own lock, so taking and giving in
+different rooms never wait for each other. A change never edits a room's items in
+place: it copies them, changes the copy and puts it in place of the old one
+(copy-on-write), so looking at a room, matching an item's name and drawing a room
+never take a lock and never see half a change. Taking an item checks, under the
+room's lock, that it is still there, so when two players take the same Item at
+once exactly one of them gets it and the other is told it is not there.
+
+Saving a game (savegame) and the session store keep to single-player games: the
+rooms of a shared world belong to no single player.
+
+The benchmark plays thousands of players at once over a pool of threads, each
+choosing commands like simulate's RandomPolicy (ransom included), and reports
+commands per second, how often a room's lock had to be waited for and how many
+takes lost a race, optionally with one lock for the whole world to compare.
+Players who roam the whole world seldom meet, so with --crowd the players are
+packed into a few rooms and stay there, taking and giving the same items. With as
+many rooms as threads each thread has a room of its own, whose lock no other thread
+wants, while one lock for the world is still waited for; with one room, every
+thread wants the same lock either way.
+
+Usage: python multiplayer.py [--players N] [--threads N] [--commands N] [--world FILE]
+                             [--seed SEED] [--crowd ROOMS] [--global-lock] [--json]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from random import Random
+
+import events
+from main import (DEFAULT_WORLD_FILE, POSADAS_CLASSROOM, Game, Inventory, Item, Location, NPC, RoomView, World,
+                  WorldState, shared_world)
+from simulate import RandomPolicy
+
+
+class RoomLock:
+    """
+    RoomLock class is the lock of one room (or of one NPC), counting how often it was
+    waited for. The counts only change while the lock is held, so they need no lock of their own.
+
+    Attributes:
+        lock: threading.Lock - the lock
+        acquired: int - times it was taken
+        contended: int - times it was held by another thread when asked for, so had to be waited for
+        lost_races: int - takes under it that found another player had taken the item first
+    """
+    __slots__ = ('lock', 'acquired', 'contended', 'lost_races')
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.lock = threading.Lock()
+        self.acquired = 0
+        self.contended = 0
+        self.lost_races = 0
+
+    def __enter__(self) -> 'RoomLock':
+        """
+        method to take the lock, waiting for it if another thread holds it
+        :return: RoomLock - this lock
+        """
+        waited = not self.lock.acquire(blocking=False)
+        if waited:
+            self.lock.acquire()
+            self.contended += 1
+        self.acquired += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """
+        method to give the lock back
+        """
+        self.lock.release()
+
+
+class SharedRooms:
+    """
+    SharedRooms class holds the parts of a World that every player of a SharedWorld shares.
+
+    Attributes:
+        items: dict[Location, Inventory] - the items of each Location that has changed; an
+            Inventory in it is never changed, only replaced
+        views: dict[Location, tuple[Inventory, RoomView]] - the view of each changed Location's
+            items, with the Inventory it shows
+        message_numbers: dict[NPC, int] - the next message of each NPC that has been talked to
+        locks: dict[object, RoomLock] - the lock of each Location and NPC that has been changed
+        per_location: bool - False to have one lock for the whole world instead, to compare with
+        world_lock: RoomLock - the lock used for everything when per_location is False
+        made: threading.Lock - held while making a new lock, so each key only ever gets one
+    """
+
+    def __init__(self, per_location: bool = True):
+        """
+        Constructor
+        :param per_location: bool - whether each Location and NPC gets its own lock
+        """
+        self.items = {}
+        self.views = {}
+        self.message_numbers = {}
+        self.locks = {}
+        self.per_location = per_location
+        self.world_lock = RoomLock()
+        self.made = threading.Lock()
+
+    def lock_for(self, key) -> RoomLock:
+        """
+        getter for the lock of a Location or NPC, made the first time it is asked for
+        :param key: Location or NPC - what is about to change
+        :return: RoomLock - its lock
+        """
+        if not self.per_location:
+            return self.world_lock
+        lock = self.locks.get(key)
+        if lock is None:
+            with self.made:
+                lock = self.locks.get(key)
+                if lock is None:
+                    lock = self.locks[key] = RoomLock()
+        return lock
+
+    def lock_stats(self) -> dict:
+        """
+        method to add up the counts of every lock
+        :return: dict - locks, times acquired, times contended and takes that lost a race
+        """
+        locks = list(self.locks.values()) if self.per_location else [self.world_lock]
+        return {'locks': len(locks), 'acquired': sum(lock.acquired for lock in locks),
+                'contended': sum(lock.contended for lock in locks),
+                'lost_races': sum(lock.lost_races for lock in locks)}
+
+
+class SharedWorldState(WorldState):
+    """
+    SharedWorldState class is one player's WorldState in a SharedWorld: the items of
+    the rooms and what the NPCs say are those of the SharedRooms, and only what look
+    last showed this player is their own.
+
+    Attributes:
+        rooms: SharedRooms - the rooms shared with every other player
+        (and those of WorldState, where room_items and message_numbers are the shared ones)
+    """
+
+    def __init__(self, rooms: SharedRooms):
+        """
+        Constructor
+        :param rooms: SharedRooms - the rooms shared with every other player
+        """
+        super().__init__()
+        self.rooms = rooms
+        self.room_items = rooms.items
+        self.message_numbers = rooms.message_numbers
+
+    def edit_inventory(self, location: Location) -> Inventory:
+        """
+        Raises: RuntimeError, as a shared room's items are never changed in place; use take_item and put_item
+        """
+        raise RuntimeError('The items of a shared room can only change through take_item and put_item!')
+
+    def take_item(self, location: Location, item: Item) -> bool:
+        """
+        method to take an item out of a Location, if no other player has taken it first
+        :param location: Location - the Location to take it from
+        :param item: Item - the item
+        :return: bool - True if it was taken, False if it is not in the Location
+        """
+        with self.rooms.lock_for(location) as lock:
+            inventory = self.get_inventory(location)
+            if item not in inventory:
+                # the player saw it there, so another player took it first
+                lock.lost_races += 1
+                return False
+            changed = inventory.copy()
+            changed.remove_item(item)
+            self.room_items[location] = changed
+        return True
+
+    def put_item(self, location: Location, item: Item) -> None:
+        """
+        method to put an item in a Location, for every player to see
+        :param location: Location - the Location to put it in
+        :param item: Item - the item
+        """
+        with self.rooms.lock_for(location):
+            changed = self.get_inventory(location).copy()
+            changed.add_item(item)
+            self.room_items[location] = changed
+
+    def room_view(self, location: Location) -> RoomView:
+        """
+        getter for what look shows of a Location's items and NPCs, as they are for every player
+        :param location: Location - the room
+        :return: RoomView - the Location's own view if no player has changed its items,
+            otherwise a view of the shared items, made once for each change
+        """
+        base = location.get_view()
+        inventory = self.room_items.get(location)
+        if inventory is None:
+            return base
+        shown = self.rooms.views.get(location)
+        if shown is not None and shown[0] is inventory and shown[1].base is base:
+            return shown[1]
+        view = RoomView(location, tuple(inventory), base.npcs, base)
+        # two players may both make it; either view is right, and the last one kept
+        self.rooms.views[location] = (inventory, view)
+        return view
+
+    def next_message(self, npc: NPC) -> str:
+        """
+        method to get what an NPC says next, moving on to the following message for every player
+        :param npc: NPC - the NPC being talked to
+        :return: str - the NPC's message
+        """
+        with self.rooms.lock_for(npc):
+            return super().next_message(npc)
+
+    def clear(self) -> None:
+        """
+        method to forget what look showed this player; the shared rooms are left as they are
+        """
+        self.room_views.clear()
+        self.look_views.clear()
+
+
+class SharedWorld:
+    """
+    SharedWorld class is one world that many players act in at the same time.
+
+    Attributes:
+        world: World - the frozen world the rooms start as
+        rooms: SharedRooms - the items and NPCs every player shares
+        players: list[Game] - the game of every player who has joined
+    """
+
+    def __init__(self, world: World, per_location: bool = True):
+        """
+        Constructor
+        :param world: World - the frozen world to play in
+        :param per_location: bool - whether each room gets its own lock, False for one lock for the whole world
+        """
+        self.world = world
+        self.rooms = SharedRooms(per_location)
+        self.players = []
+
+    def join(self, seed: int = None, **settings) -> Game:
+        """
+        method to add a player, who starts where a new game does
+        :param seed: int - seed for the player's random generator, a random one if not given
+        :param settings: what else to make the Game with, such as clock or monotonic
+        :return: Game - the player's game, whose commands can be run from any thread,
+            one at a time for each player
+        """
+        game = Game(self.world, seed, **settings)
+        game.world_state = SharedWorldState(self.rooms)
+        self.players.append(game)
+        return game
+
+    def leave(self, game: Game) -> None:
+        """
+        method to remove a player; anything they dropped stays in the world
+        :param game: Game - the player's game
+            Raises: ValueError if the player is not in this world
+        """
+        self.players.remove(game)
+
+
+class SharedWorldPolicy(RandomPolicy):
+    """
+    SharedWorldPolicy class plays like simulate's RandomPolicy, and also looks around
+    now and then, as a player sharing a world would to see what the others have done.
+    """
+    name = 'random-shared'
+
+    def choices(self, game: Game) -> list[str]:
+        """
+        method to list every command that makes sense where the player is, and look
+        :param game: Game - the game being played
+        :return: list[str] - the command lines
+        """
+        return super().choices(game) + ['look']
+
+
+class CrowdPolicy(SharedWorldPolicy):
+    """
+    CrowdPolicy class plays like SharedWorldPolicy but never leaves the room it is in,
+    so the players of a crowded room keep taking and giving the same items.
+    """
+    name = 'crowd'
+
+    def choices(self, game: Game) -> list[str]:
+        """
+        method to list every command that makes sense where the player is, other than going somewhere
+        :param game: Game - the game being played
+        :return: list[str] - the command lines
+        """
+        return [line for line in super().choices(game) if not line.startswith('go ')]
+
+
+def crowded_rooms(world: World, rooms: int) -> list[Location]:
+    """
+    Chooses the rooms to crowd the players into: those with the most items, leaving out
+    Posada's classroom, where anything but food sends the player away.
+    :param world: World - the world to play in
+    :param rooms: int - how many rooms
+        Raises: ValueError if rooms is less than 1
+    :return: list[Location] - the rooms, fewer if the world has fewer rooms with items
+    """
+    if rooms < 1:
+        raise ValueError('Players must be crowded into at least one room!')
+    candidates = [location for location in world.locations.values()
+                  if location.get_name() != POSADAS_CLASSROOM and len(location.get_inventory())]
+    candidates.sort(key=lambda location: len(location.get_inventory()), reverse=True)
+    return candidates[:rooms]
+
+
+def benchmark(world: World, players: int, threads: int, commands: int, seed: int = 0,
+              per_location: bool = True, crowd: int = None) -> dict:
+    """
+    Plays many random players at once in one SharedWorld, the players shared out
+    between threads that each take turns over theirs, one command each per round.
+    A player whose game ends starts again where they started, so every player keeps playing.
+    Crowded players are shared out between the rooms in turn, as they are between the threads: with
+    as many rooms as threads, each thread plays in a room of its own, and with fewer, threads share rooms.
+    :param world: World - the frozen world to play in
+    :param players: int - number of players
+    :param threads: int - number of threads
+    :param commands: int - commands each player runs
+    :param seed: int - seed that makes the players' choices repeatable
+    :param per_location: bool - False for one lock for the whole world
+    :param crowd: int - put the players in this many rooms (see crowded_rooms) and keep them there;
+        None to let them roam the world
+    :return: dict - the totals: commands per second, the locks' counts and the takes that lost a race
+    """
+    shared = SharedWorld(world, per_location)
+    games = [shared.join(seed * players + number) for number in range(players)]
+    rooms = crowded_rooms(world, crowd) if crowd is not None else []
+    homes = {}
+    for number, game in enumerate(games):
+        if rooms:
+            game.current_location = homes[game] = rooms[number % len(rooms)]
+    totals = {'commands': 0, 'takes': 0, 'items_moved': 0, 'ransoms': 0}
+    totals_lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def play(mine: list[Game], rng: Random) -> None:
+        """
+        Plays a thread's share of the players, adding what happened to the totals at the end.
+        """
+        counted = {'commands': 0, 'takes': 0, 'items_moved': 0, 'ransoms': 0}
+        policy = CrowdPolicy() if rooms else SharedWorldPolicy()
+        policy.begin(mine[0], rng)
+        start.wait()
+        for _ in range(commands):
+            for game in mine:
+                line = policy.choose(game)
+                result = game.execute(line)
+                counted['commands'] += 1
+                for event in result.events:
+                    if event.kind == events.TOOK_ITEM:
+                        counted['takes'] += 1
+                        counted['items_moved'] += 1
+                    elif event.kind == events.GAVE_ITEM:
+                        counted['items_moved'] += 1
+                    elif event.kind == events.RANSOMED:
+                        counted['ransoms'] += 1
+                if game.game_over:
+                    for item in game.items:
+                        game.world_state.put_item(game.current_location, item)
+                    game.reset(rng.getrandbits(32))
+                    if rooms:
+                        game.current_location = homes[game]
+        with totals_lock:
+            for key, count in counted.items():
+                totals[key] += count
+
+    workers = [threading.Thread(target=play, args=(games[number::threads], Random(seed * threads + number)))
+               for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    in_world = sum(len(shared.rooms.items.get(location, location.get_inventory()))
+                   for location in world.locations.values())
+    carried = sum(len(game.items) for game in games)
+    totals.update(players=players, threads=threads, per_location=per_location, crowded_rooms=len(rooms),
+                  seconds=elapsed,
+                  commands_per_second=totals['commands'] / elapsed, items=in_world + carried,
+                  **shared.rooms.lock_stats())
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play many players at once in one shared GV Zork world.')
+    parser.add_argument('--players', type=int, default=2000, help='number of players')
+    parser.add_argument('--threads', type=int, default=8, help='number of threads playing them')
+    parser.add_argument('--commands', type=int, default=50, help='commands each player runs')
+    parser.add_argument('--world', default=DEFAULT_WORLD_FILE, help='world file to play in')
+    parser.add_argument('--seed', type=int, default=0, help='seed that makes the players\' choices repeatable')
+    parser.add_argument('--crowd', type=int, metavar='ROOMS',
+                        help='put the players in the ROOMS rooms with the most items and keep them there')
+    parser.add_argument('--global-lock', action='store_true', help='use one lock for the whole world, to compare')
+    parser.add_argument('--json', action='store_true', help='print the totals as JSON')
+    args = parser.parse_args()
+    if args.players < 1 or args.threads < 1:
+        parser.error('there must be at least one player and one thread')
+    if args.crowd is not None and args.crowd < 1:
+        parser.error('the players must be crowded into at least one room')
+
+    world = shared_world(args.world)
+    items = sum(len(location.get_inventory()) for location in world.locations.values())
+    totals = benchmark(world, args.players, min(args.threads, args.players), args.commands, args.seed,
+                       not args.global_lock, args.crowd)
+    if totals['items'] != items:
+        print(f'{items} items at the start but {totals["items"]} at the end!', file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(totals, indent=2))
+        return
+    locking = 'one lock for the world' if args.global_lock else 'a lock per room'
+    crowded = f', crowded into {totals["crowded_rooms"]} rooms' if totals['crowded_rooms'] else ''
+    print(f'{totals["players"]} players on {totals["threads"]} threads, {locking}{crowded}')
+    print(f'{totals["commands"]} commands in {totals["seconds"]:.2f}s '
+          f'({totals["commands_per_second"]:.0f} commands/s)')
+    print(f'Takes: {totals["takes"]}, lost to another player: {totals["lost_races"]}, '
+          f'items moved: {totals["items_moved"]}, ransoms: {totals["ransoms"]}')
+    contended = totals['contended'] / totals['acquired'] if totals['acquired'] else 0.0
+    print(f'Locks: {totals["locks"]}, acquired {totals["acquired"]} times, '
+          f'waited for {totals["contended"]} times ({contended:.2%})')
+
+
+if __name__ == '__main__':
+    main()
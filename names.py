@@ -0,0 +1,270 @@
+"""
+Name matching - finds the items and NPCs a player means from what they typed,
+even when it is only the start of a name, one word of it, or misspelled.
+
+Names are normalized before they are compared: case-folded, with apostrophes
+dropped and any other punctuation treated as a space ("Posada's Classroom" is
+"posadas classroom"). A NameIndex tries, in order:
+    exact       - the whole normalized name
+    prefix      - names that start with what was typed
+    word        - names with a word that starts with what was typed
+    misspelling - names within a small edit distance (1 for short words, 2 otherwise)
+and stops at the first of these that finds anything. If that finds more than one
+name, the player has to say which they mean.
+
+Prefixes are found by binary search in sorted lists of names and words. Misspellings
+are corrected a word at a time, the SymSpell way: every word is stored under the
+strings left by deleting up to two letters from its first PREFIX_LENGTH letters, so
+a typed word only has to be compared with the few words that share one of its own
+deletions. The names containing a near word for every typed word then match, those
+with the fewest mistakes altogether winning. Words are far fewer than names (a room
+of a thousand numbered snacks has one word 'snack'), and no lookup compares more than
+MAX_CANDIDATES words or looks through more than MAX_LOOKED_AT names, however many the
+index holds.
+"""
+import re
+from bisect import bisect_left, insort
+from itertools import islice
+
+# how many letters from the start of a name are used to find misspellings
+PREFIX_LENGTH = 10
+# most words a typed word is compared with, and most names a lookup looks through,
+# to keep lookups fast in crowded rooms
+MAX_CANDIDATES = 64
+MAX_LOOKED_AT = 1000
+# most names returned when what was typed matches several
+MAX_MATCHES = 10
+
+_APOSTROPHES = re.compile('[\'’]')
+_PUNCTUATION = re.compile(r'[\W_]+')
+
+
+def normalize(name: str) -> str:
+    """
+    Converts a name to the form names are compared in.
+    :param name: str - the name as written or typed
+    :return: str - case-folded, without apostrophes, with words separated by single spaces
+    """
+    return _PUNCTUATION.sub(' ', _APOSTROPHES.sub('', name.casefold())).strip()
+
+
+def max_distance(key: str) -> int:
+    """
+    Works out how many mistakes are allowed in a typed name.
+    :param key: str - the normalized typed name
+    :return: int - the largest edit distance that still counts as a match
+    """
+    if len(key) < 3:
+        return 0
+    return 1 if len(key) < 6 else 2
+
+
+def _deletions(text: str, distance: int) -> set[str]:
+    """
+    Lists the strings made by deleting up to a number of letters from a string, the string itself included.
+    """
+    found = {text}
+    level = {text}
+    for _ in range(distance):
+        level = {word[:position] + word[position + 1:] for word in level for position in range(len(word))}
+        found |= level
+    return found
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """
+    Counts the insertions, deletions, substitutions and swaps of neighboring letters
+    that turn one string into another, giving up once it is more than a limit.
+    :param first: str - one string
+    :param second: str - the other string
+    :param limit: int - the largest distance of interest
+    :return: int - the distance, or limit + 1 if it is more than limit
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(second) + 1))
+    for row, letter in enumerate(first, 1):
+        current = [row] + [0] * len(second)
+        for column, other in enumerate(second, 1):
+            cost = letter != other
+            current[column] = min(previous[column] + 1, current[column - 1] + 1, previous[column - 1] + cost)
+            if (before is not None and column > 1 and letter == second[column - 2]
+                    and first[row - 2] == other):
+                current[column] = min(current[column], before[column - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class NameIndex:
+    """
+    NameIndex class finds things by their names, allowing for partial and misspelled names.
+
+    Attributes:
+        entries: dict[str, dict] - the things with each normalized name, in the order they were added
+        sorted_names: list[str] - every normalized name, sorted
+        words: dict[str, dict[str, None]] - the normalized names containing each word
+        sorted_words: list[str] - every word, sorted
+        deletions: dict[str, set[str]] - the words under each deletion of their first letters
+    """
+    __slots__ = ('entries', 'sorted_names', 'words', 'sorted_words', 'deletions')
+
+    def __init__(self, named=()):
+        """
+        Constructor
+        :param named: iterable of tuple[str, object] - names and the things they belong to, optional
+        """
+        self.entries = {}
+        self.sorted_names = []
+        self.words = {}
+        self.sorted_words = []
+        self.deletions = {}
+        for name, thing in named:
+            self.add(name, thing)
+
+    def add(self, name: str, thing) -> None:
+        """
+        method to add a thing under its name
+        :param name: str - the thing's name, as written
+        :param thing: the thing, such as an Item or NPC
+        """
+        key = normalize(name)
+        same_name = self.entries.get(key)
+        if same_name is not None:
+            same_name[thing] = None
+            return
+        self.entries[key] = {thing: None}
+        insort(self.sorted_names, key)
+        for word in dict.fromkeys(key.split()):
+            containing = self.words.get(word)
+            if containing is None:
+                containing = self.words[word] = {}
+                insort(self.sorted_words, word)
+                for deletion in _deletions(word[:PREFIX_LENGTH], 2):
+                    self.deletions.setdefault(deletion, set()).add(word)
+            containing[key] = None
+
+    def remove(self, name: str, thing) -> None:
+        """
+        method to remove a thing
+        :param name: str - the thing's name, as written
+        :param thing: the thing
+            Raises: KeyError if the thing is not in the index under that name
+        """
+        key = normalize(name)
+        same_name = self.entries[key]
+        del same_name[thing]
+        if same_name:
+            return
+        del self.entries[key]
+        del self.sorted_names[bisect_left(self.sorted_names, key)]
+        for word in dict.fromkeys(key.split()):
+            containing = self.words[word]
+            del containing[key]
+            if not containing:
+                del self.words[word]
+                del self.sorted_words[bisect_left(self.sorted_words, word)]
+                for deletion in _deletions(word[:PREFIX_LENGTH], 2):
+                    words = self.deletions[deletion]
+                    words.discard(word)
+                    if not words:
+                        del self.deletions[deletion]
+
+    def match(self, typed: str) -> list[list]:
+        """
+        method to find the things a typed name could mean
+        :param typed: str - what the player typed
+        :return: list[list] - for each matching name (no more than MAX_MATCHES of them, in
+            alphabetical order), the things with that name in the order they were added;
+            empty if nothing matches
+        """
+        key = normalize(typed)
+        if not key:
+            return []
+        same_name = self.entries.get(key)
+        if same_name is not None:
+            return [list(same_name)]
+        keys = self._starting_with(self.sorted_names, key)
+        if not keys:
+            found = {}
+            for word in self._starting_with(self.sorted_words, key):
+                for found_key in self.words[word]:
+                    found[found_key] = None
+                    if len(found) == MAX_MATCHES:
+                        break
+            keys = sorted(found)[:MAX_MATCHES]
+        if not keys:
+            keys = self._misspelled(key)
+        return [list(self.entries[found_key]) for found_key in keys]
+
+    @staticmethod
+    def _starting_with(sorted_strings: list[str], prefix: str) -> list[str]:
+        """
+        method to find up to MAX_MATCHES strings in a sorted list that start with a prefix
+        """
+        found = []
+        position = bisect_left(sorted_strings, prefix)
+        while position < len(sorted_strings) and len(found) < MAX_MATCHES:
+            if not sorted_strings[position].startswith(prefix):
+                break
+            found.append(sorted_strings[position])
+            position += 1
+        return found
+
+    def _near_words(self, typed: str) -> dict[str, int]:
+        """
+        method to find the words a typed word could be: itself if it is a word, otherwise
+        the words near enough to it. Words that share more deletions with it are compared
+        first, as they are likelier to be near.
+        :return: dict[str, int] - each word and how many mistakes away it is
+        """
+        if typed in self.words:
+            return {typed: 0}
+        limit = max_distance(typed)
+        if limit == 0:
+            return {}
+        shared = {}
+        # in sorted order, so the same words are compared however strings happen to hash
+        for deletion in sorted(_deletions(typed[:PREFIX_LENGTH], limit)):
+            for word in self.deletions.get(deletion, ()):
+                shared[word] = shared.get(word, 0) + 1
+        near = {}
+        for word in sorted(shared, key=lambda word: (-shared[word], word))[:MAX_CANDIDATES]:
+            distance = edit_distance(typed, word, limit)
+            if distance <= limit:
+                near[word] = distance
+        return near
+
+    def _misspelled(self, key: str) -> list[str]:
+        """
+        method to find the names with a near word for every typed word, keeping those
+        with the fewest mistakes altogether
+        """
+        near_words = []
+        for typed in key.split():
+            near = self._near_words(typed)
+            if not near:
+                return []
+            near_words.append(near)
+        # start from the typed word whose near words are in the fewest names
+        near_words.sort(key=lambda near: sum(len(self.words[word]) for word in near))
+        mistakes = {}
+        for word, distance in sorted(near_words[0].items(), key=lambda pair: (pair[1], pair[0])):
+            for found_key in islice(self.words[word], MAX_LOOKED_AT - len(mistakes)):
+                if distance < mistakes.get(found_key, distance + 1):
+                    mistakes[found_key] = distance
+            if len(mistakes) >= MAX_LOOKED_AT:
+                break
+        for near in near_words[1:]:
+            following = {}
+            for found_key, so_far in mistakes.items():
+                distances = [near[word] for word in found_key.split() if word in near]
+                if distances:
+                    following[found_key] = so_far + min(distances)
+            mistakes = following
+        if not mistakes:
+            return []
+        fewest = min(mistakes.values())
+        return sorted(found_key for found_key, count in mistakes.items() if count == fewest)[:MAX_MATCHES]
@@ -0,0 +1,364 @@
+"""
+Food-run planner - works out a short way to win from where the player is.
+
+Winning means carrying at least elf_needed_calories of food into Posada's Classroom,
+but the player cannot move while carrying more than max_weight, so it can take
+several trips. Each trip goes from where the player is out to a turning point and
+then the shortest way to the classroom, picking food up along the way. For each
+trip the planner tries the turning points nearest to a direct route, and for each
+one solves a 0/1 knapsack over the food on that path (the most calories that fit
+in what the player can still carry). It keeps the trip that finishes the job in
+the fewest moves, or failing that, brings the most calories per move. This is a
+greedy heuristic, one trip at a time: the plan is short but not always the
+shortest possible, and the hint says so.
+
+The knapsack runs on NumPy when it is installed, and in plain Python otherwise.
+Before it runs, items that cannot be part of the best load are left out (when
+there are more items of a weight than would fit, only those with the most
+calories are kept), so worlds with tens of thousands of items stay fast.
+
+The planner runs inside a command, which a server runs on its event loop, so its
+work does not grow with the size of the world: each trip only looks for turning
+points among the SEARCH_LIMIT Locations nearest to where it starts, and the food in
+a room is only looked at when the plan could pass through it. Only the routes to
+the classroom cover the whole world, and they are worked out once per world and
+kept (see prepare).
+"""
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CLASSROOM = 'Posada\'s Classroom'
+# weights are counted in tenths of a pound for the knapsack
+WEIGHT_UNITS = 10
+# how many turning points are tried for each trip
+TURNING_POINTS = 32
+# how many of the Locations nearest the start of each trip are searched for turning points
+SEARCH_LIMIT = 5000
+
+
+class FoodPlan:
+    """
+    FoodPlan class is a plan to win, as the commands a player would type.
+
+    Attributes:
+        commands: list[str] - the commands, in order
+        moves: int - how many of the commands are 'go'
+        trips: int - how many times the plan reaches the classroom
+        calories: int - the calories of food the plan gives to Posada
+        possible: bool - False if there is not enough food the player can reach to win,
+            in which case the commands deliver as much as possible
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.commands = []
+        self.moves = 0
+        self.trips = 0
+        self.calories = 0
+        self.possible = True
+
+    def __repr__(self) -> str:
+        """
+        method to convert the FoodPlan into a string for debugging
+        :return: str - representation of the FoodPlan
+        """
+        return (f'FoodPlan(moves={self.moves}, trips={self.trips}, calories={self.calories}, '
+                f'possible={self.possible})')
+
+
+def knapsack(weights: list[int], calories: list[int], capacity: int) -> list[int]:
+    """
+    Chooses the items with the most calories whose weights add up to no more than a capacity.
+    :param weights: list[int] - weight of each item, in whole units
+    :param calories: list[int] - calories of each item
+    :param capacity: int - the most the chosen items can weigh, in the same units
+    :return: list[int] - positions of the chosen items
+    """
+    if capacity < 0:
+        return []
+    chosen = [position for position, weight in enumerate(weights) if weight == 0]
+    candidates = _prune([(weights[position], calories[position], position)
+                         for position, weight in enumerate(weights) if 0 < weight <= capacity], capacity)
+    if not candidates:
+        return chosen
+    if numpy is not None:
+        return chosen + _knapsack_numpy(candidates, capacity)
+    return chosen + _knapsack_python(candidates, capacity)
+
+
+def _prune(candidates: list[tuple[int, int, int]], capacity: int) -> list[tuple[int, int, int]]:
+    """
+    Leaves out items that cannot be in the best choice: of the items that weigh the
+    same, no more than capacity // weight can fit, so only that many with the most
+    calories are kept.
+    """
+    by_weight = {}
+    for candidate in candidates:
+        by_weight.setdefault(candidate[0], []).append(candidate)
+    kept = []
+    for weight, same_weight in by_weight.items():
+        fits = capacity // weight
+        if len(same_weight) > fits:
+            same_weight.sort(key=lambda candidate: -candidate[1])
+            del same_weight[fits:]
+        kept.extend(same_weight)
+    return kept
+
+
+def _knapsack_numpy(candidates: list[tuple[int, int, int]], capacity: int) -> list[int]:
+    """
+    Solves the knapsack with one vectorised step per item.
+    """
+    best = numpy.zeros(capacity + 1, dtype=numpy.int64)
+    taken = numpy.zeros((len(candidates), capacity + 1), dtype=bool)
+    for row, (weight, calories, _) in enumerate(candidates):
+        with_item = best[:capacity + 1 - weight] + calories
+        better = with_item > best[weight:]
+        taken[row, weight:] = better
+        best[weight:] = numpy.where(better, with_item, best[weight:])
+    return _read_back(candidates, lambda row, space: taken[row, space], int(numpy.argmax(best)))
+
+
+def _knapsack_python(candidates: list[tuple[int, int, int]], capacity: int) -> list[int]:
+    """
+    Solves the knapsack in plain Python, for when NumPy is not installed.
+    """
+    best = [0] * (capacity + 1)
+    taken = []
+    for weight, calories, _ in candidates:
+        row = bytearray(capacity + 1)
+        for space in range(capacity, weight - 1, -1):
+            with_item = best[space - weight] + calories
+            if with_item > best[space]:
+                best[space] = with_item
+                row[space] = 1
+        taken.append(row)
+    return _read_back(candidates, lambda row, space: taken[row][space], best.index(max(best)))
+
+
+def _read_back(candidates: list[tuple[int, int, int]], was_taken, space: int) -> list[int]:
+    """
+    Works out which items the knapsack chose, from the last item back to the first.
+    """
+    chosen = []
+    for row in range(len(candidates) - 1, -1, -1):
+        if was_taken(row, space):
+            weight, _, position = candidates[row]
+            chosen.append(position)
+            space -= weight
+    return chosen
+
+
+def _to_units(weight: float) -> int:
+    """
+    Converts a weight in pounds to knapsack units, rounding up so a plan never carries too much.
+    """
+    return math.ceil(weight * WEIGHT_UNITS - 1e-9)
+
+
+def _direction(location, neighbor) -> str:
+    """
+    Finds the direction to go from a Location to a neighboring one.
+    """
+    for direction, target in location.get_locations().items():
+        if target is neighbor:
+            return direction.lower()
+    raise ValueError(f'There is no exit from {location.get_name()} to {neighbor.get_name()}!')
+
+
+def plan_food_run(game) -> FoodPlan:
+    """
+    Plans how the player can win from where they are, without changing the game.
+    :param game: Game - the game being played
+    :return: FoodPlan - the plan
+    """
+    plan = FoodPlan()
+    routes = game.world.get_routes()
+    try:
+        to_classroom = routes.tree_to_name(CLASSROOM)
+    except KeyError:
+        plan.possible = False
+        return plan
+    locations = routes.locations
+    numbers = routes.numbers
+
+    carried = list(game.items)
+    carried_weight = game.current_weight
+    if game.current_location.get_name() == CLASSROOM:
+        # anything else given here would be rejected by Posada, so the food goes first
+        for item in [item for item in carried if item.get_calories() > 0]:
+            plan.commands.append('give ' + item.get_name().lower())
+            plan.calories += item.get_calories()
+            carried.remove(item)
+            carried_weight -= item.get_weight()
+    # the player cannot move while too heavy, so things that are not food are left behind first
+    for item in sorted(carried, key=lambda item: (item.get_calories() > 0, -item.get_weight())):
+        if carried_weight <= game.max_weight:
+            break
+        plan.commands.append('give ' + item.get_name().lower())
+        carried.remove(item)
+        carried_weight -= item.get_weight()
+    needed = game.elf_needed_calories - plan.calories
+
+    food = RoomFood(game, locations)
+    start = numbers[game.current_location]
+    while needed > 0 or any(item.get_calories() > 0 for item in carried):
+        needed -= sum(item.get_calories() for item in carried if item.get_calories() > 0)
+        trip = _plan_trip(routes, to_classroom, food, start, max(0, needed),
+                          _to_units(game.max_weight) - _to_units(carried_weight))
+        if trip is None:
+            plan.possible = False
+            break
+        path, pickups = trip
+        for position, number in enumerate(path):
+            for item in pickups.pop(number, ()):
+                plan.commands.append('take ' + item.get_name().lower())
+                food[number].remove(item)
+                carried.append(item)
+            if position + 1 < len(path):
+                plan.commands.append('go ' + _direction(locations[number], locations[path[position + 1]]))
+                plan.moves += 1
+        for item in carried:
+            if item.get_calories() > 0:
+                plan.commands.append('give ' + item.get_name().lower())
+                plan.calories += item.get_calories()
+        needed = game.elf_needed_calories - plan.calories
+        plan.trips += 1
+        carried = [item for item in carried if item.get_calories() <= 0]
+        carried_weight = sum(item.get_weight() for item in carried)
+        start = path[-1]
+    return plan
+
+
+class RoomFood(dict):
+    """
+    RoomFood class is the food still lying in each room that the plan has looked at,
+    by the room's number, leaving out what has been given to Posada. A room's food is
+    found the first time it is asked for, and taking it out of the list leaves it out of the plan.
+
+    Attributes:
+        game: Game - the game being played
+        locations: list[Location] - the Locations, by number
+    """
+
+    def __init__(self, game, locations: list):
+        """
+        Constructor
+        :param game: Game - the game being played
+        :param locations: list[Location] - the Locations, by number
+        """
+        super().__init__()
+        self.game = game
+        self.locations = locations
+
+    def __missing__(self, number: int) -> list:
+        """
+        method to find the food in a room the first time it is asked for; Posada's classroom has none to take
+        :param number: int - the room's number
+        :return: list[Item] - the food lying in the room
+        """
+        location = self.locations[number]
+        if location.get_name() == CLASSROOM:
+            items = []
+        else:
+            items = [item for item in self.game.world_state.get_inventory(location) if item.get_calories() > 0]
+        self[number] = items
+        return items
+
+
+def prepare(world) -> None:
+    """
+    Works out the routes to the classroom of a world, which every plan in it follows,
+    so the first hint does not have to; a server calls it before taking players.
+    :param world: World - the world
+    """
+    try:
+        world.get_routes().tree_to_name(CLASSROOM)
+    except KeyError:
+        pass
+
+
+def _plan_trip(routes, to_classroom, food: RoomFood, start: int, needed: int, capacity: int):
+    """
+    Chooses the next trip: where to turn round and what to pick up on the way.
+    :return: tuple[list[int], dict[int, list[Item]]] - the Locations walked through, ending
+        in the classroom, and the food to take in each; None if no trip is worth making
+    """
+    distance_to = to_classroom.distance
+    if distance_to[start] < 0:
+        return None
+    if needed <= 0:
+        # nothing more to pick up, just walk to class
+        return _path_to(to_classroom, start), {}
+    reached = []
+    from_start = routes.tree_from(routes.locations[start], SEARCH_LIMIT, reached)
+    distance_from = from_start.distance
+
+    turning_points = [number for number in reached if distance_to[number] >= 0 and food[number]]
+    turning_points.sort(key=lambda number: (distance_from[number] + distance_to[number], number))
+    best = None
+    for number in turning_points[:TURNING_POINTS]:
+        path = _path_from(from_start, number)[:-1] + _path_to(to_classroom, number)
+        on_path = [(stop, item) for stop in dict.fromkeys(path) for item in food[stop]]
+        chosen = knapsack([_to_units(item.get_weight()) for _, item in on_path],
+                          [item.get_calories() for _, item in on_path], capacity)
+        calories = sum(on_path[position][1].get_calories() for position in chosen)
+        if calories == 0:
+            continue
+        moves = len(path) - 1
+        # a trip that finishes the job beats any that does not, then fewer moves, then more calories per move
+        score = (calories >= needed, -moves if calories >= needed else calories / max(moves, 1))
+        if best is None or score > best[0]:
+            if calories >= needed:
+                # leave behind the smallest items that are not needed to finish
+                chosen.sort(key=lambda position: on_path[position][1].get_calories())
+                while chosen and calories - on_path[chosen[0]][1].get_calories() >= needed:
+                    calories -= on_path[chosen.pop(0)][1].get_calories()
+            pickups = {}
+            for position in chosen:
+                stop, item = on_path[position]
+                pickups.setdefault(stop, []).append(item)
+            best = (score, path, pickups)
+    if best is None:
+        return None
+    return best[1], best[2]
+
+
+def _path_from(from_start, number: int) -> list[int]:
+    """
+    Lists the Locations on the shortest way from the start of a forward search to a Location.
+    """
+    path = [number]
+    while from_start.distance[number] > 0:
+        number = from_start.next_step[number]
+        path.append(number)
+    path.reverse()
+    return path
+
+
+def _path_to(to_classroom, number: int) -> list[int]:
+    """
+    Lists the Locations on the shortest way from a Location to the classroom.
+    """
+    path = [number]
+    while to_classroom.distance[number] > 0:
+        number = to_classroom.next_step[number]
+        path.append(number)
+    return path
+
+
+def hint(game) -> tuple[str | None, FoodPlan]:
+    """
+    Finds the next command of a plan to win.
+    :param game: Game - the game being played
+    :return: tuple[str, FoodPlan] - the next command (None if there is nothing to do) and the whole plan
+    """
+    plan = plan_food_run(game)
+    return (plan.commands[0] if plan.commands else None), plan
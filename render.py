@@ -0,0 +1,488 @@
+"""
+Renderer - turns the Events of a GV Zork command into the text a player reads.
+
+Text that never changes (the banner, the help, the ferry, the endings and the
+fixed messages) is built once when this module loads. Each command's text is
+collected in an OutputBuffer and written to its sink in one go, so a turn costs
+a single write whether the sink is the terminal, a socket or memory.
+"""
+import sys
+
+import events
+from events import Event, Result
+
+BANNER = ('|\\      /|      /\\      |   /       |\\      /|      /\\     |------\\   |\n'
+          '| \\    / |     /  \\     |  /        | \\    / |     /  \\    |       |  |\n'
+          '|  \\  /  |    /____\\    | /         |  \\  /  |    /____\\   |       |  |\n'
+          '|   \\/   |   /      \\   | \\         |   \\/   |   /      \\  |       |  |\n'
+          '|        |  /        \\  |  \\        |        |  /        \\ |______/   o\n'
+          'Welcome to MACKINAC MADNESS! You find yourself in a fudge shop on'
+          '\nMackinac Island and you\'re late for your computer science class! You'
+          '\nmust collect enough food to feed your classmates (2000 total calories)'
+          '\nin order to earn forgiveness from your professor for being late.'
+          '\nYou can only carry 20 lbs at once. I\'d try to get a boat out of here'
+          '\nASAP if I were you...\n')
+
+HELP = ('Valid commands are:'
+        '\n\'help\' or \'?\': prints available commands'
+        '\n\'talk\': talk to NPCs in your current location'
+        '\n\'meet\': introduce yourself to an NPC'
+        '\n\'go\': type this and your target location to travel (\'go east\')'
+        '\n\'goto\': travel the shortest way to a place (\'goto einstein\'s bagels\')'
+        '\n\'items\': show items in inventory'
+        '\n\'stats\': show current weight, calories, and calories needed'
+        '\n\'hint\': suggest what to do next (a quick plan, not always the shortest)'
+        '\n\'look\': examine surroundings'
+        '\n\'take\': pick up item'
+        '\n\'give\': give away an item'
+        '\n\'ransom\': mystery tool'
+        '\n\'quit\': end game'
+        '\nCommands can be shortened (\'tak\' for take), \'n\', \'s\', \'e\', \'w\', \'u\' and \'d\' go that way,'
+        '\n\'l\' looks, \'i\' shows your items, and \';\' runs several commands (\'take bagel; stats\')\n')
+
+FERRY = ('          |\\\n'
+         '          | \\\n'
+         '          |  \\\n'
+         '          |___\\\n'
+         '          |\n'
+         '          |\n'
+         '__________|__________\n'
+         '\\   o   o   o   o   /\n'
+         ' \\                 /\n'
+         '  \\               /\n'
+         '   \\_____________/\n'
+         'The ferry transported you into the bermuda triangle of the Great Lakes! '
+         '\nYou fell into a swirling whirlpool and were magically transported to...'
+         '\nGVSU! Welcome back to your university!\n')
+
+WON = ('GAME OVER\nYou Won!!!\n'
+       'Despite being late for you\'re computer science class, you appeased your teacher by'
+       '\nbringing her enough food to feed the class. Congratulations!!\n')
+
+LOST = ('GAME OVER\nYou have failed!\n'
+        'You never showed up for class so you were expelled.'
+        '\nBetter luck next time!\n\n')
+
+RANSOM = ('{name} said: WHAT KIND OF MONSTER KIDNAPS AND RANSOMS A BABY?!?!\n'
+          'As a result of this ruthless transaction, {name} has given you a magic '
+          '\nand weightless fudge that contains the amount of calories equal to that of the newborn. '
+          '\nHopefully your are proud enough of this ransom to ignore the guilt swelling inside of '
+          '\nyou for allowing this baby to be abandoned a second time.\n')
+
+# the text of every kind of Event that always reads the same
+STATIC_TEXT = {
+    events.INTRO: BANNER,
+    events.FERRY_RIDE: FERRY,
+    events.TOO_HEAVY: 'Too much weight! Drop something to continue.\n',
+    events.INVALID_DIRECTION: 'That is not a valid direction\n',
+    events.NOT_CARRIED: 'you can\'t give something you don\'t have\n',
+    events.REJECTED_NON_FOOD: ('You have given Prof. Posada a non-food item.'
+                               '\nYou have been transported to a random location,'
+                               'you better collect some more food and get back to class!\n'),
+    events.REJECTED_FOOD: ('You have given Prof. Posada inedible food! She has rejected '
+                           'the food and you have been transported to a random location.'
+                           '\nYou better collect some more food and get back to class!\n'),
+    events.TOO_MANY_FAILS: 'You gave the professor too many inedible items! Loser!\n',
+    events.TIME_UP: 'You ran out of time! Prof. Posada has started class without you.\n',
+    events.NOTHING_TO_RANSOM: 'You have no items to ransom.\n',
+    events.NO_ONE_TO_RANSOM: 'There is no one to accept your ransom\n',
+    events.CANNOT_RANSOM: 'You cannot ransom this item\n',
+}
+
+
+class StdoutSink:
+    """
+    StdoutSink class writes text to the terminal.
+    """
+
+    @staticmethod
+    def write(text: str) -> None:
+        """
+        method to write text to standard output and flush it
+        :param text: str - text to write
+        """
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+class StreamSink:
+    """
+    StreamSink class writes text to a stream, such as a file, a socket file or an
+    asyncio StreamWriter.
+
+    Attributes:
+        stream: the object with a write method that receives the text
+        encoding: str - encoding for streams that take bytes, None for streams that take str
+    """
+
+    def __init__(self, stream, encoding: str = None):
+        """
+        Constructor
+        :param stream: the object with a write method that receives the text
+        :param encoding: str - encoding for streams that take bytes, None for streams that take str
+        """
+        self.stream = stream
+        self.encoding = encoding
+
+    def write(self, text: str) -> None:
+        """
+        method to write text to the stream
+        :param text: str - text to write
+        """
+        if self.encoding is None:
+            self.stream.write(text)
+        else:
+            self.stream.write(text.encode(self.encoding))
+
+
+class MemorySink:
+    """
+    MemorySink class keeps the text it is given, for bots and tests.
+
+    Attributes:
+        chunks: list[str] - each piece of text written, one per flushed turn
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.chunks = []
+
+    def write(self, text: str) -> None:
+        """
+        method to keep a piece of text
+        :param text: str - text to keep
+        """
+        self.chunks.append(text)
+
+    def getvalue(self) -> str:
+        """
+        getter for everything written so far
+        :return: str - all the text
+        """
+        return ''.join(self.chunks)
+
+
+class OutputBuffer:
+    """
+    OutputBuffer class collects the text of one turn and writes it to a sink all at once.
+
+    Attributes:
+        sink: the object with a write(str) method that the text is flushed to
+        parts: list[str] - text waiting to be flushed
+    """
+
+    def __init__(self, sink):
+        """
+        Constructor
+        :param sink: the object with a write(str) method that the text is flushed to
+        """
+        self.sink = sink
+        self.parts = []
+
+    def write(self, text: str) -> None:
+        """
+        method to add text to the turn
+        :param text: str - text to add
+        """
+        self.parts.append(text)
+
+    def flush(self) -> None:
+        """
+        method to write the turn's text to the sink in one go, then start a new turn
+        """
+        if self.parts:
+            text = ''.join(self.parts)
+            self.parts.clear()
+            self.sink.write(text)
+
+
+class TextRenderer:
+    """
+    TextRenderer class turns Events into the text the terminal game prints.
+
+    Attributes:
+        renderers: dict[str, callable] - the method that renders each kind of Event
+            whose text depends on its fields (the others are in STATIC_TEXT)
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.renderers = self.setup_renderers()
+
+    def setup_renderers(self) -> dict[str, callable]:
+        """
+        This method creates a dictionary from each kind of Event to the method that renders it.
+        Kinds that are missing from it and from STATIC_TEXT (such as teleported) are
+        not shown to the player.
+        :return: dict[str, callable] - dictionary of event kinds and their renderer
+        """
+        return {events.HELP: self.help, events.TALKED: self.talked, events.MET: self.met,
+                events.NO_SUCH_NPC: self.no_such_npc, events.MOVED: self.moved,
+                events.UNKNOWN_PLACE: self.unknown_place, events.NO_ROUTE: self.no_route,
+                events.ALREADY_THERE: self.already_there,
+                events.INVENTORY: self.inventory, events.LOOKED: self.looked,
+                events.TOOK_ITEM: self.took_item, events.NO_SUCH_ITEM: self.no_such_item,
+                events.AMBIGUOUS_NAME: self.ambiguous_name,
+                events.GAVE_ITEM: self.gave_item, events.STATS: self.stats, events.HINT: self.hint,
+                events.RANSOMED: self.ransomed, events.PARSE_ERROR: self.parse_error,
+                events.COMMAND_FAILED: self.command_failed, events.GAME_OVER: self.game_over}
+
+    def render(self, result: Result) -> str:
+        """
+        method to render everything that happened during a command, followed by a
+        blank line, then the ending if the game is over
+        :param result: Result - what happened
+        :return: str - the text for the player
+        """
+        sink = MemorySink()
+        out = OutputBuffer(sink)
+        self.render_to(result, out)
+        out.flush()
+        return sink.getvalue()
+
+    def render_to(self, result: Result, out: OutputBuffer) -> None:
+        """
+        method to add the text of a command to an OutputBuffer, see render
+        :param result: Result - what happened
+        :param out: OutputBuffer - the turn being written
+        """
+        ending = None
+        for event in result.events:
+            if event.kind == events.GAME_OVER:
+                ending = event
+            else:
+                out.write(self.render_event(event))
+        out.write('\n')
+        if ending is not None:
+            out.write(self.render_event(ending))
+
+    def render_event(self, event: Event) -> str:
+        """
+        method to render one Event
+        :param event: Event - what happened
+        :return: str - the text for the player, empty for events the player does not see
+        """
+        text = STATIC_TEXT.get(event.kind)
+        if text is not None:
+            return text
+        renderer = self.renderers.get(event.kind)
+        if renderer is None:
+            return ''
+        return renderer(event)
+
+    @staticmethod
+    def help(event: Event) -> str:
+        """
+        method to render the time and the list of commands
+        """
+        return 'The current time is ' + event['time'].strftime('%H:%M.%S') + '\n' + HELP
+
+    @staticmethod
+    def talked(event: Event) -> str:
+        """
+        method to render who the player talked to and what they said
+        """
+        return f'You talked to {event["name"]}\n{event["name"]} said: \'{event["message"]}\'\n'
+
+    @staticmethod
+    def met(event: Event) -> str:
+        """
+        method to render the description of an NPC the player introduced themselves to
+        """
+        return f'{event["name"]}: {event["description"]}\n'
+
+    @staticmethod
+    def no_such_npc(event: Event) -> str:
+        """
+        method to render that there is no NPC by that name here
+        """
+        return f'There is no one called {event["name"]} here.\n'
+
+    @staticmethod
+    def moved(event: Event) -> str:
+        """
+        method to render which way the player went
+        """
+        direction = event['direction']
+        if direction == 'enter' or direction == 'exit':
+            string = direction + 'ed'
+        elif direction == 'ferry':
+            string = 'boarded the ' + direction
+        else:
+            string = 'went ' + direction
+        return f'You {string}\n'
+
+    @staticmethod
+    def unknown_place(event: Event) -> str:
+        """
+        method to render that there is no place by that name
+        """
+        return f'There is no place called {event["name"]}\n'
+
+    @staticmethod
+    def no_route(event: Event) -> str:
+        """
+        method to render that a place cannot be reached from here
+        """
+        return f'You can\'t get to {event["name"]} from here\n'
+
+    @staticmethod
+    def already_there(event: Event) -> str:
+        """
+        method to render that the player is already where they asked to go
+        """
+        return f'You are already at {event["name"]}\n'
+
+    @staticmethod
+    def inventory(event: Event) -> str:
+        """
+        method to render the items the player is carrying
+        """
+        lines = []
+        if not event['items']:
+            lines.append('You currently have no items.')
+        lines.append('Your current inventory:')
+        lines.extend(str(item) for item in event['items'])
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def looked(event: Event) -> str:
+        """
+        method to render a look: the room, its items, its NPCs and its exits; the text is kept in the views it came from
+        """
+        view = event.fields.get('view')
+        if view is not None and view.text is not None:
+            return view.text
+        room = view.room if view is not None else None
+        if room is not None and room.text is not None:
+            text = room.text
+        else:
+            text = TextRenderer.room_text(event['location'], event['items'], event['npcs'])
+            if room is not None:
+                room.text = text
+        text += TextRenderer.exits_text(event['exits'])
+        if view is not None:
+            view.text = text
+        return text
+
+    @staticmethod
+    def room_text(location, items, npcs) -> str:
+        """
+        method to render the room part of a look: where the player is, the items and the NPCs
+        """
+        lines = [f'Your current location is {location}']
+        if not items:
+            lines.append('There are no items')
+        else:
+            lines.append('This location contains:')
+            lines.extend(str(item) for item in items)
+
+        if not npcs:
+            lines.append('You are alone')
+        else:
+            lines.append('You are in the room with: ')
+            lines.extend(str(person) for person in npcs)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def exits_text(exits) -> str:
+        """
+        method to render the exits part of a look, naming the places the player has been
+        """
+        lines = ['You can go:']
+        for direction, neighbor in exits:
+            if neighbor is not None:
+                lines.append(f'{direction} to {neighbor.get_name()}')
+            else:
+                lines.append(direction)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def took_item(event: Event) -> str:
+        """
+        method to render the item the player picked up
+        """
+        return f'You took the {event["name"]}\n'
+
+    @staticmethod
+    def no_such_item(event: Event) -> str:
+        """
+        method to render that there is no item by that name here
+        """
+        return f'The item {event["name"]} does not exist in your current location\n'
+
+    @staticmethod
+    def ambiguous_name(event: Event) -> str:
+        """
+        method to render the items a name could mean, for the player to choose from
+        """
+        names = event['names']
+        choices = ', '.join(names[:-1]) + ' or ' + names[-1]
+        return f'Which do you mean by {event["name"]}: {choices}?\n'
+
+    @staticmethod
+    def gave_item(event: Event) -> str:
+        """
+        method to render the item the player gave away and where
+        """
+        return (f'The {event["name"]} was removed from your inventory and given to '
+                f'{event["location"].get_name()}\n')
+
+    @staticmethod
+    def stats(event: Event) -> str:
+        """
+        method to render the weight and calories carried, and how many more calories are needed
+        """
+        text = (f'Your inventory currently weighs {event["weight"]} lbs and contains '
+                f'{event["calories"]} calories.\n')
+        needed = event['calories_needed'] - event['calories']
+        if needed > 0:
+            return text + f'You still need to collect {needed} more calories\n'
+        return text + 'You have enough calories! Now get to class!\n'
+
+    @staticmethod
+    def hint(event: Event) -> str:
+        """
+        method to render the next command the planner suggests and how far the player is from winning
+        """
+        if event['command'] is None:
+            return 'There is nothing more you can do to feed the class.\n'
+        text = f'Try \'{event["command"]}\'. '
+        if not event['possible']:
+            return text + 'There is not enough food you can reach to feed the class, but it is a start.\n'
+        trips = '1 trip' if event['trips'] == 1 else f'{event["trips"]} trips'
+        return text + f'This plan wins in {event["moves"]} moves and {trips} to class.\n'
+
+    @staticmethod
+    def ransomed(event: Event) -> str:
+        """
+        method to render what the NPC said when the player ransomed the baby
+        """
+        return RANSOM.format(name=event['npc'].get_name())
+
+    @staticmethod
+    def parse_error(event: Event) -> str:
+        """
+        method to render why a command line could not be understood
+        """
+        return event['message'] + '\n'
+
+    @staticmethod
+    def command_failed(event: Event) -> str:
+        """
+        method to render that a command raised an error
+        """
+        return f'Something went wrong with \'{event["command"]}\': {event["error"]}\n'
+
+    @staticmethod
+    def game_over(event: Event) -> str:
+        """
+        method to render the ending, won or lost
+        """
+        return WON if event['won'] else LOST
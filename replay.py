@@ -0,0 +1,192 @@
+"""
+Event logs and replay - record a game's commands and play them again exactly.
+
+A Game's randomness comes from its seed and its time from its clock, so the seed,
+the time each command started and the accepted command lines are all it takes to
+play a game again the same way. An EventLog writes them as JSON Lines:
+    {"type": "start", "seed": 1234, "time": "2024-04-01T10:00:00"}
+    {"type": "command", "line": "take chocolate fudge", "time": "2024-04-01T10:00:05.120000"}
+    {"type": "time_up", "time": "2024-04-01T10:05:00.000100"}
+The time_up record is written when the game's time limit ran out, as it happens at
+a different moment in a replay. replay() runs a log through a new Game with no
+terminal input or output and no time limit, giving the same Results as the original game.
+
+Usage: python replay.py LOG [--show] [--repeat N]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from main import Game, World
+from render import OutputBuffer, StdoutSink, TextRenderer
+
+
+class EventLog:
+    """
+    EventLog class writes the seed and every accepted command of a game to a text
+    stream, one JSON object per line. Set it as a Game's log before the game starts.
+
+    Attributes:
+        stream: the object with write and flush methods that receives the lines, such as a file
+    """
+
+    def __init__(self, stream):
+        """
+        Constructor
+        :param stream: the object with write and flush methods that receives the lines, such as a file
+        """
+        self.stream = stream
+
+    def start(self, game: Game) -> None:
+        """
+        method to record the start of a game
+        :param game: Game - the game that is starting
+        """
+        self._write({'type': 'start', 'seed': game.seed, 'time': game.turn_time.isoformat()})
+
+    def record(self, command_line: str, command_time: datetime) -> None:
+        """
+        method to record one accepted command
+        :param command_line: str - the line the player typed
+        :param command_time: datetime - the time the command started, as read from the game's clock
+        """
+        self._write({'type': 'command', 'line': command_line, 'time': command_time.isoformat()})
+
+    def time_up(self, end_time: datetime) -> None:
+        """
+        method to record that the game's time limit ran out
+        :param end_time: datetime - the time it was noticed, as read from the game's clock
+        """
+        self._write({'type': 'time_up', 'time': end_time.isoformat()})
+
+    def _write(self, record: dict) -> None:
+        """
+        method to write one line and flush it, so the log is complete up to the last command
+        if the process dies
+        """
+        self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+
+
+class RecordedClock:
+    """
+    RecordedClock class is a clock that gives back the times of a log in order.
+
+    Attributes:
+        times: list[datetime] - the times to give, in order
+        position: int - how many times have been given
+    """
+
+    def __init__(self, times: list[datetime]):
+        """
+        Constructor
+        :param times: list[datetime] - the times to give, in order
+        """
+        self.times = times
+        self.position = 0
+
+    def __call__(self) -> datetime:
+        """
+        method to read the clock
+            Raises: ValueError if it is read more often than the log has times
+        :return: datetime - the next recorded time
+        """
+        if self.position >= len(self.times):
+            raise ValueError('The log has no more times to replay!')
+        now = self.times[self.position]
+        self.position += 1
+        return now
+
+
+def read_log(lines) -> tuple[int, list[datetime], list[str | None]]:
+    """
+    Reads an event log.
+    :param lines: iterable of str - the lines of the log, such as an open file
+        Raises: ValueError if the log does not begin with a start record or has an unknown record
+    :return: tuple[int, list[datetime], list[str | None]] - the seed, the time of the start
+        and of each command, and the command lines, with None where the time ran out
+    """
+    seed = None
+    times = []
+    commands = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        kind = record.get('type')
+        if kind == 'start' and seed is None:
+            seed = record['seed']
+            times.append(datetime.fromisoformat(record['time']))
+        elif kind == 'command' and seed is not None:
+            commands.append(record['line'])
+            times.append(datetime.fromisoformat(record['time']))
+        elif kind == 'time_up' and seed is not None:
+            commands.append(None)
+            times.append(datetime.fromisoformat(record['time']))
+        else:
+            raise ValueError(f'Line {number} of the log is not a valid record!')
+    if seed is None:
+        raise ValueError('The log does not have a start record!')
+    return seed, times, commands
+
+
+def replay(lines, world: World = None, on_result=None) -> Game:
+    """
+    Plays a logged game again, as fast as it can and without any input or output.
+    :param lines: iterable of str - the lines of the log, such as an open file
+    :param world: World - the world the game was played in, the shared GV Zork world if not given
+    :param on_result: callable - called with the Result of the start and of every command, optional
+    :return: Game - the game in the state the log leaves it
+    """
+    seed, times, commands = read_log(lines)
+    game = Game(world, seed=seed, clock=RecordedClock(times))
+    # the time runs out where the log says it did, and nowhere else
+    game.time_limit = None
+    result = game.start()
+    if on_result is not None:
+        on_result(result)
+    for command_line in commands:
+        if command_line is None:
+            result = game.time_up()
+        else:
+            result = game.execute(command_line)
+        if on_result is not None:
+            on_result(result)
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play a logged GV Zork game again.')
+    parser.add_argument('log', help='event log to replay')
+    parser.add_argument('--show', action='store_true', help='print what the player saw')
+    parser.add_argument('--repeat', type=int, default=1, help='replay this many times and report the speed')
+    args = parser.parse_args()
+    with open(args.log) as file:
+        lines = file.readlines()
+
+    if args.show:
+        renderer = TextRenderer()
+        out = OutputBuffer(StdoutSink())
+
+        def show(result):
+            renderer.render_to(result, out)
+            out.flush()
+
+        replay(lines, on_result=show)
+        return
+
+    commands = len(read_log(lines)[2])
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        game = replay(lines)
+    elapsed = time.perf_counter() - started
+    print(f'Replayed {commands} commands {args.repeat} times in {elapsed:.3f}s '
+          f'({commands * args.repeat / elapsed:.0f} commands/s)', file=sys.stderr)
+    print(f'Final state: location {game.current_location.get_name()}, '
+          f'{game.elf_needed_calories} calories needed, game over {game.game_over}')
+
+
+if __name__ == '__main__':
+    main()
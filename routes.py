@@ -0,0 +1,262 @@
+"""
+Routes - shortest ways between the Locations of a world.
+
+Exits only go one way (the ferry has no way back), so a route is found by a
+breadth-first search backwards from the destination. That search gives the next
+step towards the destination from every Location at once, so it is kept as a
+tree and every later route to the same destination just follows it, taking
+time in proportion to the length of the route however big the world is. The
+most recently used trees are kept, and each one is kept up to date as exits
+are added: a new exit can only make routes shorter, so only the Locations it
+brings closer are changed.
+
+A world's RouteTable is shared by every Game played in it, on however many
+threads (see multiplayer.py), so it is read and changed under a lock.
+"""
+import threading
+from array import array
+from collections import OrderedDict, deque
+
+
+class RouteTree:
+    """
+    RouteTree class holds the shortest way to a destination from every Location.
+
+    Attributes:
+        distance: array[int] - number of steps to the destination from each Location, -1 if it cannot be reached
+        next_step: array[int] - the Location to go to next from each Location, -1 at the destination
+    """
+    __slots__ = ('distance', 'next_step')
+
+    def __init__(self, size: int):
+        """
+        Constructor
+        :param size: int - number of Locations
+        """
+        self.distance = array('l', [-1]) * size
+        self.next_step = array('l', [-1]) * size
+
+
+class RouteTable:
+    """
+    RouteTable class answers route queries for the Locations of one world.
+
+    Locations are numbered in the order they are given. A destination can be a single
+    Location or every Location with a name, in which case the route leads to the nearest one.
+
+    Attributes:
+        locations: list[Location] - every Location, by number
+        numbers: dict[Location, int] - the number of each Location
+        entrances: list[list[int]] - the Locations with an exit into each Location
+        names: dict[str, list[int]] - the Locations with each name, in lower case; built when first needed
+        trees: OrderedDict - the RouteTree of each recently used destination, least recent first
+        max_trees: int - how many RouteTrees are kept
+        lock: threading.RLock - held while the table is read or changed
+    """
+
+    def __init__(self, locations, max_trees: int = 64):
+        """
+        Constructor
+        :param locations: iterable of Location - every Location of the world
+        :param max_trees: int - how many destinations to keep routes for
+        """
+        self.locations = []
+        self.numbers = {}
+        self.entrances = []
+        self.names = None
+        self.trees = OrderedDict()
+        self.max_trees = max_trees
+        # reentrant, as the public methods call each other
+        self.lock = threading.RLock()
+        for location in locations:
+            self._number(location)
+        for number, location in enumerate(self.locations):
+            for neighbor in location.get_locations().values():
+                self.entrances[self._number(neighbor)].append(number)
+
+    def _number(self, location) -> int:
+        """
+        method to find the number of a Location, numbering it if it is new
+        :param location: Location - the Location
+        :return: int - its number
+        """
+        number = self.numbers.get(location)
+        if number is None:
+            number = len(self.locations)
+            self.numbers[location] = number
+            self.locations.append(location)
+            self.entrances.append([])
+            for tree in self.trees.values():
+                tree.distance.append(-1)
+                tree.next_step.append(-1)
+            if self.names is not None:
+                name = location.get_name().lower()
+                self.names.setdefault(name, []).append(number)
+                tree = self.trees.get(name)
+                if tree is not None:
+                    # a new place with the name of a kept destination is one more way to arrive
+                    tree.distance[number] = 0
+                    self._search(tree, deque([number]))
+        return number
+
+    def exit_added(self, source, target) -> None:
+        """
+        method to update the routes after an exit is added. Routes can only get shorter,
+        so each kept RouteTree is repaired from the new exit outwards instead of being rebuilt.
+        :param source: Location - where the exit leads from
+        :param target: Location - where the exit leads to
+        """
+        with self.lock:
+            if source not in self.numbers and target not in self.numbers:
+                # the exit is in another world
+                return
+            source_number = self._number(source)
+            target_number = self._number(target)
+            self.entrances[target_number].append(source_number)
+            for tree in self.trees.values():
+                distance = tree.distance
+                target_distance = distance[target_number]
+                if target_distance < 0:
+                    continue
+                if 0 <= distance[source_number] <= target_distance + 1:
+                    continue
+                distance[source_number] = target_distance + 1
+                tree.next_step[source_number] = target_number
+                self._search(tree, deque([source_number]))
+
+    def _search(self, tree: RouteTree, queue: deque) -> None:
+        """
+        method to search backwards through the exits from the Locations in the queue,
+        giving each Location it reaches a shorter way to the destination if it finds one
+        """
+        distance = tree.distance
+        next_step = tree.next_step
+        entrances = self.entrances
+        while queue:
+            number = queue.popleft()
+            step = distance[number] + 1
+            for entrance in entrances[number]:
+                if distance[entrance] < 0 or distance[entrance] > step:
+                    distance[entrance] = step
+                    next_step[entrance] = number
+                    queue.append(entrance)
+
+    def _tree(self, key, destinations: list[int]) -> RouteTree:
+        """
+        getter for the RouteTree of a destination, building it if it is not kept
+        :param key: what the destination is kept by, a Location or a lower case name
+        :param destinations: list[int] - the Locations that count as arriving
+        :return: RouteTree - the shortest way there from everywhere
+        """
+        with self.lock:
+            tree = self.trees.get(key)
+            if tree is not None:
+                self.trees.move_to_end(key)
+                return tree
+            tree = RouteTree(len(self.locations))
+            for number in destinations:
+                tree.distance[number] = 0
+            self._search(tree, deque(destinations))
+            self.trees[key] = tree
+            if len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+            return tree
+
+    def _follow(self, tree: RouteTree, number: int) -> list[str] | None:
+        """
+        method to read a route out of a RouteTree
+        :param tree: RouteTree - the routes to the destination
+        :param number: int - where the route starts
+        :return: list[str] - the directions to go in, None if the destination cannot be reached
+        """
+        if tree.distance[number] < 0:
+            return None
+        directions = []
+        next_step = tree.next_step
+        while tree.distance[number] > 0:
+            following = next_step[number]
+            target = self.locations[following]
+            for direction, neighbor in self.locations[number].get_locations().items():
+                if neighbor is target:
+                    directions.append(direction)
+                    break
+            number = following
+        return directions
+
+    def route(self, source, destination) -> list[str] | None:
+        """
+        method to find the shortest way between two Locations
+        :param source: Location - where to start
+        :param destination: Location - where to go
+        :return: list[str] - the directions to go in, in order (empty if they are the same
+            Location), or None if there is no way to get there
+        """
+        with self.lock:
+            destination_number = self._number(destination)
+            return self._follow(self._tree(destination, [destination_number]), self._number(source))
+
+    def route_to_name(self, source, name: str) -> list[str] | None:
+        """
+        method to find the shortest way to the nearest Location with a name
+        :param source: Location - where to start
+        :param name: str - name of the place to go, in any case
+            Raises: KeyError if no Location has that name
+        :return: list[str] - the directions to go in, or None if there is no way to get there
+        """
+        with self.lock:
+            return self._follow(self.tree_to_name(name), self._number(source))
+
+    def tree_to_name(self, name: str) -> RouteTree:
+        """
+        getter for the shortest ways from every Location to the nearest Location with a name
+        :param name: str - name of the place, in any case
+            Raises: KeyError if no Location has that name
+        :return: RouteTree - the routes there, indexed by the numbers of this table
+        """
+        with self.lock:
+            if self.names is None:
+                self.names = {}
+                for number, location in enumerate(self.locations):
+                    self.names.setdefault(location.get_name().lower(), []).append(number)
+            key = name.lower()
+            return self._tree(key, self.names[key])
+
+    def tree_from(self, source, limit: int = None, reached: list = None) -> RouteTree:
+        """
+        method to search forwards from a Location to every Location it can reach. The
+        result is not kept, as it is only good for routes starting at that Location.
+        :param source: Location - where to start
+        :param limit: int - stop once this many Locations (the source included) have been found,
+            the nearest ones, leaving the rest as if they could not be reached; None to find them all
+        :param reached: list[int] - if given, the number of each Location found is added
+            to it, nearest first
+        :return: RouteTree - whose distance is the number of steps from the source, and
+            whose next_step is the Location just before each one on the way there
+        """
+        with self.lock:
+            tree = RouteTree(len(self.locations))
+            start = self._number(source)
+            tree.distance[start] = 0
+            queue = deque([start])
+            distance = tree.distance
+            previous = tree.next_step
+            locations = self.locations
+            numbers = self.numbers
+            found = 1
+            if reached is not None:
+                reached.append(start)
+            while queue and found != limit:
+                number = queue.popleft()
+                step = distance[number] + 1
+                for neighbor in locations[number].get_locations().values():
+                    following = numbers[neighbor]
+                    if distance[following] < 0:
+                        distance[following] = step
+                        previous[following] = number
+                        queue.append(following)
+                        found += 1
+                        if reached is not None:
+                            reached.append(following)
+                        if found == limit:
+                            break
+            return tree
@@ -0,0 +1,234 @@
+"""
+Rules - game rules that run when something happens in a particular place or to a particular thing.
+
+A rule is a function registered in a RuleEngine against a kind of trigger (the
+player entering a Location, taking, giving or ransoming an Item, or talking to an
+NPC), and optionally the name of the Location, Item or NPC it is about and a
+condition. When a command fires a trigger, the engine finds the rules that could
+match with a few dict lookups in an index built as rules are added, by kind and by
+each name, so only those rules are even looked at: adding hundreds of rules for
+other places and things does not make any trigger slower.
+
+The rules that match run in the order they were added. Each is called with the
+Game and the Trigger, and changes the game and emits Events the way a command does.
+Names are compared case-folded.
+"""
+
+# the kinds of trigger, and what each one has
+ENTER = 'enter'        # location: the Location the player has just arrived in
+TAKE = 'take'          # location, item: the Item the player has just taken
+GIVE = 'give'          # location, item: the Item the player has just given to the Location
+RANSOM = 'ransom'      # location, name: what the player offered as a ransom, item: the Item if they carry it
+TALK = 'talk'          # location, npc: the NPC the player has just talked to
+KINDS = (ENTER, TAKE, GIVE, RANSOM, TALK)
+
+# what a rule can be keyed by, besides its kind
+_LOCATION = 'location'
+_ITEM = 'item'
+_NPC = 'npc'
+
+
+class Trigger:
+    """
+    Trigger class describes what has just happened, for the rules to look at.
+
+    Attributes:
+        kind: str - what happened, one of KINDS
+        location: Location - where it happened
+        item: Item - the Item involved, None if there is none
+        npc: NPC - the NPC involved, None if there is none
+        name: str - the name of the Item it is about, which may be typed by the player
+            rather than carried; None if there is none
+    """
+    __slots__ = ('kind', 'location', 'item', 'npc', 'name')
+
+    def __init__(self, kind: str, location, item=None, npc=None, name: str = None):
+        """
+        Constructor
+        :param kind: str - what happened, one of KINDS
+        :param location: Location - where it happened
+        :param item: Item - the Item involved, optional
+        :param npc: NPC - the NPC involved, optional
+        :param name: str - the name of the Item it is about, the item's own name if not given
+        """
+        self.kind = kind
+        self.location = location
+        self.item = item
+        self.npc = npc
+        self.name = name if name is not None or item is None else item.get_name()
+
+
+class Rule:
+    """
+    Rule class is one game rule: what it is about and what it does.
+
+    Attributes:
+        kind: str - the kind of trigger it runs for, one of KINDS
+        action: callable - called with the Game and the Trigger when the rule matches
+        location: str - the case-folded name of the Location it is about, None for any
+        item: str - the case-folded name of the Item it is about, None for any
+        npc: str - the case-folded name of the NPC it is about, None for any
+        when: callable - called with the Game and the Trigger, the rule only runs if it
+            returns True; None to always run
+        order: int - when the rule was added, which decides the order rules run in
+    """
+    __slots__ = ('kind', 'action', 'location', 'item', 'npc', 'when', 'order')
+
+    def __init__(self, kind: str, action, location: str = None, item: str = None, npc: str = None,
+                 when=None, order: int = 0):
+        """
+        Constructor
+        :param kind: str - the kind of trigger it runs for
+        :param action: callable - what the rule does, called with the Game and the Trigger
+        :param location: str - name of the Location it is about, optional
+        :param item: str - name of the Item it is about, optional
+        :param npc: str - name of the NPC it is about, optional
+        :param when: callable - condition, called with the Game and the Trigger, optional
+        :param order: int - when the rule was added
+        """
+        self.kind = kind
+        self.action = action
+        self.location = location.casefold() if location is not None else None
+        self.item = item.casefold() if item is not None else None
+        self.npc = npc.casefold() if npc is not None else None
+        self.when = when
+        self.order = order
+
+    def key(self) -> tuple:
+        """
+        method to choose the index entry the rule is found under: its Item if it has
+        one, otherwise its NPC, otherwise its Location, otherwise just its kind
+        :return: tuple - the key in RuleEngine.index
+        """
+        if self.item is not None:
+            return self.kind, _ITEM, self.item
+        if self.npc is not None:
+            return self.kind, _NPC, self.npc
+        if self.location is not None:
+            return self.kind, _LOCATION, self.location
+        return self.kind, None, None
+
+    def matches(self, game, trigger: Trigger) -> bool:
+        """
+        method to check the rule against a trigger found under its index entry
+        :param game: Game - the game
+        :param trigger: Trigger - what happened
+        :return: bool - True if the rule should run
+        """
+        if self.location is not None and _key(trigger, _LOCATION) != self.location:
+            return False
+        if self.item is not None and _key(trigger, _ITEM) != self.item:
+            return False
+        if self.npc is not None and _key(trigger, _NPC) != self.npc:
+            return False
+        return self.when is None or self.when(game, trigger)
+
+
+def _key(trigger: Trigger, what: str) -> str | None:
+    """
+    Finds the case-folded name of the Location, Item or NPC of a trigger, None if it has none.
+    """
+    if what == _LOCATION:
+        return trigger.location.get_name().casefold() if trigger.location is not None else None
+    if what == _ITEM:
+        return trigger.name.casefold() if trigger.name is not None else None
+    return trigger.npc.get_name().casefold() if trigger.npc is not None else None
+
+
+class RuleEngine:
+    """
+    RuleEngine class holds the rules of a game and runs the ones that match each trigger.
+
+    Attributes:
+        index: dict[tuple, list[Rule]] - the rules by kind and by the name of the Item,
+            NPC or Location they are about (see Rule.key), each list in the order added
+        keyed: dict[str, dict[str | None, int]] - how many rules of each kind there are under
+            each of item, npc, location and None (just the kind), so a trigger only works out
+            the names it has rules for, and a trigger of a kind without rules costs one lookup
+        added: int - number of rules ever added
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.index = {}
+        self.keyed = {}
+        self.added = 0
+
+    def __len__(self) -> int:
+        """
+        method to count the rules
+        :return: int - number of rules
+        """
+        return sum(sum(counts.values()) for counts in self.keyed.values())
+
+    def add(self, kind: str, action, location: str = None, item: str = None, npc: str = None,
+            when=None) -> Rule:
+        """
+        method to add a rule
+        :param kind: str - the kind of trigger it runs for, one of KINDS
+        :param action: callable - what it does, called with the Game and the Trigger
+        :param location: str - name of the Location it is about, None for any
+        :param item: str - name of the Item it is about, None for any
+        :param npc: str - name of the NPC it is about, None for any
+        :param when: callable - condition, called with the Game and the Trigger, None to always run
+            Raises: ValueError if kind is not one of KINDS
+        :return: Rule - the rule, which can be removed
+        """
+        if kind not in KINDS:
+            raise ValueError(f'{kind} is not a kind of rule!')
+        rule = Rule(kind, action, location, item, npc, when, self.added)
+        self.added += 1
+        key = rule.key()
+        self.index.setdefault(key, []).append(rule)
+        counts = self.keyed.setdefault(kind, {})
+        counts[key[1]] = counts.get(key[1], 0) + 1
+        return rule
+
+    def remove(self, rule: Rule) -> None:
+        """
+        method to remove a rule
+        :param rule: Rule - a rule from this engine
+            Raises: ValueError if the rule is not in this engine
+        """
+        key = rule.key()
+        rules = self.index.get(key, [])
+        if rule not in rules:
+            raise ValueError('That rule is not in this engine!')
+        rules.remove(rule)
+        if not rules:
+            del self.index[key]
+        counts = self.keyed[rule.kind]
+        counts[key[1]] -= 1
+        if not counts[key[1]]:
+            del counts[key[1]]
+
+    def fire(self, game, trigger: Trigger) -> int:
+        """
+        method to run every rule that matches a trigger, in the order they were added
+        :param game: Game - the game it happened in
+        :param trigger: Trigger - what happened
+        :return: int - how many rules ran
+        """
+        counts = self.keyed.get(trigger.kind)
+        if not counts:
+            return 0
+        found = None
+        merged = False
+        for what in counts:
+            rules = self.index.get((trigger.kind, what, _key(trigger, what) if what is not None else None))
+            if rules:
+                merged = found is not None
+                found = rules if found is None else found + rules
+        if found is None:
+            return 0
+        if merged:
+            found = sorted(found, key=lambda rule: rule.order)
+        ran = 0
+        for rule in tuple(found):
+            if rule.matches(game, trigger):
+                rule.action(game, trigger)
+                ran += 1
+        return ran
@@ -0,0 +1,395 @@
+"""
+Save games - compact binary snapshots of a Game and an append-only journal of changes.
+
+A snapshot holds everything in a Game that changes while playing: the current
+location, the inventory, elf_needed_calories, count_num_fails, the visited
+Locations, the items that have been moved between rooms and each NPC's next
+message. current_weight is not stored because it is the inventory's running total.
+Locations, Items and NPCs of the World are stored as their position in it, so a
+save can only be restored into a Game playing the same World.
+
+The snapshot is a list of records, each one a part of the state:
+    header     - current location, calorie goal, calories needed, fails, game over
+    visited    - one bit per Location
+    inventory  - the player's items
+    room       - the items of one Location that has changed (one record per room)
+    npc        - the next message of one NPC that has been talked to (one record per NPC)
+A SaveJournal writes a full snapshot as a checkpoint, then each autosave appends
+only the records that changed since the last write.
+"""
+import os
+import struct
+import weakref
+import zlib
+
+from main import Game, Inventory, Item, World
+
+MAGIC = b'GVZK'
+VERSION = 1
+
+_FILE_HEADER = struct.Struct('<4sBI')      # magic, version, world fingerprint
+_RECORD_HEADER = struct.Struct('<BII')     # record kind, key, payload length
+_GAME_HEADER = struct.Struct('<Iiii?')     # location, calorie goal, calories needed, fails, game over
+_COUNT = struct.Struct('<I')
+_ITEM_BY_INDEX = struct.Struct('<BI')      # tag 0, index of the item in the world
+_ITEM_BY_VALUE = struct.Struct('<BhdHH')   # tag 1, calories, weight, name length, description length
+_NPC = struct.Struct('<I')                 # next message number
+
+# record kinds; a record with REMOVED added to its kind says that part of the state is gone
+HEADER = 1
+VISITED = 2
+INVENTORY = 3
+ROOM = 4
+NPC_MESSAGE = 5
+REMOVED = 0x80
+
+# journal frames: kind, payload length, then the payload and its crc32
+_FRAME_HEADER = struct.Struct('<BI')
+_CRC = struct.Struct('<I')
+CHECKPOINT = 1
+DELTA = 2
+
+
+class WorldCatalog:
+    """
+    WorldCatalog class numbers the Locations, Items and NPCs of a World, so saves
+    can refer to them by position.
+
+    Attributes:
+        locations: list[Location] - every Location, in the order they were loaded
+        items: list[Item] - every Item the world started with
+        npcs: list[NPC] - every NPC
+        location_numbers / item_numbers / npc_numbers: dict - the position of each one
+        fingerprint: int - checksum of the world's layout, to catch saves from another world
+    """
+
+    def __init__(self, world: World):
+        """
+        Constructor
+        :param world: World - the world to number
+        """
+        self.locations = list(world.locations.values())
+        self.items = []
+        self.npcs = []
+        for location in self.locations:
+            self.items.extend(location.get_inventory())
+            self.npcs.extend(location.get_npcs())
+        self.location_numbers = {location: number for number, location in enumerate(self.locations)}
+        self.item_numbers = {item: number for number, item in enumerate(self.items)}
+        self.npc_numbers = {npc: number for number, npc in enumerate(self.npcs)}
+        layout = '\n'.join(world.locations) + f'\n{len(self.items)}\n{len(self.npcs)}'
+        self.fingerprint = zlib.crc32(layout.encode('utf-8'))
+
+
+_catalogs = weakref.WeakKeyDictionary()
+
+
+def get_catalog(world: World) -> WorldCatalog:
+    """
+    Numbers a World once and reuses the numbering for every save of a game in it.
+    :param world: World - the world
+    :return: WorldCatalog - its numbering
+    """
+    catalog = _catalogs.get(world)
+    if catalog is None:
+        catalog = WorldCatalog(world)
+        _catalogs[world] = catalog
+    return catalog
+
+
+def encode_records(game: Game) -> dict[tuple[int, int], bytes]:
+    """
+    Encodes every part of a game's state as its own record.
+    :param game: Game - the game to save
+    :return: dict[tuple[int, int], bytes] - each record's payload by (kind, key)
+    """
+    catalog = get_catalog(game.world)
+    records = {
+        (HEADER, 0): _GAME_HEADER.pack(catalog.location_numbers[game.current_location], game.elf_calorie_goal,
+                                       game.elf_needed_calories, game.count_num_fails, game.game_over),
+        (VISITED, 0): _encode_visited(game, catalog),
+        (INVENTORY, 0): _encode_items(game.items, catalog),
+    }
+    for location, inventory in game.world_state.room_items.items():
+        records[(ROOM, catalog.location_numbers[location])] = _encode_items(inventory, catalog)
+    for npc, message_number in game.world_state.message_numbers.items():
+        records[(NPC_MESSAGE, catalog.npc_numbers[npc])] = _NPC.pack(message_number)
+    return records
+
+
+def _encode_visited(game: Game, catalog: WorldCatalog) -> bytes:
+    """
+    Encodes the visited Locations as a bitset, one bit per Location.
+    """
+    bits = bytearray((len(catalog.locations) + 7) // 8)
+    for location in game.visited:
+        number = catalog.location_numbers[location]
+        bits[number >> 3] |= 1 << (number & 7)
+    return bytes(bits)
+
+
+def _encode_items(inventory: Inventory, catalog: WorldCatalog) -> bytes:
+    """
+    Encodes a collection of items. Items of the world are stored by position, others
+    (such as the Magic Ransom Fudge) by value.
+    """
+    parts = [_COUNT.pack(len(inventory))]
+    for item in inventory:
+        number = catalog.item_numbers.get(item)
+        if number is not None:
+            parts.append(_ITEM_BY_INDEX.pack(0, number))
+        else:
+            name = item.get_name().encode('utf-8')
+            description = item.get_description().encode('utf-8')
+            parts.append(_ITEM_BY_VALUE.pack(1, item.get_calories(), item.get_weight(), len(name), len(description)))
+            parts.append(name)
+            parts.append(description)
+    return b''.join(parts)
+
+
+def _decode_items(payload: bytes, catalog: WorldCatalog) -> Inventory:
+    """
+    Decodes a collection of items written by _encode_items.
+    """
+    inventory = Inventory()
+    (count,), offset = _COUNT.unpack_from(payload), _COUNT.size
+    for _ in range(count):
+        if payload[offset] == 0:
+            _, number = _ITEM_BY_INDEX.unpack_from(payload, offset)
+            offset += _ITEM_BY_INDEX.size
+            inventory.add_item(catalog.items[number])
+        else:
+            _, calories, weight, name_length, description_length = _ITEM_BY_VALUE.unpack_from(payload, offset)
+            offset += _ITEM_BY_VALUE.size
+            name = payload[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            description = payload[offset:offset + description_length].decode('utf-8')
+            offset += description_length
+            inventory.add_item(Item(name, description, calories, weight))
+    return inventory
+
+
+def _pack_records(records: dict[tuple[int, int], bytes], removed=()) -> bytes:
+    """
+    Joins records (and markers for removed ones) into one block of bytes.
+    """
+    parts = []
+    for (kind, key), payload in records.items():
+        parts.append(_RECORD_HEADER.pack(kind, key, len(payload)))
+        parts.append(payload)
+    for kind, key in removed:
+        parts.append(_RECORD_HEADER.pack(kind | REMOVED, key, 0))
+    return b''.join(parts)
+
+
+def _unpack_records(data: bytes, offset: int, records: dict[tuple[int, int], bytes], end: int = None) -> None:
+    """
+    Reads records from data, up to end (the end of data if not given), into a dict,
+    replacing or removing earlier ones.
+    """
+    if end is None:
+        end = len(data)
+    while offset < end:
+        kind, key, length = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+        if kind & REMOVED:
+            records.pop((kind & ~REMOVED, key), None)
+        else:
+            records[(kind, key)] = data[offset:offset + length]
+            offset += length
+
+
+def apply_records(game: Game, records: dict[tuple[int, int], bytes]) -> None:
+    """
+    Replaces the state of a game with the state in the records.
+    :param game: Game - a game playing the world the records were saved from
+    :param records: dict[tuple[int, int], bytes] - the records, see encode_records
+        Raises: ValueError if the records are not a complete save
+    """
+    catalog = get_catalog(game.world)
+    try:
+        location_number, goal, needed, fails, game_over = _GAME_HEADER.unpack(records[(HEADER, 0)])
+        visited_bits = records[(VISITED, 0)]
+        inventory = _decode_items(records[(INVENTORY, 0)], catalog)
+    except (KeyError, struct.error) as error:
+        raise ValueError('The save is not complete!') from error
+
+    game.current_location = catalog.locations[location_number]
+    game.elf_calorie_goal = goal
+    game.elf_needed_calories = needed
+    game.count_num_fails = fails
+    game.game_over = game_over
+    game.items = inventory
+    game.visited = {location for number, location in enumerate(catalog.locations)
+                    if visited_bits[number >> 3] & (1 << (number & 7))}
+    game.world_state.clear()
+    for (kind, key), payload in records.items():
+        if kind == ROOM:
+            game.world_state.room_items[catalog.locations[key]] = _decode_items(payload, catalog)
+        elif kind == NPC_MESSAGE:
+            game.world_state.message_numbers[catalog.npcs[key]] = _NPC.unpack(payload)[0]
+    game.turn_events = []
+
+
+def snapshot(game: Game) -> bytes:
+    """
+    Saves the whole state of a game.
+    :param game: Game - the game to save
+    :return: bytes - the save
+    """
+    header = _FILE_HEADER.pack(MAGIC, VERSION, get_catalog(game.world).fingerprint)
+    return header + _pack_records(encode_records(game))
+
+
+def _check_file_header(data: bytes, world: World) -> int:
+    """
+    Checks that a save or journal was written by this version for this world.
+    :return: int - where the records start
+    """
+    if len(data) < _FILE_HEADER.size:
+        raise ValueError('This is not a GV Zork save!')
+    magic, version, fingerprint = _FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('This is not a GV Zork save!')
+    if version != VERSION:
+        raise ValueError(f'Saves of version {version} cannot be read!')
+    if fingerprint != get_catalog(world).fingerprint:
+        raise ValueError('This save is from a different world!')
+    return _FILE_HEADER.size
+
+
+def restore(game: Game, data: bytes) -> None:
+    """
+    Replaces the state of a game with a saved one.
+    :param game: Game - a game playing the world the save came from
+    :param data: bytes - a save made by snapshot
+        Raises: ValueError if the save is damaged or from another world
+    """
+    records = {}
+    try:
+        _unpack_records(data, _check_file_header(data, game.world), records)
+    except struct.error as error:
+        raise ValueError('The save is damaged!') from error
+    apply_records(game, records)
+
+
+def load_game(data: bytes, world: World = None) -> Game:
+    """
+    Makes a new Game from a save.
+    :param data: bytes - a save made by snapshot
+    :param world: World - the world the game was played in, the shared GV Zork world if not given
+    :return: Game - the restored game
+    """
+    game = Game(world)
+    restore(game, data)
+    return game
+
+
+class SaveJournal:
+    """
+    SaveJournal class keeps one game's saves in an append-only file.
+
+    checkpoint() starts the file again with a full snapshot. autosave() appends a
+    frame holding only the records that are different from what the file already
+    says, which is usually just the header and one or two rooms. Each frame has a
+    checksum, so a frame cut short by a crash is ignored when the journal is read,
+    and cut off the file so the next autosave follows the last good frame.
+
+    Attributes:
+        path: str - the journal file
+        written: dict[tuple[int, int], bytes] - the records the file holds so far
+        sync: bool - whether each write is forced to disk with fsync
+    """
+
+    def __init__(self, path: str, sync: bool = False):
+        """
+        Constructor
+        :param path: str - the journal file
+        :param sync: bool - force each write to disk with fsync (slower, survives power loss)
+        """
+        self.path = path
+        self.sync = sync
+        self.written = None
+
+    def checkpoint(self, game: Game) -> int:
+        """
+        method to replace the journal with a full snapshot of the game
+        :param game: Game - the game to save
+        :return: int - number of bytes written
+        """
+        records = encode_records(game)
+        header = _FILE_HEADER.pack(MAGIC, VERSION, get_catalog(game.world).fingerprint)
+        data = header + _frame(CHECKPOINT, _pack_records(records))
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+            self._sync(file)
+        os.replace(temporary, self.path)
+        self.written = records
+        return len(data)
+
+    def autosave(self, game: Game) -> int:
+        """
+        method to append what has changed since the last write; the first call
+        writes a checkpoint instead
+        :param game: Game - the game to save
+        :return: int - number of bytes written, 0 if nothing had changed
+        """
+        if self.written is None:
+            return self.checkpoint(game)
+        records = encode_records(game)
+        changed = {key: payload for key, payload in records.items() if self.written.get(key) != payload}
+        removed = [key for key in self.written if key not in records]
+        if not changed and not removed:
+            return 0
+        data = _frame(DELTA, _pack_records(changed, removed))
+        with open(self.path, 'ab') as file:
+            file.write(data)
+            self._sync(file)
+        self.written = records
+        return len(data)
+
+    def _sync(self, file) -> None:
+        """
+        method to force a file's writes to disk, if sync is on
+        """
+        if self.sync:
+            file.flush()
+            os.fsync(file.fileno())
+
+    def load(self, world: World = None) -> Game:
+        """
+        method to rebuild the game from the checkpoint and every complete delta after it
+        :param world: World - the world the game was played in, the shared GV Zork world if not given
+            Raises: ValueError if the journal is damaged or from another world
+        :return: Game - the restored game
+        """
+        game = Game(world)
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        offset = _check_file_header(data, game.world)
+        records = {}
+        while offset + _FRAME_HEADER.size <= len(data):
+            kind, length = _FRAME_HEADER.unpack_from(data, offset)
+            start = offset + _FRAME_HEADER.size
+            end = start + length
+            if end + _CRC.size > len(data) or _CRC.unpack_from(data, end)[0] != zlib.crc32(data[start:end]):
+                # the last write was cut short
+                break
+            if kind == CHECKPOINT:
+                records.clear()
+            _unpack_records(data, start, records, end)
+            offset = end + _CRC.size
+        apply_records(game, records)
+        if offset < len(data):
+            # cut off the damaged frame, or the next autosave would be appended after it and never read
+            os.truncate(self.path, offset)
+        self.written = records
+        return game
+
+
+def _frame(kind: int, payload: bytes) -> bytes:
+    """
+    Wraps a journal payload with its kind, length and checksum.
+    """
+    return _FRAME_HEADER.pack(kind, len(payload)) + payload + _CRC.pack(zlib.crc32(payload))
@@ -0,0 +1,323 @@
+"""
+GV Zork game server - hosts many independent games in one process.
+
+Each connection to the server plays its own Game, using the same commands as
+the terminal version. The protocol is plain lines of text: the client sends one
+command per line, and the server answers with that command's output followed by
+the 'What is your command? ' prompt, or with the ending once the game is over.
+
+With --log-dir, each game's seed and commands are written to its own event log
+there, so any session can be played again with replay.py. With --metrics, the
+count, latency and errors of every command are written to a file every
+--metrics-interval seconds (Prometheus text, or JSON if the file ends in .json).
+Every game has a time limit (main.TIME_LIMIT); the deadlines of all the games are
+kept in one TimerHeap, driven by a single task, which ends each game the moment
+its time runs out.
+With --dialogue, the NPCs' messages are read from a memory-mapped dialogue file
+(written there if needed) that every server process on the machine shares.
+Games are kept in a sessions.SessionStore: with --max-sessions or --max-memory, the
+games of the players idle longest are written to --session-dir (a temporary
+directory if not given) and read back at their next command. Its counters are
+written with the command metrics.
+
+Usage: python server.py [--host HOST] [--port PORT] [--unix PATH] [--log-dir DIR]
+                        [--metrics FILE] [--metrics-interval SECONDS] [--dialogue FILE]
+                        [--max-sessions N] [--max-memory MB] [--session-dir DIR]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import signal
+
+import planner
+from main import Game, World, shared_world
+from metrics import CommandMetrics
+from render import OutputBuffer, StreamSink, TextRenderer
+from replay import EventLog
+from sessions import SessionStore
+from timers import TimerHeap
+
+PROMPT = 'What is your command? '
+# longest command line a client may send, in bytes
+MAX_LINE = 1024
+# stop handling a client's commands while this much output is still waiting to be sent to it
+WRITE_BUFFER_HIGH = 64 * 1024
+# how long a client gets to receive the goodbye message when the server shuts down
+SHUTDOWN_FLUSH_SECONDS = 5
+
+
+class GameServer:
+    """
+    GameServer class accepts connections and plays one Game for each of them,
+    all in a single asyncio event loop.
+
+    Commands are carried out with Game.execute and the Result is rendered to
+    text for the player, so no game ever prints.
+
+    Attributes:
+        world: World - the frozen world every game is played in
+        renderer: TextRenderer - turns each command's Result into text
+        sessions: dict[asyncio.StreamWriter, int] - the session id of each connected player's game
+        store: SessionStore - the games, by session id
+        commands_run: int - number of commands carried out since the server started
+        server: asyncio.AbstractServer - the listening socket, None until started
+        log_dir: str - directory to write each game's event log in, None to keep no logs
+        games_started: int - number of games started, which also numbers the logs
+        metrics: CommandMetrics - measures the commands of every game, None to measure nothing
+        timers: TimerHeap - the deadline of every game being played
+        timers_changed: asyncio.Event - set when a deadline earlier than all the others is added
+        timer_task: asyncio.Task - the task that ends games when their time runs out, None until started
+    """
+
+    def __init__(self, world: World = None, log_dir: str = None, metrics: CommandMetrics = None,
+                 store: SessionStore = None):
+        """
+        Constructor
+        :param world: World - the world to play in, the shared GV Zork world if not given
+        :param log_dir: str - directory to write each game's event log in, None to keep no logs
+        :param metrics: CommandMetrics - measures the commands of every game, None to measure nothing
+        :param store: SessionStore - where to keep the games, one that keeps them all in memory if not given;
+            its new_game is replaced by the server's
+        """
+        self.world = world if world is not None else shared_world()
+        self.log_dir = log_dir
+        self.metrics = metrics
+        self.store = store if store is not None else SessionStore(self.world)
+        self.store.new_game = self.new_game
+        self.games_started = 0
+        self.renderer = TextRenderer()
+        self.sessions = {}
+        self.commands_run = 0
+        self.server = None
+        self.timers = TimerHeap()
+        self.timers_changed = asyncio.Event()
+        self.timer_task = None
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 4000) -> None:
+        """
+        method to start listening on a TCP port
+        :param host: str - address to listen on
+        :param port: int - port to listen on
+        """
+        self.server = await asyncio.start_server(self.handle_client, host, port,
+                                                 limit=MAX_LINE, backlog=4096)
+        self.timer_task = asyncio.create_task(self.run_timers())
+
+    async def start_unix(self, path: str) -> None:
+        """
+        method to start listening on a Unix socket
+        :param path: str - path of the socket file
+        """
+        self.server = await asyncio.start_unix_server(self.handle_client, path,
+                                                      limit=MAX_LINE, backlog=4096)
+        self.timer_task = asyncio.create_task(self.run_timers())
+
+    async def run_timers(self) -> None:
+        """
+        method that ends every game whose time has run out, as it runs out, until it is cancelled
+        """
+        await self.timers.run(self.timers_changed)
+
+    def new_game(self) -> Game:
+        """
+        method to make a Game with the server's settings
+        :return: Game - a game in the server's world, measured by its metrics
+        """
+        game = Game(self.world)
+        game.metrics = self.metrics
+        return game
+
+    def add_deadline(self, session_id: int, reader: asyncio.StreamReader, out: OutputBuffer):
+        """
+        method to end a game when its time runs out: the player is shown the ending and
+        the game's handler stops waiting for input
+        :param session_id: int - a game that has started, in the store
+        :param reader: asyncio.StreamReader - lines from the game's client
+        :param out: OutputBuffer - output to the game's client
+        :return: Timer - the game's timer, None if it has no deadline
+        """
+        game = self.store.get(session_id)
+        if game.deadline is None:
+            return None
+
+        def time_up():
+            self.renderer.render_to(self.store.get(session_id).time_up(), out)
+            out.flush()
+            reader.feed_eof()
+
+        earliest = self.timers.next_deadline()
+        timer = self.timers.schedule(game.deadline, time_up)
+        if earliest is None or game.deadline < earliest:
+            self.timers_changed.set()
+        return timer
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        method that plays one Game with a connected client until the game ends or the
+        client leaves
+        :param reader: asyncio.StreamReader - lines from the client
+        :param writer: asyncio.StreamWriter - output to the client
+        """
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        game = self.new_game()
+        self.games_started += 1
+        log_file = None
+        if self.log_dir is not None:
+            log_file = open(os.path.join(self.log_dir, f'game-{self.games_started}.jsonl'), 'w')
+            game.log = EventLog(log_file)
+        session_id = self.store.add(game)
+        self.sessions[writer] = session_id
+        out = OutputBuffer(StreamSink(writer, 'utf-8'))
+        timer = None
+        game_over = False
+        try:
+            self.renderer.render_to(game.start(), out)
+            # the game is only looked up by its id from now on, so the store can evict it while the player is idle
+            del game
+            timer = self.add_deadline(session_id, reader, out)
+            out.write(PROMPT)
+            await self.send(writer, out)
+            while not game_over:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # readline has already thrown away the line that was too long
+                    out.write('That command is too long\n\n' + PROMPT)
+                    await self.send(writer, out)
+                    continue
+                if not line:
+                    break
+                game = self.store.checkout(session_id)
+                try:
+                    self.renderer.render_to(game.execute(line.decode('utf-8', 'replace')), out)
+                    game_over = game.game_over
+                finally:
+                    del game
+                    self.store.checkin(session_id)
+                self.commands_run += 1
+                if not game_over:
+                    out.write(PROMPT)
+                await self.send(writer, out)
+        except ConnectionError:
+            pass
+        finally:
+            if timer is not None:
+                self.timers.cancel(timer)
+            del self.sessions[writer]
+            self.store.remove(session_id)
+            if log_file is not None:
+                log_file.close()
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    @staticmethod
+    async def send(writer: asyncio.StreamWriter, out: OutputBuffer) -> None:
+        """
+        method to send a turn's text to a client in one write, waiting while the client
+        is behind on reading
+        :param writer: asyncio.StreamWriter - output to the client
+        :param out: OutputBuffer - the turn's text, which writes to the client
+        """
+        out.flush()
+        await writer.drain()
+
+    async def shutdown(self) -> None:
+        """
+        method to stop the server: no new connections are accepted, every connected
+        player is told the server is closing, and their remaining output is flushed
+        before the connection is closed
+        """
+        if self.server is not None:
+            self.server.close()
+        if self.timer_task is not None:
+            self.timer_task.cancel()
+        writers = list(self.sessions)
+        for writer in writers:
+            writer.write(b'\nThe server is shutting down. GAME OVER\n')
+        await asyncio.gather(*(self._flush_and_close(writer) for writer in writers))
+        if self.server is not None:
+            await self.server.wait_closed()
+        self.store.close()
+
+    @staticmethod
+    async def _flush_and_close(writer: asyncio.StreamWriter) -> None:
+        """
+        method to send what is left in a client's buffer, then close the connection
+        :param writer: asyncio.StreamWriter - output to the client
+        """
+        with contextlib.suppress(ConnectionError, asyncio.TimeoutError):
+            await asyncio.wait_for(writer.drain(), SHUTDOWN_FLUSH_SECONDS)
+        writer.close()
+
+
+async def serve(host: str, port: int, unix_path: str = None, log_dir: str = None,
+                metrics_path: str = None, metrics_interval: float = 15, dialogue_path: str = None,
+                max_sessions: int = None, max_bytes: int = None, session_dir: str = None) -> None:
+    """
+    Runs a GameServer until the process is interrupted or terminated.
+    :param host: str - address to listen on
+    :param port: int - TCP port to listen on
+    :param unix_path: str - path of a Unix socket to listen on instead of TCP
+    :param log_dir: str - directory to write each game's event log in, None to keep no logs
+    :param metrics_path: str - file to write the command metrics to, None to measure nothing
+    :param metrics_interval: float - seconds between writes of the metrics file
+    :param dialogue_path: str - dialogue file to share the NPCs' messages through, None to keep them in memory
+    :param max_sessions: int - most games to keep in memory, None for no limit
+    :param max_bytes: int - most bytes of game state to keep in memory, None for no limit
+    :param session_dir: str - directory to write the games that do not fit to, a temporary one if not given
+    """
+    world = shared_world(dialogue_path=dialogue_path)
+    planner.prepare(world)
+    store = SessionStore(world, session_dir, max_sessions, max_bytes)
+    metrics = CommandMetrics() if metrics_path else None
+    if metrics:
+        metrics.add_source('sessions', store)
+    game_server = GameServer(world, log_dir=log_dir, metrics=metrics, store=store)
+    if unix_path:
+        await game_server.start_unix(unix_path)
+        print(f'GV Zork server listening on {unix_path}')
+    else:
+        await game_server.start_tcp(host, port)
+        print(f'GV Zork server listening on {host}:{port}')
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+    while not stop.is_set():
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), metrics_interval if metrics else None)
+        if metrics:
+            metrics.write(metrics_path)
+    print(f'Shutting down with {len(game_server.sessions)} players connected, '
+          f'{game_server.commands_run} commands run')
+    await game_server.shutdown()
+    if metrics:
+        metrics.write(metrics_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Host many GV Zork games in one process.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=4000, help='TCP port to listen on')
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead of TCP')
+    parser.add_argument('--log-dir', metavar='DIR', help='write an event log of every game in this directory')
+    parser.add_argument('--metrics', metavar='FILE', help='write command metrics to this file (.json for JSON)')
+    parser.add_argument('--metrics-interval', type=float, default=15, metavar='SECONDS',
+                        help='how often to write the metrics file')
+    parser.add_argument('--dialogue', metavar='FILE', help='share the NPCs\' messages through this memory-mapped file')
+    parser.add_argument('--max-sessions', type=int, metavar='N', help='most games to keep in memory')
+    parser.add_argument('--max-memory', type=float, metavar='MB', help='most megabytes of game state to keep in memory')
+    parser.add_argument('--session-dir', metavar='DIR', help='write the games that do not fit in memory here')
+    args = parser.parse_args()
+    if args.log_dir:
+        os.makedirs(args.log_dir, exist_ok=True)
+    max_bytes = int(args.max_memory * 1024 * 1024) if args.max_memory else None
+    asyncio.run(serve(args.host, args.port, args.unix, args.log_dir, args.metrics, args.metrics_interval,
+                      args.dialogue, args.max_sessions, max_bytes, args.session_dir))
+
+
+if __name__ == '__main__':
+    main()
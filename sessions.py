@@ -0,0 +1,312 @@
+"""
+Session store - keeps as many games in memory as a budget allows, and the rest on disk.
+
+Most players of a server sit idle between commands for minutes at a time. A
+SessionStore holds every game by a session id; when the games in memory go over
+the budget (a number of games, a number of bytes as measured by
+Game.session_footprint, or both), the games used least recently are written to
+disk and dropped from memory. The next time such a game is asked for, it is read
+back into a new Game, without the player noticing anything but a short delay.
+
+A game on disk is its savegame.snapshot, after a small header holding what a save
+leaves out but a game being played needs: its seed, its deadline, its weight limit
+and the state of its random generator. Only the game's event log, if it has one,
+stays in memory.
+
+The store counts hits (games found in memory), misses (games read back from disk)
+and evictions, and times every read from disk, giving the 99th percentile. These
+can be added to a CommandMetrics, so they are written with the command metrics.
+"""
+import math
+import os
+import shutil
+import struct
+import tempfile
+import time
+from array import array
+from collections import OrderedDict, deque
+
+import savegame
+from main import Game, World
+
+# seed, deadline (NaN for none), weight limit, random generator version (0 for none),
+# whether a Gaussian is waiting, the Gaussian
+_SESSION_HEADER = struct.Struct('<QddB?d')
+# how many of the latest reads from disk the percentile is worked out from
+REHYDRATE_SAMPLES = 10000
+
+
+class SessionStore:
+    """
+    SessionStore class holds games by session id, evicting the least recently used
+    to disk when there are more in memory than its budget allows.
+
+    Attributes:
+        world: World - the world every game is played in
+        new_game: callable - makes a Game with the server's settings, for a game being read back
+        directory: str - where evicted games are written, None until the first is if none was given
+        temporary: bool - True if the directory is a temporary one, deleted when the store is closed
+        max_sessions: int - most games to keep in memory, None for no limit
+        max_bytes: int - most bytes of game state to keep in memory, None for no limit
+        resident: OrderedDict[int, Game] - the games in memory, least recently used first
+        sizes: dict[int, int] - the size of each game in memory when it was last measured
+        resident_bytes: int - the sizes added up
+        evicted: dict[int, EventLog] - the log of each game on disk, or None if it has none
+        pinned: set[int] - the games in use, which are not evicted
+        next_id: int - the id the next game added will get
+        hits: int - games asked for that were in memory
+        misses: int - games asked for that had to be read from disk
+        evictions: int - games written to disk
+        rehydrate_seconds: deque[float] - how long the latest reads from disk took
+        rehydrate_total: float - how long every read from disk took, added up
+    """
+
+    def __init__(self, world: World, directory: str = None, max_sessions: int = None, max_bytes: int = None,
+                 new_game=None):
+        """
+        Constructor
+        :param world: World - the world every game is played in
+        :param directory: str - where to write evicted games, a new temporary directory if not given
+        :param max_sessions: int - most games to keep in memory, None for no limit
+        :param max_bytes: int - most bytes of game state to keep in memory, None for no limit
+        :param new_game: callable - makes a Game for a game read back from disk, Game(world) if not given
+            Raises: ValueError if a limit is less than 1
+        """
+        if (max_sessions is not None and max_sessions < 1) or (max_bytes is not None and max_bytes < 1):
+            raise ValueError('A session budget must be at least 1!')
+        self.world = world
+        self.new_game = new_game if new_game is not None else lambda: Game(world)
+        self.temporary = directory is None
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.resident = OrderedDict()
+        self.sizes = {}
+        self.resident_bytes = 0
+        self.evicted = {}
+        self.pinned = set()
+        self.next_id = 1
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rehydrate_seconds = deque(maxlen=REHYDRATE_SAMPLES)
+        self.rehydrate_total = 0.0
+
+    def __len__(self) -> int:
+        """
+        method to count the games, in memory and on disk
+        :return: int - number of games
+        """
+        return len(self.resident) + len(self.evicted)
+
+    def __contains__(self, session_id: int) -> bool:
+        """
+        method to check whether the store has a game, in memory or on disk
+        :param session_id: int - the game's session id
+        :return: bool - True if it has
+        """
+        return session_id in self.resident or session_id in self.evicted
+
+    def add(self, game: Game) -> int:
+        """
+        method to start keeping a game
+        :param game: Game - the game
+        :return: int - its session id
+        """
+        session_id = self.next_id
+        self.next_id += 1
+        self.resident[session_id] = game
+        self._measure(session_id, game)
+        self.evict()
+        return session_id
+
+    def get(self, session_id: int) -> Game:
+        """
+        getter for a game, reading it back from disk if it was evicted; it becomes the most recently used
+            Raises: KeyError if the store does not have the game
+        :param session_id: int - the game's session id
+        :return: Game - the game
+        """
+        game = self.resident.get(session_id)
+        if game is not None:
+            self.hits += 1
+            self.resident.move_to_end(session_id)
+            return game
+        log = self.evicted.pop(session_id)
+        self.misses += 1
+        started = time.perf_counter()
+        game = self._read(session_id, log)
+        elapsed = time.perf_counter() - started
+        self.rehydrate_seconds.append(elapsed)
+        self.rehydrate_total += elapsed
+        self.resident[session_id] = game
+        self._measure(session_id, game)
+        self.evict()
+        return game
+
+    def checkout(self, session_id: int) -> Game:
+        """
+        method to get a game and keep it in memory while it is being used, until it is checked in
+        :param session_id: int - the game's session id
+        :return: Game - the game
+        """
+        self.pinned.add(session_id)
+        return self.get(session_id)
+
+    def checkin(self, session_id: int) -> None:
+        """
+        method to say a game is no longer being used; it is measured again, as its command may have changed it
+        :param session_id: int - the game's session id
+        """
+        self.pinned.discard(session_id)
+        game = self.resident.get(session_id)
+        if game is not None:
+            self._measure(session_id, game)
+            self.evict()
+
+    def remove(self, session_id: int) -> None:
+        """
+        method to stop keeping a game, in memory or on disk; removing it again does nothing
+        :param session_id: int - the game's session id
+        """
+        self.pinned.discard(session_id)
+        if self.resident.pop(session_id, None) is not None:
+            self.resident_bytes -= self.sizes.pop(session_id)
+        elif session_id in self.evicted:
+            del self.evicted[session_id]
+            os.remove(self._path(session_id))
+
+    def evict(self) -> int:
+        """
+        method to write the least recently used games that are not in use to disk until
+        the games in memory are within the budget
+        :return: int - how many games were evicted
+        """
+        evicted = 0
+        for session_id in list(self.resident):
+            if not self._over_budget():
+                break
+            if session_id in self.pinned:
+                continue
+            self._write(session_id, self.resident.pop(session_id))
+            self.resident_bytes -= self.sizes.pop(session_id)
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def close(self) -> None:
+        """
+        method to forget every game, deleting the evicted ones from disk
+        """
+        for session_id in list(self.evicted):
+            self.remove(session_id)
+        self.resident.clear()
+        self.sizes.clear()
+        self.resident_bytes = 0
+        if self.temporary and self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def _over_budget(self) -> bool:
+        """
+        method to check whether the games in memory are more than the budget allows
+        """
+        return ((self.max_sessions is not None and len(self.resident) > self.max_sessions)
+                or (self.max_bytes is not None and self.resident_bytes > self.max_bytes))
+
+    def _measure(self, session_id: int, game: Game) -> None:
+        """
+        method to update the size of a game in memory, if there is a byte budget to keep to
+        """
+        size = game.session_footprint() if self.max_bytes is not None else 0
+        self.resident_bytes += size - self.sizes.get(session_id, 0)
+        self.sizes[session_id] = size
+
+    def _path(self, session_id: int) -> str:
+        """
+        method to name the file of an evicted game
+        """
+        return os.path.join(self.directory, f'{session_id}.session')
+
+    def _write(self, session_id: int, game: Game) -> None:
+        """
+        method to write a game to disk; only its log is kept in memory
+        """
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix='gvzork-sessions-')
+        deadline = game.deadline if game.deadline is not None else math.nan
+        state = game.rng_state
+        version, state, gauss = state if state is not None else (0, (), None)
+        header = _SESSION_HEADER.pack(game.seed, deadline, game.max_weight, version, gauss is not None, gauss or 0.0)
+        with open(self._path(session_id), 'wb') as file:
+            file.write(header + array('I', state).tobytes() + savegame.snapshot(game))
+        self.evicted[session_id] = game.log
+
+    def _read(self, session_id: int, log) -> Game:
+        """
+        method to read an evicted game back into a new Game, deleting its file
+        """
+        path = self._path(session_id)
+        with open(path, 'rb') as file:
+            data = file.read()
+        os.remove(path)
+        seed, deadline, max_weight, version, has_gauss, gauss = _SESSION_HEADER.unpack_from(data)
+        offset = _SESSION_HEADER.size
+        game = self.new_game()
+        game.seed = seed
+        game.max_weight = max_weight
+        if version:
+            state = array('I')
+            state.frombytes(data[offset:offset + 625 * state.itemsize])
+            offset += 625 * state.itemsize
+            game.rng_state = (version, tuple(state), gauss if has_gauss else None)
+        savegame.restore(game, data[offset:])
+        game.deadline = None if math.isnan(deadline) else deadline
+        game.log = log
+        return game
+
+    def rehydrate_percentile(self, percent: float = 99) -> float:
+        """
+        method to work out how long reads from disk took, from the latest REHYDRATE_SAMPLES
+        :param percent: float - the percentile, 99 for the time that 99% of reads took no longer than
+        :return: float - the time in seconds, 0.0 if no game has been read from disk
+        """
+        if not self.rehydrate_seconds:
+            return 0.0
+        ordered = sorted(self.rehydrate_seconds)
+        return ordered[min(len(ordered) - 1, math.ceil(len(ordered) * percent / 100) - 1)]
+
+    def snapshot(self) -> dict:
+        """
+        method to copy the counters into a dictionary, such as for JSON
+        :return: dict - every counter, and the 99th percentile of the time to read a game from disk
+        """
+        return {'resident': len(self.resident), 'evicted': len(self.evicted), 'resident_bytes': self.resident_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'rehydrate_seconds_total': self.rehydrate_total,
+                'rehydrate_seconds_p99': self.rehydrate_percentile(99)}
+
+    def to_prometheus(self, prefix: str) -> str:
+        """
+        method to write the counters in the Prometheus text format
+        :param prefix: str - the start of every metric's name
+        :return: str - the metrics, one per line
+        """
+        lines = []
+        for name, kind, text, value in (
+                ('sessions_resident', 'gauge', 'Games in memory.', len(self.resident)),
+                ('sessions_evicted', 'gauge', 'Games written to disk.', len(self.evicted)),
+                ('sessions_resident_bytes', 'gauge', 'Measured size of the games in memory.', self.resident_bytes),
+                ('session_hits_total', 'counter', 'Games asked for that were in memory.', self.hits),
+                ('session_misses_total', 'counter', 'Games asked for that were read from disk.', self.misses),
+                ('session_evictions_total', 'counter', 'Games written to disk.', self.evictions),
+                ('session_rehydrate_seconds_total', 'counter', 'Time spent reading games from disk.',
+                 self.rehydrate_total),
+                ('session_rehydrate_seconds_p99', 'gauge', '99th percentile of the time to read a game from disk.',
+                 self.rehydrate_percentile(99))):
+            lines.append(f'# HELP {prefix}_{name} {text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            lines.append(f'{prefix}_{name} {value}')
+        return '\n'.join(lines) + '\n'
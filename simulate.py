@@ -0,0 +1,536 @@
+"""
+Monte Carlo simulator - plays GV Zork many times with computer players to see how
+a change to the world (the calorie goal, the weight limit, where items are) affects
+the chance of winning and how long games last.
+
+A policy chooses each command the way a player would type it, and the game is run
+with Game.execute, so the simulated games follow exactly the same rules as real ones.
+The games are shared out between worker processes. Each worker loads the world
+once and plays every one of its games on a single Game, calling reset between them.
+Only running totals (a Stats) come back from the workers, never the games themselves,
+so memory does not grow with the number of games.
+
+Usage: python simulate.py [--games N] [--policy random|greedy|scripted] [--script FILE]
+                          [--goal CALORIES] [--max-weight LBS] [--world FILE]
+                          [--workers N] [--seed SEED] [--max-turns N] [--json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from random import Random
+
+import events
+from main import DEFAULT_WORLD_FILE, Game, Location, shared_world
+
+# how a simulated game can end
+WON = 'won'
+TOO_MANY_FAILS = 'too_many_fails'
+QUIT = 'quit'
+TURN_LIMIT = 'turn_limit'
+
+CLASSROOM = 'Posada\'s Classroom'
+# every simulated game sees the same time, so reading the clock costs nothing
+_SIMULATED_TIME = datetime(2024, 1, 1, 9, 0)
+
+
+def _simulated_clock() -> datetime:
+    """
+    Reads the clock of a simulated game, which always shows the same time.
+    :return: datetime - _SIMULATED_TIME
+    """
+    return _SIMULATED_TIME
+
+
+def find_path(start: Location, is_goal) -> list[str] | None:
+    """
+    Finds the shortest way from a Location to the nearest Location that passes a test.
+    :param start: Location - where to start
+    :param is_goal: callable - takes a Location, returns True if it is somewhere to go
+    :return: list[str] - the directions to go in, in order (empty if start passes the
+        test), or None if no such Location can be reached
+    """
+    came_from = {start: None}
+    queue = deque([start])
+    while queue:
+        location = queue.popleft()
+        if is_goal(location):
+            path = []
+            while came_from[location] is not None:
+                location, direction = came_from[location]
+                path.append(direction)
+            path.reverse()
+            return path
+        for direction, neighbor in location.get_locations().items():
+            if neighbor not in came_from:
+                came_from[neighbor] = (location, direction)
+                queue.append(neighbor)
+    return None
+
+
+class RandomPolicy:
+    """
+    RandomPolicy class plays like someone pressing keys at random: each turn it picks
+    any command that makes sense where it is, all with the same chance.
+    """
+    name = 'random'
+
+    def begin(self, game: Game, rng: Random) -> None:
+        """
+        method to get ready for a new game
+        :param game: Game - the game about to be played
+        :param rng: Random - the random generator to make choices with
+        """
+        self.rng = rng
+
+    def choices(self, game: Game) -> list[str]:
+        """
+        method to list every command that makes sense where the player is
+        :param game: Game - the game being played
+        :return: list[str] - the command lines, empty in a dead end with nothing to take, give or talk to
+        """
+        location = game.current_location
+        choices = ['go ' + direction.lower() for direction in location.get_locations()]
+        choices.extend('take ' + item.get_name().lower() for item in game.world_state.get_inventory(location))
+        choices.extend('give ' + item.get_name().lower() for item in game.items)
+        choices.extend('talk ' + npc.get_name().lower() for npc in location.get_npcs())
+        if location.get_npcs() and game.items.find_item('newborn baby') is not None:
+            choices.append('ransom newborn baby')
+        return choices
+
+    def choose(self, game: Game) -> str:
+        """
+        method to choose the next command
+        :param game: Game - the game being played
+        :return: str - the command line to type, look if nothing else makes sense
+        """
+        choices = self.choices(game)
+        if not choices:
+            return 'look'
+        return self.rng.choice(choices)
+
+
+class GreedyCaloriesPolicy:
+    """
+    GreedyCaloriesPolicy class plays like someone who knows the map and grabs the
+    food with the most calories they can carry, then takes it to class once they have
+    enough (or once there is no more food they can reach).
+    """
+    name = 'greedy'
+
+    def begin(self, game: Game, rng: Random) -> None:
+        """
+        method to get ready for a new game
+        :param game: Game - the game about to be played
+        :param rng: Random - not used, the policy always makes the same choice
+        """
+        self.path = deque()
+
+    def choose(self, game: Game) -> str:
+        """
+        method to choose the next command
+        :param game: Game - the game being played
+        :return: str - the command line to type
+        """
+        location = game.current_location
+        food = [item for item in game.items if item.get_calories() > 0]
+        if location.get_name() == CLASSROOM and food:
+            return 'give ' + max(food, key=lambda item: item.get_calories()).get_name().lower()
+        if game.current_weight > game.max_weight:
+            # too heavy to move, so leave behind whatever is worth least for its weight
+            worst = min(game.items, key=lambda item: item.get_calories() / (item.get_weight() or 0.001))
+            return 'give ' + worst.get_name().lower()
+
+        room_food = self._food_that_fits(game, location)
+        if room_food and game.items.get_food_calories() < game.elf_needed_calories:
+            return 'take ' + max(room_food, key=lambda item: item.get_calories()).get_name().lower()
+
+        if self.path and self.path[0][0] is location:
+            return 'go ' + self.path.popleft()[1]
+        if game.items.get_food_calories() < game.elf_needed_calories:
+            path = find_path(location, lambda place: bool(self._food_that_fits(game, place)))
+        else:
+            path = None
+        if not path:
+            if not food:
+                return 'quit'
+            path = find_path(location, lambda place: place.get_name() == CLASSROOM)
+            if not path:
+                return 'quit'
+        self._follow(location, path)
+        return 'go ' + self.path.popleft()[1]
+
+    def _follow(self, location: Location, path: list[str]) -> None:
+        """
+        method to remember a path, with the Location each step is taken from
+        """
+        self.path.clear()
+        for direction in path:
+            self.path.append((location, direction.lower()))
+            location = location.get_locations()[direction]
+
+    @staticmethod
+    def _food_that_fits(game: Game, location: Location) -> list:
+        """
+        method to find the food in a Location the player could pick up and still move,
+        leaving alone the food already given to Posada
+        """
+        if location.get_name() == CLASSROOM:
+            return []
+        room_space = game.max_weight - game.current_weight
+        return [item for item in game.world_state.get_inventory(location)
+                if item.get_calories() > 0 and item.get_weight() <= room_space]
+
+
+class ScriptedPolicy:
+    """
+    ScriptedPolicy class types the same commands every game, then quits.
+
+    Attributes:
+        script: list[str] - the command lines, in order
+    """
+    name = 'scripted'
+
+    def __init__(self, script: list[str]):
+        """
+        Constructor
+        :param script: list[str] - the command lines, in order
+        """
+        self.script = script
+
+    def begin(self, game: Game, rng: Random) -> None:
+        """
+        method to get ready for a new game, from the start of the script
+        :param game: Game - the game about to be played
+        :param rng: Random - not used
+        """
+        self.position = 0
+
+    def choose(self, game: Game) -> str:
+        """
+        method to choose the next command
+        :param game: Game - the game being played
+        :return: str - the next line of the script, or 'quit' once it runs out
+        """
+        if self.position >= len(self.script):
+            return 'quit'
+        line = self.script[self.position]
+        self.position += 1
+        return line
+
+
+def make_policy(name: str, script: list[str] = None):
+    """
+    Makes a policy from its name.
+    :param name: str - random, greedy or scripted
+        Raises: ValueError if there is no policy with that name
+    :param script: list[str] - the command lines for the scripted policy
+    :return: the policy
+    """
+    if name == RandomPolicy.name:
+        return RandomPolicy()
+    if name == GreedyCaloriesPolicy.name:
+        return GreedyCaloriesPolicy()
+    if name == ScriptedPolicy.name:
+        return ScriptedPolicy(script or [])
+    raise ValueError(f'There is no policy called {name}!')
+
+
+class Stats:
+    """
+    Stats class keeps running totals for many simulated games. Stats from different
+    workers are combined with merge.
+
+    Attributes:
+        games: int - number of games played
+        outcomes: dict[str, int] - how many games ended each way (won, too_many_fails, quit, turn_limit)
+        turns: dict[int, int] - how many games lasted each number of turns
+        turns_total: int - turns taken in all games
+        teleports: int - times a player was sent away by Posada
+        rejected: int - items Posada refused
+        too_heavy: int - times a player could not move because of the weight limit
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.games = 0
+        self.outcomes = {}
+        self.turns = {}
+        self.turns_total = 0
+        self.teleports = 0
+        self.rejected = 0
+        self.too_heavy = 0
+
+    def add_game(self, outcome: str, turns: int) -> None:
+        """
+        method to count one finished game
+        :param outcome: str - how it ended
+        :param turns: int - how many commands were typed
+        """
+        self.games += 1
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.turns[turns] = self.turns.get(turns, 0) + 1
+        self.turns_total += turns
+
+    def merge(self, other: 'Stats') -> None:
+        """
+        method to add another Stats' totals to these
+        :param other: Stats - the totals to add
+        """
+        self.games += other.games
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+        for turns, count in other.turns.items():
+            self.turns[turns] = self.turns.get(turns, 0) + count
+        self.turns_total += other.turns_total
+        self.teleports += other.teleports
+        self.rejected += other.rejected
+        self.too_heavy += other.too_heavy
+
+    def get_win_rate(self) -> float:
+        """
+        getter for the share of games that were won
+        :return: float - between 0 and 1
+        """
+        return self.outcomes.get(WON, 0) / self.games if self.games else 0.0
+
+    def get_mean_turns(self) -> float:
+        """
+        getter for the average length of a game
+        :return: float - average number of turns
+        """
+        return self.turns_total / self.games if self.games else 0.0
+
+    def get_turns_percentile(self, percent: float) -> int:
+        """
+        getter for a percentile of the length of a game
+        :param percent: float - which percentile, from 0 to 100
+        :return: int - the number of turns that many percent of games were no longer than
+        """
+        wanted = percent / 100 * self.games
+        seen = 0
+        for turns in sorted(self.turns):
+            seen += self.turns[turns]
+            if seen >= wanted:
+                return turns
+        return 0
+
+    def as_dict(self) -> dict:
+        """
+        method to convert the totals into a dictionary, such as for JSON
+        :return: dict - the totals and the figures worked out from them
+        """
+        return {'games': self.games, 'win_rate': self.get_win_rate(), 'outcomes': dict(self.outcomes),
+                'mean_turns': self.get_mean_turns(), 'median_turns': self.get_turns_percentile(50),
+                'p95_turns': self.get_turns_percentile(95), 'teleports': self.teleports,
+                'rejected': self.rejected, 'too_heavy': self.too_heavy}
+
+
+class Simulation:
+    """
+    Simulation class holds what to simulate: the world, its settings and the policy.
+    It is sent to each worker process, which builds its own Game from it.
+
+    Attributes:
+        policy: str - name of the policy, see make_policy
+        script: list[str] - command lines for the scripted policy
+        world_path: str - the world file to play in
+        calorie_goal: int - calories Posada must be given
+        max_weight: float - the most a player can carry and still move
+        max_turns: int - games that last this long are stopped
+        seed: int - makes the whole simulation repeatable
+    """
+
+    def __init__(self, policy: str = GreedyCaloriesPolicy.name, script: list[str] = None,
+                 world_path: str = DEFAULT_WORLD_FILE, calorie_goal: int = 2000, max_weight: float = 30,
+                 max_turns: int = 500, seed: int = 0):
+        """
+        Constructor
+        :param policy: str - name of the policy, see make_policy
+        :param script: list[str] - command lines for the scripted policy
+        :param world_path: str - the world file to play in
+        :param calorie_goal: int - calories Posada must be given
+        :param max_weight: float - the most a player can carry and still move
+        :param max_turns: int - games that last this long are stopped
+        :param seed: int - makes the whole simulation repeatable
+        """
+        self.policy = policy
+        self.script = script
+        self.world_path = world_path
+        self.calorie_goal = calorie_goal
+        self.max_weight = max_weight
+        self.max_turns = max_turns
+        self.seed = seed
+
+
+class Simulator:
+    """
+    Simulator class plays games one after another on a single Game, in one process.
+
+    Attributes:
+        simulation: Simulation - what to simulate
+        game: Game - the game every simulated game is played on
+        policy: the policy choosing the commands
+        rng: Random - the policy's random generator
+    """
+
+    def __init__(self, simulation: Simulation):
+        """
+        Constructor
+        :param simulation: Simulation - what to simulate
+        """
+        self.simulation = simulation
+        self.game = Game(shared_world(simulation.world_path), clock=_simulated_clock)
+        self.game.elf_calorie_goal = simulation.calorie_goal
+        self.game.max_weight = simulation.max_weight
+        self.policy = make_policy(simulation.policy, simulation.script)
+        self.rng = Random()
+
+    def run(self, first: int, count: int) -> Stats:
+        """
+        method to play a run of games, numbered so every game gets its own seeds
+        :param first: int - number of the first game
+        :param count: int - how many games to play
+        :return: Stats - totals for the games
+        """
+        stats = Stats()
+        for number in range(first, first + count):
+            self.play_one(number, stats)
+        return stats
+
+    def play_one(self, number: int, stats: Stats) -> None:
+        """
+        method to play one game and add it to the totals
+        :param number: int - number of the game, which decides its seeds
+        :param stats: Stats - the totals to add to
+        """
+        game = self.game
+        game_seed = (self.simulation.seed << 32) + number
+        game.reset(game_seed * 2)
+        self.rng.seed(game_seed * 2 + 1)
+        self.policy.begin(game, self.rng)
+        outcome = TURN_LIMIT
+        turns = 0
+        while turns < self.simulation.max_turns:
+            turns += 1
+            for event in game.execute(self.policy.choose(game)).events:
+                kind = event.kind
+                if kind == events.TELEPORTED:
+                    stats.teleports += 1
+                elif kind == events.REJECTED_FOOD or kind == events.REJECTED_NON_FOOD:
+                    stats.rejected += 1
+                elif kind == events.TOO_HEAVY:
+                    stats.too_heavy += 1
+                elif kind == events.TOO_MANY_FAILS:
+                    outcome = TOO_MANY_FAILS
+                elif kind == events.QUIT:
+                    outcome = QUIT
+                elif kind == events.GAME_OVER and event['won']:
+                    outcome = WON
+            if game.game_over:
+                break
+        stats.add_game(outcome, turns)
+
+
+# the Simulator of a worker process, made once when the worker starts
+_worker_simulator = None
+
+
+def _start_worker(simulation: Simulation) -> None:
+    """
+    Gets a worker process ready, loading the world once for every chunk it will play.
+    :param simulation: Simulation - what to simulate
+    """
+    global _worker_simulator
+    _worker_simulator = Simulator(simulation)
+
+
+def _run_chunk(chunk: tuple[int, int]) -> Stats:
+    """
+    Plays a chunk of games in a worker process.
+    :param chunk: tuple[int, int] - the number of the first game and how many to play
+    :return: Stats - the totals of the chunk
+    """
+    return _worker_simulator.run(*chunk)
+
+
+def simulate(simulation: Simulation, games: int, workers: int = None, chunk_size: int = 2000,
+             on_progress=None) -> Stats:
+    """
+    Plays many games spread over a pool of worker processes, adding up the totals as
+    each chunk of games finishes.
+    :param simulation: Simulation - what to simulate
+    :param games: int - how many games to play
+    :param workers: int - number of processes, one per CPU if not given; 1 plays in this process
+    :param chunk_size: int - games a worker plays before sending back its totals
+    :param on_progress: callable - called with the Stats so far after each chunk, optional
+    :return: Stats - totals for every game
+    """
+    chunks = [(first, min(chunk_size, games - first)) for first in range(0, games, chunk_size)]
+    total = Stats()
+    if workers == 1:
+        simulator = Simulator(simulation)
+        for chunk in chunks:
+            total.merge(simulator.run(*chunk))
+            if on_progress is not None:
+                on_progress(total)
+        return total
+
+    with multiprocessing.Pool(workers or os.cpu_count(), initializer=_start_worker,
+                              initargs=(simulation,)) as pool:
+        for stats in pool.imap_unordered(_run_chunk, chunks):
+            total.merge(stats)
+            if on_progress is not None:
+                on_progress(total)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play GV Zork many times with computer players.')
+    parser.add_argument('--games', type=int, default=100000, help='number of games to play')
+    parser.add_argument('--policy', default=GreedyCaloriesPolicy.name,
+                        choices=[RandomPolicy.name, GreedyCaloriesPolicy.name, ScriptedPolicy.name])
+    parser.add_argument('--script', metavar='FILE', help='commands for the scripted policy, one per line')
+    parser.add_argument('--goal', type=int, default=2000, help='calories Posada must be given')
+    parser.add_argument('--max-weight', type=float, default=30, help='most a player can carry and still move')
+    parser.add_argument('--world', default=DEFAULT_WORLD_FILE, help='world file to play in')
+    parser.add_argument('--workers', type=int, help='number of processes, one per CPU by default')
+    parser.add_argument('--seed', type=int, default=0, help='seed that makes the simulation repeatable')
+    parser.add_argument('--max-turns', type=int, default=500, help='games that last this long are stopped')
+    parser.add_argument('--json', action='store_true', help='print the totals as JSON')
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script) as file:
+            script = [line.strip() for line in file if line.strip()]
+    simulation = Simulation(args.policy, script, args.world, args.goal, args.max_weight, args.max_turns, args.seed)
+
+    def progress(stats):
+        print(f'\r{stats.games}/{args.games} games', end='', file=sys.stderr)
+
+    started = time.perf_counter()
+    stats = simulate(simulation, args.games, args.workers, on_progress=progress)
+    elapsed = time.perf_counter() - started
+    print(f'\r{stats.games} games in {elapsed:.1f}s ({stats.games / elapsed:.0f} games/s)', file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(stats.as_dict(), indent=2))
+        return
+    print(f'Win rate: {stats.get_win_rate():.2%}')
+    for outcome, count in sorted(stats.outcomes.items()):
+        print(f'  {outcome}: {count}')
+    print(f'Turns: mean {stats.get_mean_turns():.1f}, median {stats.get_turns_percentile(50)}, '
+          f'95th percentile {stats.get_turns_percentile(95)}')
+    print(f'Teleports: {stats.teleports}, items rejected: {stats.rejected}, blocked by weight: {stats.too_heavy}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Tests for cluster: sessions stay on their worker, and move when it is restarted.
+"""
+import asyncio
+
+from cluster import SHUTDOWN_MESSAGE, Cluster
+from server import PROMPT
+
+
+async def _connect(path: str):
+    reader, writer = await asyncio.open_unix_connection(path)
+    intro = await _read_output(reader)
+    return reader, writer, intro
+
+
+async def _read_output(reader: asyncio.StreamReader) -> str:
+    return (await asyncio.wait_for(reader.readuntil(PROMPT.encode()), 10)).decode()
+
+
+async def _command(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, line: str) -> str:
+    writer.write(line.encode() + b'\n')
+    return await _read_output(reader)
+
+
+async def _commands_run(cluster: Cluster) -> list[int]:
+    counts = []
+    for handle in cluster.workers:
+        (_, _, stats), _ = await cluster.request(handle, 'stats')
+        counts.append(stats['commands'])
+    return counts
+
+
+def _run_cluster(tmp_path, body) -> None:
+    async def main():
+        path = str(tmp_path / 'cluster.sock')
+        cluster = Cluster(2)
+        await cluster.start(unix_path=path)
+        try:
+            await body(cluster, path)
+        finally:
+            await cluster.shutdown()
+
+    asyncio.run(main())
+
+
+def test_each_session_stays_on_its_worker(tmp_path):
+    async def body(cluster, path):
+        first_reader, first_writer, _ = await _connect(path)
+        second_reader, second_writer, _ = await _connect(path)
+        assert cluster.owners[1] is cluster.workers[0] and cluster.owners[2] is cluster.workers[1]
+        for _ in range(5):
+            await _command(first_reader, first_writer, 'look')
+        await _command(second_reader, second_writer, 'stats')
+        assert await _commands_run(cluster) == [5, 1]
+        for writer in (first_writer, second_writer):
+            writer.close()
+
+    _run_cluster(tmp_path, body)
+
+
+def test_restart_moves_the_game_to_another_worker(tmp_path):
+    async def body(cluster, path):
+        reader, writer, _ = await _connect(path)
+        hint = await _command(reader, writer, 'hint')
+        await _command(reader, writer, hint.split("'")[1])
+        before = await _command(reader, writer, 'look') + await _command(reader, writer, 'stats')
+        old_pid = cluster.workers[0].process.pid
+
+        await cluster.restart(0)
+        assert cluster.owners[1] is cluster.workers[1]
+        assert cluster.workers[0].process.pid != old_pid
+        after = await _command(reader, writer, 'look') + await _command(reader, writer, 'stats')
+        assert after == before
+        writer.close()
+
+    _run_cluster(tmp_path, body)
+
+
+def test_shutdown_sends_the_output_still_queued(tmp_path):
+    async def main():
+        path = str(tmp_path / 'cluster.sock')
+        cluster = Cluster(1)
+        await cluster.start(unix_path=path)
+        reader, writer, _ = await _connect(path)
+        # more output than the socket holds, so most of it waits in the worker until the client reads
+        writer.write(b'help\n' * 2000)
+        await asyncio.sleep(0.5)
+        stopping = asyncio.create_task(cluster.shutdown())
+        output = await asyncio.wait_for(reader.read(), 10)
+        await stopping
+        assert output.endswith(SHUTDOWN_MESSAGE)
+        writer.close()
+
+    asyncio.run(main())
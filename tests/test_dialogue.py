@@ -0,0 +1,31 @@
+"""
+Tests for dialogue: sharing the NPCs' messages through a mapped file.
+"""
+import dialogue
+from main import load_world_file
+
+
+def _messages(world) -> list[list[str]]:
+    return [list(npc.messages) for location in world.locations.values() for npc in location.get_npcs()]
+
+
+def test_map_dialogue_keeps_every_message(tmp_path):
+    path = str(tmp_path / 'world.dialogue')
+    expected = _messages(load_world_file())
+    world = load_world_file()
+    store = dialogue.map_dialogue(world, path)
+    assert _messages(world) == expected
+    store.close()
+
+
+def test_map_dialogue_rewrites_a_file_that_cannot_be_decoded(tmp_path):
+    path = str(tmp_path / 'world.dialogue')
+    expected = _messages(load_world_file())
+    dialogue.map_dialogue(load_world_file(), path).close()
+    with open(path, 'r+b') as file:
+        file.write(b'\xff\xfe')
+
+    world = load_world_file()
+    store = dialogue.map_dialogue(world, path)
+    assert _messages(world) == expected
+    store.close()
@@ -0,0 +1,60 @@
+"""
+Tests for grammar: prefixes, aliases and several commands on a line.
+"""
+import pytest
+
+from grammar import OPTIONAL_ARGUMENT, REQUIRED_ARGUMENT, CommandGrammar, ParseError
+from main import GRAMMAR
+
+
+def _parsed(line: str) -> list[tuple]:
+    return [(command.name, command.argument) for command in GRAMMAR.parse(line)]
+
+
+def test_unique_prefixes_stand_for_their_command():
+    assert _parsed('tak Chocolate  Fudge') == [('take', 'chocolate fudge')]
+    assert _parsed('gi bagel') == [('give', 'bagel')]
+    assert _parsed('st') == [('stats', None)]
+
+
+def test_a_full_name_wins_over_a_longer_command_it_starts():
+    assert _parsed('go north') == [('go', 'north')]
+    assert _parsed('got fudge shop') == [('goto', 'fudge shop')]
+
+
+def test_shared_prefix_is_ambiguous():
+    with pytest.raises(ParseError, match='take or talk'):
+        GRAMMAR.parse('ta bagel')
+
+
+def test_aliases_stand_for_a_whole_command():
+    assert _parsed('n') == [('go', 'north')]
+    assert _parsed('i') == [('items', None)]
+    with pytest.raises(ParseError):
+        GRAMMAR.parse('n please')
+
+
+def test_several_commands_on_a_line():
+    assert _parsed('take bagel; stats ;; l') == [('take', 'bagel'), ('stats', None), ('look', None)]
+
+
+def test_a_mistake_anywhere_stops_the_whole_line():
+    with pytest.raises(ParseError):
+        GRAMMAR.parse('take bagel; dance')
+    with pytest.raises(ParseError, match='needs something'):
+        GRAMMAR.parse('take')
+    with pytest.raises(ParseError, match='does not take'):
+        GRAMMAR.parse('stats now')
+    with pytest.raises(ParseError):
+        GRAMMAR.parse('  ;  ')
+
+
+def test_grammar_refuses_bad_names():
+    grammar = CommandGrammar()
+    grammar.add_command('look', OPTIONAL_ARGUMENT)
+    with pytest.raises(ValueError):
+        grammar.add_command('look')
+    with pytest.raises(ValueError):
+        grammar.add_command('two words', REQUIRED_ARGUMENT)
+    with pytest.raises(ValueError):
+        grammar.add_alias('x', 'dance')
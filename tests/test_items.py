@@ -0,0 +1,61 @@
+"""
+Tests for Item: its checks and the shared arrays its calories and weight are kept in.
+"""
+import sys
+import threading
+
+import pytest
+
+from main import Item
+
+
+def test_item_keeps_its_calories_and_weight():
+    item = Item('Bagel', 'Fresh from the oven', 300, 0.5)
+    assert (item.get_calories(), item.get_weight()) == (300, 0.5)
+    item.set_calories(-20)
+    assert item.calories == -20
+
+
+def test_item_checks_its_values():
+    with pytest.raises(ValueError):
+        Item('', 'Nothing', 0, 1)
+    with pytest.raises(ValueError):
+        Item('Rock', 'Heavy', 0, 501)
+
+
+def test_items_made_on_many_threads_get_their_own_slots():
+    threads = 8
+    per_thread = 20000
+    made = [[] for _ in range(threads)]
+    errors = []
+    start = threading.Barrier(threads)
+
+    def make(number: int) -> None:
+        start.wait()
+        try:
+            for count in range(per_thread):
+                item = Item(f'Snack {number}', 'Made on a thread', number, count % 100 / 10)
+                if count % 3:
+                    # let some go, so their slots are given back and reused while others are being made
+                    made[number].append(item)
+        except Exception as error:
+            errors.append(error)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=make, args=(number,)) for number in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    items = [item for kept in made for item in kept]
+    assert len(items) == threads * sum(1 for count in range(per_thread) if count % 3)
+    assert len({item._number for item in items}) == len(items)
+    for number, kept in enumerate(made):
+        assert all(item.get_calories() == number for item in kept)
+    assert all(item.get_weight() == int(item.get_weight() * 10) / 10 for item in items)
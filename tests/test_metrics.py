@@ -0,0 +1,94 @@
+"""
+Tests for metrics: the command totals and how they are written.
+"""
+import json
+
+import pytest
+
+from main import Game, shared_world
+from metrics import LATENCY_BUCKETS, PREFIX, CommandMetrics
+
+
+class Totals:
+    """
+    Totals class is another source of totals, as a SessionStore is.
+    """
+
+    @staticmethod
+    def snapshot() -> dict:
+        """
+        method to copy the totals into a dictionary
+        :return: dict - the totals
+        """
+        return {'things': 3}
+
+    @staticmethod
+    def to_prometheus(prefix: str) -> str:
+        """
+        method to write the totals in the Prometheus text format
+        :param prefix: str - the start of every metric's name
+        :return: str - the metrics
+        """
+        return f'{prefix}_things 3\n'
+
+
+def _measured() -> CommandMetrics:
+    metrics = CommandMetrics()
+    game = Game(shared_world(), seed=1)
+    game.metrics = metrics
+    for line in ('look', 'look', 'take chocolate fudge', 'dance'):
+        game.execute(line)
+    return metrics
+
+
+def test_commands_are_counted():
+    metrics = _measured()
+    assert metrics.commands['look'].calls == 2
+    assert metrics.commands['take'].calls == 1
+    assert metrics.parse_errors == 1
+    assert sum(metrics.commands['look'].buckets) == 2
+
+
+def test_errors_are_counted_by_type():
+    metrics = CommandMetrics()
+
+    def broken():
+        raise KeyError('gone')
+    with pytest.raises(KeyError):
+        metrics.call('broken', broken, ())
+    assert metrics.commands['broken'].errors == {'KeyError': 1}
+
+
+def test_json_snapshot():
+    metrics = _measured()
+    metrics.add_source('extra', Totals())
+    snapshot = json.loads(metrics.to_json())
+    assert snapshot['parse_errors'] == 1
+    assert snapshot['commands']['look']['calls'] == 2
+    assert sum(snapshot['commands']['look']['buckets'].values()) == 2
+    assert snapshot['extra'] == {'things': 3}
+
+
+def test_prometheus_text():
+    metrics = _measured()
+    metrics.add_source('extra', Totals())
+    lines = metrics.to_prometheus().splitlines()
+    assert f'{PREFIX}_command_calls_total{{command="look"}} 2' in lines
+    assert f'{PREFIX}_parse_errors_total 1' in lines
+    buckets = [line for line in lines if line.startswith(f'{PREFIX}_command_duration_seconds_bucket{{command="look"')]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets[-1].endswith('le="+Inf"} 2')
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert lines[-1] == f'{PREFIX}_things 3'
+
+
+def test_merge_adds_the_totals(tmp_path):
+    first, second = _measured(), _measured()
+    first.merge(second)
+    assert first.commands['look'].calls == 4
+    assert first.parse_errors == 2
+    path = str(tmp_path / 'metrics.prom')
+    first.write(path)
+    with open(path) as file:
+        assert f'{PREFIX}_command_calls_total{{command="look"}} 4\n' in file.read()
@@ -0,0 +1,171 @@
+"""
+Tests for multiplayer: many players in one shared world.
+"""
+import sys
+import threading
+
+import events
+import multiplayer
+from main import Game, Item, load_world_file, shared_world
+from multiplayer import SharedWorld
+from render import TextRenderer
+
+
+def _classroom(world):
+    return world.locations['posada_room']
+
+
+def test_each_player_is_credited_only_with_their_own_food():
+    world = shared_world()
+    shared = SharedWorld(world)
+    first, second = shared.join(1), shared.join(2)
+    for game in (first, second):
+        game.current_location = _classroom(world)
+    first.items.add_item(Item('Cake', 'A big cake', 1990, 2))
+    second.items.add_item(Item('Mint', 'A small mint', 10, 0.1))
+    first.items.add_item(Item('Cookie', 'A small cookie', 10, 0.1))
+
+    first.execute('give cake')
+    assert first.elf_needed_calories == 10
+    second.execute('give mint')
+    assert second.elf_needed_calories == 1990 and not second.game_over
+    first.execute('give cookie')
+    assert first.elf_needed_calories == 0 and first.game_over
+
+
+def test_taking_food_back_from_the_classroom_needs_it_again():
+    world = shared_world()
+    game = SharedWorld(world).join(1)
+    game.current_location = _classroom(world)
+    game.items.add_item(Item('Cake', 'A big cake', 500, 2))
+    game.execute('give cake')
+    game.execute('take cake')
+    game.execute('give cake')
+    assert game.elf_needed_calories == game.elf_calorie_goal - 500
+
+
+def test_exactly_one_of_two_players_takes_the_same_item():
+    world = shared_world()
+    fudge_shop = world.locations['fudge_shop']
+    for _ in range(50):
+        shared = SharedWorld(world)
+        players = [shared.join(number) for number in range(2)]
+        item = fudge_shop.get_inventory().find_item('chocolate fudge')
+        start = threading.Barrier(len(players))
+        taken = []
+
+        def take(game) -> None:
+            game.current_location = fudge_shop
+            start.wait()
+            taken.append(game.world_state.take_item(fudge_shop, item))
+
+        workers = [threading.Thread(target=take, args=(game,)) for game in players]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert sorted(taken) == [False, True]
+        assert item not in players[0].world_state.get_inventory(fudge_shop)
+
+
+def test_second_take_of_the_same_item_is_told_it_is_gone():
+    world = shared_world()
+    shared = SharedWorld(world)
+    first, second = shared.join(1), shared.join(2)
+    for game in (first, second):
+        game.current_location = world.locations['fudge_shop']
+    assert [event.kind for event in first.execute('take chocolate fudge').events] == [events.TOOK_ITEM]
+    assert [event.kind for event in second.execute('take chocolate fudge').events] == [events.NO_SUCH_ITEM]
+    assert first.items.find_item('chocolate fudge') is not None
+    assert second.items.find_item('chocolate fudge') is None
+
+
+def test_only_takes_beaten_by_another_player_are_lost_races():
+    world = shared_world()
+    fudge_shop = world.locations['fudge_shop']
+    shared = SharedWorld(world)
+    first, second = shared.join(1), shared.join(2)
+    for game in (first, second):
+        game.current_location = fudge_shop
+    item = fudge_shop.get_inventory().find_item('chocolate fudge')
+    assert first.world_state.take_item(fudge_shop, item)
+    assert not second.world_state.take_item(fudge_shop, item)
+    second.execute('take unicorn')
+    second.execute('take chocolate fudge')
+    assert shared.rooms.lock_stats()['lost_races'] == 1
+
+
+def test_items_given_are_seen_by_every_player_and_the_world_is_not_changed():
+    world = shared_world()
+    fudge_shop = world.locations['fudge_shop']
+    shared = SharedWorld(world)
+    first, second = shared.join(1), shared.join(2)
+    for game in (first, second):
+        game.current_location = fudge_shop
+    second.execute('look')
+    first.execute('take chocolate fudge')
+    assert 'Chocolate fudge' not in TextRenderer().render(second.execute('look'))
+    first.execute('give chocolate fudge')
+    assert 'Chocolate fudge' in TextRenderer().render(second.execute('look'))
+    first.reset(3)
+    assert shared.rooms.items[fudge_shop] is second.world_state.get_inventory(fudge_shop)
+    assert Game(world, seed=1).world_state.get_inventory(fudge_shop) is fudge_shop.get_inventory()
+
+
+def _goto_everywhere(shared: SharedWorld, threads: int) -> list[str]:
+    places = sorted({location.get_name() for location in shared.world.locations.values()})
+    start = threading.Barrier(threads)
+    failures = []
+
+    def travel(game, first: int) -> None:
+        start.wait()
+        # each thread in its own order, so they want different routes at the same time
+        for place in (places[first:] + places[:first]) * 3:
+            kinds = game.execute('goto ' + place).kinds()
+            if events.COMMAND_FAILED in kinds or events.UNKNOWN_PLACE in kinds:
+                failures.append(place)
+            elif events.NO_ROUTE not in kinds and game.current_location.get_name() != place:
+                failures.append(place)
+
+    workers = [threading.Thread(target=travel, args=(shared.join(number), number % len(places)))
+               for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return failures
+
+
+def test_goto_from_many_threads_at_once():
+    # switch threads as often as possible, so they interleave inside the route table
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(50):
+            # a new world each time, so the threads also race to build its routes
+            world = load_world_file()
+            world.get_routes().max_trees = 1
+            assert _goto_everywhere(SharedWorld(world), threads=8) == []
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_benchmark_keeps_every_item():
+    world = shared_world()
+    items = sum(len(location.get_inventory()) for location in world.locations.values())
+    for per_location in (True, False):
+        totals = multiplayer.benchmark(world, players=200, threads=4, commands=20, seed=1,
+                                       per_location=per_location)
+        assert totals['items'] == items
+        assert totals['commands'] == 200 * 20
+
+
+def test_crowded_threads_in_rooms_of_their_own_never_wait():
+    world = shared_world()
+    items = sum(len(location.get_inventory()) for location in world.locations.values())
+    alone = multiplayer.benchmark(world, players=80, threads=4, commands=20, seed=1, crowd=4)
+    assert alone['crowded_rooms'] == 4 and alone['contended'] == 0
+    assert alone['items'] == items and alone['takes'] > 0
+    together = multiplayer.benchmark(world, players=80, threads=4, commands=20, seed=1, crowd=1,
+                                     per_location=False)
+    assert together['crowded_rooms'] == 1 and together['items'] == items
@@ -0,0 +1,52 @@
+"""
+Tests for names: matching what a player typed to the names of items and NPCs.
+"""
+from main import Game, shared_world
+from names import NameIndex, edit_distance, normalize
+
+
+def _index() -> NameIndex:
+    return NameIndex((name, name) for name in ('Chocolate fudge', 'Cherry fudge', 'Peanut butter fudge',
+                                               'Professor Posada', 'Posada\'s Classroom'))
+
+
+def test_names_are_normalized():
+    assert normalize('  Posada\'s   CLASSROOM! ') == 'posadas classroom'
+
+
+def test_exact_prefix_and_word_matches():
+    index = _index()
+    assert index.match('cherry FUDGE') == [['Cherry fudge']]
+    assert index.match('choc') == [['Chocolate fudge']]
+    assert index.match('peanut') == [['Peanut butter fudge']]
+    assert index.match('butter') == [['Peanut butter fudge']]
+    assert index.match('fudge') == [['Cherry fudge'], ['Chocolate fudge'], ['Peanut butter fudge']]
+
+
+def test_misspelled_names_match():
+    index = _index()
+    assert index.match('chocolat fudge') == [['Chocolate fudge']]
+    assert index.match('chcolate') == [['Chocolate fudge']]
+    assert index.match('profesor posda') == [['Professor Posada']]
+    assert index.match('xyzzy') == []
+    # short words must be typed right
+    assert index.match('fx') == []
+
+
+def test_removed_names_no_longer_match():
+    index = _index()
+    index.remove('Chocolate fudge', 'Chocolate fudge')
+    assert index.match('chocolat') == []
+    assert index.match('fudge') == [['Cherry fudge'], ['Peanut butter fudge']]
+
+
+def test_edit_distance_stops_at_the_limit():
+    assert edit_distance('fudge', 'fudge', 2) == 0
+    assert edit_distance('fudge', 'fugde', 2) <= 2
+    assert edit_distance('fudge', 'bagels', 2) > 2
+
+
+def test_game_takes_a_misspelled_item():
+    game = Game(shared_world(), seed=1)
+    game.execute('take chocolat fudge')
+    assert game.items.find_item('chocolate fudge') is not None
@@ -0,0 +1,68 @@
+"""
+Tests for planner: the food-run plan behind the hint command.
+"""
+import events
+import planner
+import worldgen
+from main import Game, shared_world
+from routes import RouteTable
+
+# what a command that did not go to plan reports
+FAILURES = {events.INVALID_DIRECTION, events.TOO_HEAVY, events.NO_SUCH_ITEM, events.AMBIGUOUS_NAME,
+            events.NOT_CARRIED, events.REJECTED_NON_FOOD, events.REJECTED_FOOD, events.TELEPORTED,
+            events.PARSE_ERROR, events.COMMAND_FAILED}
+
+
+def _follow(game: Game, plan: planner.FoodPlan) -> None:
+    for command in plan.commands:
+        game.execute(command)
+
+
+def test_plan_wins_the_shipped_world():
+    game = Game(shared_world(), seed=1)
+    plan = planner.plan_food_run(game)
+    assert plan.possible and plan.commands
+    _follow(game, plan)
+    assert game.game_over and game.elf_needed_calories == 0
+
+
+def test_hint_is_the_first_command_of_the_plan():
+    game = Game(shared_world(), seed=1)
+    command, plan = planner.hint(game)
+    assert command == plan.commands[0]
+
+
+def test_search_limit_bounds_each_trip(monkeypatch):
+    world = worldgen.generate_world(3000, seed=2)
+    planner.prepare(world)
+    searched = []
+    tree_from = RouteTable.tree_from
+
+    def counting_tree_from(self, source, limit=None, reached=None):
+        tree = tree_from(self, source, limit, reached)
+        searched.append(sum(1 for distance in tree.distance if distance >= 0))
+        return tree
+
+    monkeypatch.setattr(RouteTable, 'tree_from', counting_tree_from)
+    monkeypatch.setattr(planner, 'SEARCH_LIMIT', 200)
+    bounded = planner.plan_food_run(Game(world, seed=1))
+    assert bounded.commands and bounded.calories > 0
+    assert searched and max(searched) <= 200
+
+    game = Game(world, seed=1)
+    for command in bounded.commands:
+        assert not FAILURES.intersection(game.execute(command).kinds()), command
+    assert game.elf_calorie_goal - game.elf_needed_calories == min(bounded.calories, game.elf_calorie_goal)
+    assert game.game_over == bounded.possible
+
+
+def test_tree_from_stops_at_the_limit():
+    world = worldgen.generate_world(3000, seed=2)
+    routes = world.get_routes()
+    start = routes.locations[0]
+    reached = []
+    tree = routes.tree_from(start, 100, reached)
+    assert 100 <= len(reached) < 3000
+    assert len(set(reached)) == len(reached) == sum(1 for distance in tree.distance if distance >= 0)
+    everything = routes.tree_from(start)
+    assert all(tree.distance[number] == everything.distance[number] for number in reached)
@@ -0,0 +1,74 @@
+"""
+Tests for replay: recording a game's commands and playing them again.
+"""
+import io
+from datetime import datetime, timedelta
+from random import Random
+
+import pytest
+
+import replay
+from main import Game, shared_world
+from render import TextRenderer
+from simulate import RandomPolicy
+
+
+class SteppingClock:
+    """
+    SteppingClock class is a clock that moves on a second each time it is read.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.now = datetime(2024, 4, 1, 10, 0)
+
+    def __call__(self) -> datetime:
+        """
+        method to read the clock
+        :return: datetime - a second later than the last reading
+        """
+        self.now += timedelta(seconds=1)
+        return self.now
+
+
+def _play_recorded(seed: int, turns: int) -> tuple[str, list[str]]:
+    game = Game(shared_world(), seed=seed, clock=SteppingClock())
+    game.time_limit = None
+    log = io.StringIO()
+    game.log = replay.EventLog(log)
+    renderer = TextRenderer()
+    texts = [renderer.render(game.start())]
+    policy = RandomPolicy()
+    policy.begin(game, Random(seed))
+    for _ in range(turns):
+        texts.append(renderer.render(game.execute(policy.choose(game))))
+        if game.game_over:
+            break
+    return log.getvalue(), texts
+
+
+def test_replay_gives_the_same_output():
+    for seed in (1, 2, 3):
+        log, texts = _play_recorded(seed, 200)
+        renderer = TextRenderer()
+        replayed = []
+        replay.replay(io.StringIO(log), on_result=lambda result: replayed.append(renderer.render(result)))
+        assert replayed == texts
+
+
+def test_log_records_the_seed_and_every_command():
+    log, texts = _play_recorded(5, 20)
+    seed, times, commands = replay.read_log(io.StringIO(log))
+    assert seed == 5
+    assert len(commands) == len(texts) - 1
+    assert len(times) == len(commands) + 1
+
+
+def test_bad_logs_are_refused():
+    with pytest.raises(ValueError):
+        replay.read_log(['{"type": "command", "line": "look", "time": "2024-04-01T10:00:00"}'])
+    with pytest.raises(ValueError):
+        replay.read_log([])
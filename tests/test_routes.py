@@ -0,0 +1,65 @@
+"""
+Tests for routes: shortest ways between Locations, and the goto command.
+"""
+import events
+from main import Game, Location, World, shared_world
+
+
+def _corridor(length: int) -> World:
+    world = World()
+    previous = None
+    for number in range(length):
+        location = Location(f'Room {number}', f'Room number {number}')
+        world.locations[f'r{number}'] = location
+        if previous is not None:
+            previous.add_location('North', location)
+            location.add_location('South', previous)
+        previous = location
+    return world
+
+
+def test_route_across_the_one_way_ferry():
+    world = shared_world()
+    museum, gv_road = world.locations['museum'], world.locations['gv_road']
+    assert world.route(museum, gv_road) == ['Ferry']
+    assert world.route(gv_road, museum) is None
+    route = world.route(world.locations['fudge_shop'], gv_road)
+    assert route is not None and route[-1] == 'Ferry'
+
+
+def test_route_to_the_same_place_is_empty():
+    world = shared_world()
+    assert world.route(world.locations['museum'], world.locations['museum']) == []
+
+
+def test_route_gets_shorter_when_an_exit_is_added():
+    world = _corridor(6)
+    first, last = world.locations['r0'], world.locations['r5']
+    routes = world.get_routes()
+    assert routes.route(first, last) == ['North'] * 5
+    assert routes.route(world.locations['r1'], last) == ['North'] * 4
+    world.locations['r1'].add_location('Shortcut', world.locations['r4'])
+    assert routes.route(first, last) == ['North', 'Shortcut', 'North']
+    assert routes.route(last, first) == ['South'] * 5
+
+
+def test_a_new_location_is_routed_to():
+    world = _corridor(3)
+    routes = world.get_routes()
+    assert routes.route_to_name(world.locations['r0'], 'room 2') == ['North', 'North']
+    attic = Location('Attic', 'Dusty')
+    world.locations['attic'] = attic
+    world.locations['r2'].add_location('Up', attic)
+    assert routes.route(world.locations['r0'], attic) == ['North', 'North', 'Up']
+
+
+def test_goto_walks_the_route():
+    world = shared_world()
+    game = Game(world, seed=1)
+    game.execute('goto museum')
+    assert game.current_location is world.locations['museum']
+    assert [event.kind for event in game.execute('goto museum').events] == [events.ALREADY_THERE]
+    assert [event.kind for event in game.execute('goto atlantis').events] == [events.UNKNOWN_PLACE]
+    game.execute('goto gv road')
+    assert game.current_location is world.locations['gv_road']
+    assert [event.kind for event in game.execute('goto museum').events] == [events.NO_ROUTE]
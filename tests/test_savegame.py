@@ -0,0 +1,72 @@
+"""
+Tests for savegame: snapshots and the autosave journal.
+"""
+import os
+
+import savegame
+from main import Game, shared_world
+
+
+def _item_names(game: Game) -> list[str]:
+    return sorted(item.get_name() for item in game.items)
+
+
+def test_snapshot_round_trip():
+    world = shared_world()
+    game = Game(world, seed=1)
+    game.execute('take chocolate fudge')
+    restored = savegame.load_game(savegame.snapshot(game), world)
+    assert _item_names(restored) == ['Chocolate fudge']
+    assert restored.current_location is game.current_location
+    assert restored.world_state.get_inventory(game.current_location).find_item('chocolate fudge') is None
+
+
+def test_journal_replays_every_delta(tmp_path):
+    world = shared_world()
+    game = Game(world, seed=1)
+    journal = savegame.SaveJournal(str(tmp_path / 'game.journal'))
+    journal.checkpoint(game)
+    game.execute('take chocolate fudge')
+    journal.autosave(game)
+    game.execute('take cherry fudge')
+    journal.autosave(game)
+    assert journal.autosave(game) == 0
+    assert _item_names(savegame.SaveJournal(journal.path).load(world)) == ['Cherry fudge', 'Chocolate fudge']
+
+
+def test_autosave_after_damaged_journal_is_read_back(tmp_path):
+    world = shared_world()
+    game = Game(world, seed=1)
+    path = str(tmp_path / 'game.journal')
+    journal = savegame.SaveJournal(path)
+    journal.checkpoint(game)
+    game.execute('take chocolate fudge')
+    journal.autosave(game)
+    game.execute('take cherry fudge')
+    journal.autosave(game)
+    # a crash cut the last autosave short
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    journal = savegame.SaveJournal(path)
+    game = journal.load(world)
+    assert _item_names(game) == ['Chocolate fudge']
+    game.execute('take peanut')
+    assert journal.autosave(game) > 0
+
+    restored = savegame.SaveJournal(path).load(world)
+    assert _item_names(restored) == ['Chocolate fudge', 'Peanut butter fudge']
+
+
+def test_long_journal_loads(tmp_path):
+    world = shared_world()
+    game = Game(world, seed=1)
+    journal = savegame.SaveJournal(str(tmp_path / 'game.journal'))
+    journal.checkpoint(game)
+    for _ in range(500):
+        game.execute('take chocolate fudge')
+        journal.autosave(game)
+        game.execute('give chocolate fudge')
+        journal.autosave(game)
+    restored = savegame.SaveJournal(journal.path).load(world)
+    assert _item_names(restored) == []
+    assert restored.world_state.get_inventory(restored.current_location).find_item('chocolate fudge') is not None
@@ -0,0 +1,85 @@
+"""
+Tests for sessions: games evicted to disk and read back as they were.
+"""
+import os
+
+import savegame
+from main import Game, shared_world
+from sessions import SessionStore
+
+
+def _played(seed: int) -> Game:
+    game = Game(shared_world(), seed=seed)
+    game.start()
+    for line in ('look', 'hint', 'go north', 'look'):
+        game.execute(line)
+    # the random generator is only made when first needed, so make sure it is saved mid-stream
+    game.rng.random()
+    return game
+
+
+def test_least_recently_used_game_is_evicted(tmp_path):
+    store = SessionStore(shared_world(), str(tmp_path), max_sessions=2)
+    first, second, third = (store.add(_played(seed)) for seed in (1, 2, 3))
+    assert store.evictions == 1
+    assert first in store.evicted and list(store.resident) == [second, third]
+    assert os.path.exists(store._path(first))
+    store.get(second)
+    store.add(_played(4))
+    assert third in store.evicted and second in store.resident
+    assert len(store) == 4 and store.evictions == 2
+
+
+def test_rehydrated_game_carries_on_as_before(tmp_path):
+    world = shared_world()
+    store = SessionStore(world, str(tmp_path), max_sessions=1)
+    game = _played(5)
+    game.max_weight = 12
+    game.deadline = 1234.5
+    expected = Game(world, seed=5)
+    savegame.restore(expected, savegame.snapshot(game))
+    expected.rng_state = game.rng_state
+    session_id = store.add(game)
+    store.add(_played(6))
+
+    restored = store.get(session_id)
+    assert restored is not game and not os.path.exists(store._path(session_id))
+    assert restored.seed == 5 and restored.max_weight == 12 and restored.deadline == 1234.5
+    assert savegame.snapshot(restored) == savegame.snapshot(game)
+    assert restored.rng.random() == expected.rng.random()
+
+
+def test_hits_misses_and_evictions_are_counted(tmp_path):
+    store = SessionStore(shared_world(), str(tmp_path), max_sessions=1)
+    first = store.add(_played(1))
+    second = store.add(_played(2))
+    store.get(second)
+    store.get(second)
+    store.get(first)
+    store.get(second)
+    snapshot = store.snapshot()
+    assert (snapshot['hits'], snapshot['misses'], snapshot['evictions']) == (2, 2, 3)
+    assert snapshot['resident'] == 1 and snapshot['evicted'] == 1
+    assert store.rehydrate_percentile() > 0 and len(store.rehydrate_seconds) == 2
+    assert 'gvzork_session_hits_total 2' in store.to_prometheus('gvzork')
+
+
+def test_games_in_use_are_not_evicted(tmp_path):
+    store = SessionStore(shared_world(), str(tmp_path), max_sessions=1)
+    first = store.add(_played(1))
+    store.checkout(first)
+    second = store.add(_played(2))
+    assert first in store.resident and second in store.evicted
+    store.checkin(first)
+    store.get(second)
+    assert first in store.evicted
+
+
+def test_close_deletes_the_evicted_games():
+    store = SessionStore(shared_world(), max_sessions=1)
+    store.add(_played(1))
+    store.add(_played(2))
+    directory = store.directory
+    assert os.listdir(directory)
+    store.close()
+    assert not os.path.exists(directory) and len(store) == 0
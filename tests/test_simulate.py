@@ -0,0 +1,34 @@
+"""
+Tests for simulate: the computer players and the totals.
+"""
+from random import Random
+
+import simulate
+from main import Game, Location, shared_world
+
+
+def test_random_policy_looks_in_a_dead_end():
+    game = Game(shared_world(), seed=1)
+    game.current_location = Location('Dead End', 'Nowhere to go and nothing to do')
+    policy = simulate.RandomPolicy()
+    policy.begin(game, Random(1))
+    assert policy.choose(game) == 'look'
+
+
+def test_random_policy_chooses_what_makes_sense():
+    game = Game(shared_world(), seed=1)
+    policy = simulate.RandomPolicy()
+    policy.begin(game, Random(1))
+    location = game.current_location
+    possible = {'go ' + direction.lower() for direction in location.get_locations()}
+    possible |= {'take ' + item.get_name().lower() for item in game.world_state.get_inventory(location)}
+    possible |= {'talk ' + npc.get_name().lower() for npc in location.get_npcs()}
+    assert all(policy.choose(game) in possible for _ in range(50))
+
+
+def test_simulation_is_repeatable():
+    simulation = simulate.Simulation(simulate.RandomPolicy.name, max_turns=100, seed=3)
+    first = simulate.simulate(simulation, 20, workers=1)
+    second = simulate.simulate(simulation, 20, workers=1)
+    assert first.as_dict() == second.as_dict()
+    assert first.games == 20
@@ -0,0 +1,80 @@
+"""
+Tests for timers: deadlines kept in one heap, and the game's time limit.
+"""
+import asyncio
+
+import events
+from main import Game, shared_world
+from timers import TimerHeap
+
+
+class FakeClock:
+    """
+    FakeClock class is a monotonic clock that only moves when told to.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        No Parameters
+        """
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        """
+        method to read the clock
+        :return: float - the time
+        """
+        return self.now
+
+
+def test_timers_expire_in_order_of_their_deadlines():
+    clock = FakeClock()
+    heap = TimerHeap(clock)
+    fired = []
+    for deadline in (105, 101, 103):
+        heap.schedule(deadline, lambda deadline=deadline: fired.append(deadline))
+    assert heap.next_deadline() == 101
+    clock.now = 103.5
+    assert heap.expire() == 2
+    assert fired == [101, 103]
+    assert len(heap) == 1
+
+
+def test_cancelled_timers_never_expire():
+    heap = TimerHeap(FakeClock())
+    fired = []
+    timers = [heap.schedule(number, lambda number=number: fired.append(number)) for number in range(200)]
+    for timer in timers[:150]:
+        heap.cancel(timer)
+    heap.cancel(timers[0])
+    assert len(heap) == 50
+    assert len(heap.heap) < 200
+    assert heap.next_deadline() == 150
+    assert heap.expire(1000) == 50
+    assert fired == list(range(150, 200))
+
+
+def test_run_wakes_for_the_earliest_deadline():
+    async def main():
+        heap = TimerHeap()
+        changed = asyncio.Event()
+        fired = asyncio.Event()
+        task = asyncio.create_task(heap.run(changed))
+        await asyncio.sleep(0)
+        heap.schedule(heap.clock() + 0.01, fired.set)
+        changed.set()
+        await asyncio.wait_for(fired.wait(), 1)
+        task.cancel()
+    asyncio.run(main())
+
+
+def test_game_time_limit_uses_the_monotonic_clock():
+    clock = FakeClock()
+    game = Game(shared_world(), seed=1, monotonic=clock)
+    game.start()
+    assert game.time_left() == game.time_limit
+    clock.now += game.time_limit + 1
+    result = game.execute('look')
+    assert game.game_over
+    assert result.events[-1].kind == events.GAME_OVER
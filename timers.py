@@ -0,0 +1,141 @@
+"""
+Timers - deadlines for many games at once, kept in one heap.
+
+A server hosting thousands of games gives each one a deadline. Rather than a
+thread or a polling loop per game, every deadline goes into one TimerHeap, and a
+single task sleeps until the earliest one is due and then runs the callbacks of
+every timer that has expired. Scheduling and expiring a timer take O(log n) time.
+Cancelled timers are left in the heap and skipped when they reach the top (and the
+heap is rebuilt without them if they come to outnumber the live ones), so
+cancelling takes O(1) time.
+
+Deadlines are read from a monotonic clock (time.monotonic by default), so
+changing the computer's time does not move them.
+"""
+import asyncio
+import contextlib
+import heapq
+import time
+
+
+class Timer:
+    """
+    Timer class is one deadline in a TimerHeap.
+
+    Attributes:
+        deadline: float - when the timer expires, as read from the heap's clock
+        callback: callable - called with no arguments when the timer expires
+        cancelled: bool - True once the timer is cancelled or has expired
+    """
+    __slots__ = ('deadline', 'callback', 'cancelled')
+
+    def __init__(self, deadline: float, callback):
+        """
+        Constructor
+        :param deadline: float - when the timer expires
+        :param callback: callable - called with no arguments when the timer expires
+        """
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+
+class TimerHeap:
+    """
+    TimerHeap class keeps timers in order of their deadlines.
+
+    Attributes:
+        clock: callable - returns the current time in seconds, never going backwards
+        heap: list[tuple[float, int, Timer]] - the timers, earliest first, with the order
+            they were scheduled in to break ties
+        scheduled: int - number of timers ever scheduled
+        live: int - number of timers that are neither cancelled nor expired
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Constructor
+        :param clock: callable - returns the current time in seconds, time.monotonic by default
+        """
+        self.clock = clock
+        self.heap = []
+        self.scheduled = 0
+        self.live = 0
+
+    def __len__(self) -> int:
+        """
+        method to count the timers waiting to expire
+        :return: int - number of live timers
+        """
+        return self.live
+
+    def schedule(self, deadline: float, callback) -> Timer:
+        """
+        method to add a timer
+        :param deadline: float - when it expires, as read from the clock
+        :param callback: callable - called with no arguments when it expires
+        :return: Timer - the timer, which can be cancelled
+        """
+        timer = Timer(deadline, callback)
+        heapq.heappush(self.heap, (deadline, self.scheduled, timer))
+        self.scheduled += 1
+        self.live += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        """
+        method to stop a timer from expiring; cancelling it again, or after it has expired, does nothing
+        :param timer: Timer - a timer from this heap
+        """
+        if timer.cancelled:
+            return
+        timer.cancelled = True
+        self.live -= 1
+        if len(self.heap) > 64 and self.live < len(self.heap) // 2:
+            self.heap = [entry for entry in self.heap if not entry[2].cancelled]
+            heapq.heapify(self.heap)
+
+    def next_deadline(self) -> float | None:
+        """
+        getter for the deadline of the timer that expires first
+        :return: float - its deadline, None if there are no live timers
+        """
+        heap = self.heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def expire(self, now: float = None) -> int:
+        """
+        method to run the callback of every timer whose deadline has passed, earliest first
+        :param now: float - the current time, read from the clock if not given
+        :return: int - how many timers expired
+        """
+        if now is None:
+            now = self.clock()
+        heap = self.heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            timer = heapq.heappop(heap)[2]
+            if timer.cancelled:
+                continue
+            timer.cancelled = True
+            self.live -= 1
+            expired += 1
+            timer.callback()
+        return expired
+
+    async def run(self, changed: asyncio.Event) -> None:
+        """
+        method that sleeps until the earliest deadline, runs the callbacks of the timers
+        that have expired, and sleeps again, until it is cancelled
+        :param changed: asyncio.Event - set to wake it early, such as when a deadline
+            earlier than all the others is added
+        """
+        while True:
+            changed.clear()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - self.clock())
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(changed.wait(), timeout)
+            self.expire()
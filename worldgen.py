@@ -0,0 +1,173 @@
+"""
+World generator - makes GV Zork worlds of any size from a seed, for testing how
+the game and its tools behave on big maps.
+
+Every Location after the first is joined both ways to a random earlier one, so
+the world is always connected and every Location can be reached from every other.
+Extra two-way tunnels between random Locations bring the average number of exits
+up to the branching factor. Items and NPCs are scattered with the given densities,
+and the last Location is Posada's Classroom.
+
+The world is made one Location at a time and exits only lead to Locations that
+already exist, so nothing has to be held back while it is built: generate_records
+yields the records one by one (to write a world file of any size with almost no
+memory), and generate_world builds the World from them with Location.add_location,
+add_item and add_npc. The same seed and settings always give the same world.
+
+Usage: python worldgen.py --size N [--branching B] [--items D] [--npcs D] [--seed S] [--output FILE]
+"""
+import argparse
+import json
+import math
+import sys
+from random import Random
+
+from main import Item, Location, NPC, World
+
+CLASSROOM = 'Posada\'s Classroom'
+# the world's Location names are an adjective and a place, and its descriptions one of these
+ADJECTIVES = ('Quiet', 'Busy', 'Dusty', 'Bright', 'Narrow', 'Old', 'New', 'Cold', 'Sunny', 'Crowded')
+PLACES = ('Hallway', 'Lab', 'Library', 'Lounge', 'Office', 'Stairwell', 'Courtyard', 'Cafe', 'Classroom',
+          'Study Room')
+DESCRIPTIONS = ('Nothing much to see here.', 'Students hurry past.', 'It smells like coffee.',
+                'The lights flicker.', 'A poster asks you to recycle.')
+# name, description, lowest and highest calories, lowest and highest weight in tenths of a pound
+ITEM_KINDS = (('Bagel', 'Fresh from the oven', 250, 400, 2, 5),
+              ('Pizza slice', 'Still warm', 250, 350, 3, 6),
+              ('Apple', 'Crisp and shiny', 60, 120, 3, 5),
+              ('Sandwich', 'Turkey and swiss', 300, 600, 5, 10),
+              ('Fudge', 'A Mackinac favorite', 600, 900, 4, 6),
+              ('Energy drink', 'Probably not healthy', 100, 250, 10, 15),
+              ('Textbook', 'Heavy and expensive', 0, 0, 30, 60),
+              ('Laptop', 'Someone will miss this', 0, 0, 40, 70),
+              ('Rock', 'Just a rock', 0, 0, 20, 150),
+              ('Moldy sandwich', 'Green in places', -300, -50, 5, 10),
+              ('Expired milk', 'Do not open', -400, -100, 20, 30))
+NPC_DESCRIPTION = 'Another student, busy with homework'
+NPC_MESSAGES = ('Have you seen the professor?', 'I am so behind on this project.', 'The vending machine ate my dollar.',
+                'Did you do the reading?', 'Grand Valley is huge.')
+# how many Locations can be sent to when Posada rejects an item
+GV_REGION_SIZE = 64
+
+
+def generate_records(size: int, branching: float = 3.0, item_density: float = 1.0,
+                     npc_density: float = 0.05, seed: int = 0):
+    """
+    Makes the records of a world (see main.load_world for their format), one at a time.
+    :param size: int - number of Locations, at least 2
+        Raises: ValueError if it is less than 2
+    :param branching: float - the average number of exits from a Location, at least 2
+    :param item_density: float - the average number of items in a Location
+    :param npc_density: float - the average number of NPCs in a Location
+    :param seed: int - the same seed always gives the same world
+    :return: generator of dict - the records, each one only referring to Locations before it
+    """
+    if size < 2:
+        raise ValueError('A world needs at least 2 locations!')
+    rng = Random(seed)
+    tunnels = max(0.0, branching - 2) / 2
+    gv_every = max(1, size // GV_REGION_SIZE)
+
+    for number in range(size):
+        location_id = f'r{number}'
+        if number == size - 1:
+            record = {'type': 'location', 'id': location_id, 'name': CLASSROOM,
+                      'description': 'Your favorite class!'}
+        else:
+            record = {'type': 'location', 'id': location_id,
+                      'name': f'{rng.choice(ADJECTIVES)} {rng.choice(PLACES)}',
+                      'description': rng.choice(DESCRIPTIONS)}
+            if number == 0:
+                record['region'] = 'island'
+            elif number % gv_every == 0:
+                record['region'] = 'gv'
+        yield record
+
+        if number > 0:
+            parent = f'r{rng.randrange(number)}'
+            yield {'type': 'exit', 'from': location_id, 'direction': 'Back', 'to': parent}
+            yield {'type': 'exit', 'from': parent, 'direction': f'Door {number}', 'to': location_id}
+            targets = set()
+            for _ in range(_how_many(rng, tunnels)):
+                targets.add(rng.randrange(number))
+            for target in sorted(targets):
+                yield {'type': 'exit', 'from': location_id, 'direction': f'Tunnel {target}', 'to': f'r{target}'}
+                yield {'type': 'exit', 'from': f'r{target}', 'direction': f'Tunnel {number}', 'to': location_id}
+
+        if number == size - 1:
+            yield {'type': 'npc', 'location': location_id, 'name': 'Professor Posada',
+                   'description': 'She is waiting for her food', 'messages': ['You are late!']}
+            continue
+        for _ in range(_how_many(rng, item_density)):
+            name, description, lowest, highest, lightest, heaviest = rng.choice(ITEM_KINDS)
+            yield {'type': 'item', 'location': location_id, 'name': name, 'description': description,
+                   'calories': rng.randint(lowest, highest), 'weight': rng.randint(lightest, heaviest) / 10}
+        for _ in range(_how_many(rng, npc_density)):
+            yield {'type': 'npc', 'location': location_id, 'name': f'Student {number}',
+                   'description': NPC_DESCRIPTION, 'messages': rng.sample(NPC_MESSAGES, 2)}
+
+
+def _how_many(rng: Random, average: float) -> int:
+    """
+    Picks a whole number that comes out at the average over many picks.
+    """
+    whole = math.floor(average)
+    return whole + (rng.random() < average - whole)
+
+
+def generate_world(size: int, branching: float = 3.0, item_density: float = 1.0,
+                   npc_density: float = 0.05, seed: int = 0) -> World:
+    """
+    Builds a world from generate_records, one record at a time.
+    :param size: int - number of Locations, at least 2
+    :param branching: float - the average number of exits from a Location, at least 2
+    :param item_density: float - the average number of items in a Location
+    :param npc_density: float - the average number of NPCs in a Location
+    :param seed: int - the same seed always gives the same world
+    :return: World - the generated world, not frozen
+    """
+    world = World()
+    locations = []
+    for record in generate_records(size, branching, item_density, npc_density, seed):
+        kind = record['type']
+        if kind == 'location':
+            location = Location(record['name'], record['description'])
+            world.locations[record['id']] = location
+            locations.append(location)
+            if 'region' in record:
+                world.regions.setdefault(record['region'], []).append(location)
+        elif kind == 'exit':
+            source = locations[int(record['from'][1:])]
+            source.add_location(record['direction'], locations[int(record['to'][1:])])
+        elif kind == 'item':
+            item = Item(record['name'], record['description'], record['calories'], record['weight'])
+            locations[-1].add_item(item)
+        else:
+            npc = NPC(record['name'], record['description'])
+            for message in record['messages']:
+                npc.add_message(message)
+            locations[-1].add_npc(npc)
+    return world
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a GV Zork world file of any size.')
+    parser.add_argument('--size', type=int, required=True, help='number of locations')
+    parser.add_argument('--branching', type=float, default=3.0, help='average number of exits from a location')
+    parser.add_argument('--items', type=float, default=1.0, help='average number of items in a location')
+    parser.add_argument('--npcs', type=float, default=0.05, help='average number of NPCs in a location')
+    parser.add_argument('--seed', type=int, default=0, help='the same seed always gives the same world')
+    parser.add_argument('--output', metavar='FILE', help='file to write, standard output if not given')
+    args = parser.parse_args()
+
+    file = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for record in generate_records(args.size, args.branching, args.items, args.npcs, args.seed):
+            file.write(json.dumps(record) + '\n')
+    finally:
+        if args.output:
+            file.close()
+
+
+if __name__ == '__main__':
+    main()